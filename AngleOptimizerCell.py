@@ -41,10 +41,16 @@ class NoScrollTabWidget(QTabWidget):
         return super(NoScrollTabWidget, self).eventFilter(watched, event)
 
 class Worker(QObject):
-    "Worker for executing angle optimizations using threading"
+    """
+    Worker for executing angle optimizations using threading.
+    With more than one start, the optimization is run from several initial guesses at once (see `Optimizer.optimizeMultistart`), sending the number of finished starts through `progress`.
+    With one start, every few iterations are sent through `iteration` (iteration, objective, constraint violation, trajectory points).
+    """
     finished = pyqtSignal(object, object, object)
+    progress = pyqtSignal(int, int)
+    iteration = pyqtSignal(int, float, float, object)
 
-    def __init__(self, axis_to_optimize, max_or_min, variables: dict, data: list[list], constraints: list[list], init_guess: list[float]):
+    def __init__(self, axis_to_optimize, max_or_min, variables: dict, data: list[list], constraints: list[list], init_guess: list[float], starts: int = 1):
         super().__init__()
         self.axis_to_optimize = axis_to_optimize
         self.max_or_min = max_or_min
@@ -52,7 +58,9 @@ class Worker(QObject):
         self.data = data
         self.constraints = constraints
         self.init_guess = init_guess
+        self.starts = starts
         self.isrunning = False
+        self.cancelled = False
 
     def run(self):
         self.isrunning = True
@@ -62,13 +70,28 @@ class Worker(QObject):
             a.setupConstants(self.data[1], self.data[2], self.data[3])
             a.setupConstraints(self.constraints)
             
-            res, c = a.optimize(self.axis_to_optimize, self.max_or_min, self.init_guess)
-            d = a.postprocess()
+            if self.starts > 1:
+                result = a.optimizeMultistart(self.axis_to_optimize, self.max_or_min, [self.init_guess], self.starts, self.progress.emit, lambda: self.cancelled)
+                if isinstance(result[0], str):
+                    raise Exception(result[1])
+                res, c, runner_ups = result
+                d = a.postprocess()
+                d['runner_ups'] = [(r, a.isFeasible(r.x)) for r, _ in runner_ups]
+            else:
+                def progress(iteration, objective, violation, F):
+                    xs, zs = a.trajectory(F)
+                    self.iteration.emit(iteration, objective, violation, [[x - xs[0], z - zs[0]] for x, z in zip(xs, zs)])
+                res, c = a.optimize(self.axis_to_optimize, self.max_or_min, self.init_guess, progress, lambda: self.cancelled)
+                d = a.postprocess()
+            d['game'] = a.verify(self.axis_to_optimize, self.max_or_min)
             self.finished.emit(res, c, d)
         except Exception as e:
             self.finished.emit(f"Error occurred!", str(e), "")
         self.isrunning = False
 
+    def cancel(self):
+        self.cancelled = True
+
 class ComboBoxDelegate(QItemDelegate):
     "Set a combobox item delegate containing `items`"
     def __init__(self, items: list[str]):
@@ -229,8 +252,10 @@ class OptimizationSection(Cell):
         self.success = False
         self.offset = 0.0
         self.constraint_values = []
+        self.game = None # the angles in game, see `Optimizer.verify`
 
         self.init_guess = []
+        self.starts = 1
 
 
         self.optimizer_cell_layout = QVBoxLayout()
@@ -461,6 +486,11 @@ class OptimizationSection(Cell):
         self.set_init_guess_lineedit = QLineEdit()
         self.set_init_guess_lineedit.returnPressed.connect(self.set_initial_guess)
 
+        self.set_starts_label = QLabel("Starts")
+        self.set_starts_label.setToolTip("The number of initial guesses to optimize from.\nThe optimizer finds the best angles near its initial guess, which might not be the best overall.\nWith more than 1 start, it also starts from guesses spread out over every angle,\nsolves them in parallel and shows the best one, followed by the next best different solutions.\n\nNotes:\n - By default, there is 1 start (only your initial guess).\n - Press the run button again to cancel, the best solution found so far is kept.\n - Press Enter to confirm.")
+        self.set_starts_lineedit = QLineEdit()
+        self.set_starts_lineedit.returnPressed.connect(self.set_starts)
+
         self.results_settings_layout.addLayout(self.set_settings_layout)
         
         self.set_settings_layout.addWidget(self.shift_x_label, 0,0)
@@ -469,6 +499,8 @@ class OptimizationSection(Cell):
         self.set_settings_layout.addWidget(self.shift_z_lineedit, 1,1)
         self.set_settings_layout.addWidget(self.set_init_guess_label, 2, 0)
         self.set_settings_layout.addWidget(self.set_init_guess_lineedit, 2, 1)
+        self.set_settings_layout.addWidget(self.set_starts_label, 3, 0)
+        self.set_settings_layout.addWidget(self.set_starts_lineedit, 3, 1)
 
         self.tabwidget.addTab(self.results_settings_widget, "Fine Tuning")
 
@@ -514,6 +546,13 @@ class OptimizationSection(Cell):
                 return
         self.init_guess = angles
 
+    def set_starts(self):
+        try:
+            starts = int(self.set_starts_lineedit.text().strip())
+        except ValueError:
+            return
+        self.starts = min(max(starts, 1), 1000)
+
     def erase_from_graph(self, id):
         self.plot.clearDataAndReindex(id)
     
@@ -635,6 +674,7 @@ If you are incorporating inertia, be sure to add the constraint which restricts
 
     def runSolver(self):
         if self.worker and self.worker.isrunning:
+            self.worker.cancel()
             return
         names, values = self.var_box_model.getData()
         variables = {n:v for n,v in zip(names, values)}
@@ -662,24 +702,36 @@ If you are incorporating inertia, be sure to add the constraint which restricts
         constraints = self.constraints_model.getData()
 
         self.the_thread = QThread()
-        self.worker = Worker(self.axis_to_optimize, self.max_or_min, variables, data, constraints, self.init_guess)
+        self.worker = Worker(self.axis_to_optimize, self.max_or_min, variables, data, constraints, self.init_guess, self.starts)
         self.worker.moveToThread(self.the_thread)
 
         self.the_thread.started.connect(self.worker.run)
+        self.worker.progress.connect(self.onProgress)
+        self.worker.iteration.connect(self.onIteration)
         self.worker.finished.connect(self.onCompletion)
         self.worker.finished.connect(self.the_thread.quit)
         self.worker.finished.connect(self.worker.deleteLater)
         self.the_thread.finished.connect(self.the_thread.deleteLater)
 
-        self.run_button.setDisabled(True)
+        self.run_button.setToolTip("Cancel") # runSolver cancels the running optimization
+        if self.starts > 1:
+            self.toConsole(f"Optimizing from {self.starts} starts...")
 
         self.setStatus(self.RUNNING)
         self.the_thread.start()
 
+    def onProgress(self, done: int, starts: int):
+        self.toConsole(f"Optimizing from {starts} starts... {done} done")
+
+    def onIteration(self, iteration: int, objective: float, violation: float, points: list):
+        "Shows the trajectory of the current iterate while optimizing"
+        self.plot.addMainLine([x + self.xshift for x, _ in points], [z + self.zshift for _, z in points], live=True)
+        self.toConsole(f"Iteration {iteration}\nPosition: {objective * -1 if self.max_or_min == 'max' else objective}\nConstraint violation: {violation}\n\nPress the run button again to stop and keep the best angles so far.")
+
     def onCompletion(self, res, constraint_values, postprocess_dict):
         # Constraint_values are the constraint functions evaluated with the optimiized output.
         # When the values are close to 0, then it is binding. 
-        self.run_button.setEnabled(True)
+        self.run_button.setToolTip("Run")
         if isinstance(res, str):
             self.toConsole(f"{res} {constraint_values}")
             self.setStatus(self.ERROR)
@@ -748,6 +800,18 @@ If you are incorporating inertia, be sure to add the constraint which restricts
         lines.append("(X,Z) velocities")
         for i,j in zip(x_velocities, z_velocities):
             lines.append(f"  {i}, {j}")
+
+        self.game = postprocess_dict.get('game')
+        lines.extend(self.gameLines())
+
+        runner_ups = postprocess_dict.get('runner_ups')
+        if runner_ups:
+            lines.append("")
+            lines.append("Other solutions")
+            for r, feasible in runner_ups:
+                angles = [round((math.degrees(p) + 180) % 360 - 180, 3) for p in r.x]
+                lines.append(f"  Position: {r.fun * -1 if self.max_or_min == 'max' else r.fun}{'' if feasible else ' (breaks constraints)'}")
+                lines.append(f"  Angles: {angles}")
         self.toConsole("\n".join(lines))
 
         if success:
@@ -802,8 +866,32 @@ If you are incorporating inertia, be sure to add the constraint which restricts
         lines.append("(X,Z) velocities")
         for i,j in zip(x_velocities, z_velocities):
             lines.append(f"  {i}, {j}")
+        lines.extend(self.gameLines())
         self.toConsole("\n".join(lines))
 
+    def gameLines(self):
+        "Returns the lines of the results that show how the optimized angles do in game"
+        if not self.game:
+            return []
+        game = self.game
+        shift = self.xshift if self.axis_to_optimize == OptimizeCellAxis.X else self.zshift
+        lines = ["", "In game (float32 yaws, Minecraft's sine table)"]
+        satisfied = f"Constraints satisfied: {game['feasible']}"
+        if game['snapped_violation'] > 0:
+            satisfied += f" (the optimized angles miss by {game['snapped_violation']:.3g}, the yaws were adjusted)"
+        lines.append(satisfied)
+        lines.append(f"Position: {(game['objective'] * -1 if self.max_or_min == 'max' else game['objective']) + shift}")
+        lines.append(f"Yaws: [{', '.join(str(yaw) for yaw in game['yaws'])}]")
+        name, _ = self.constraint_values if self.constraint_values else ([], [])
+        if name and game['constraint_values']:
+            lines.append("Constraint Values")
+            for n, v in zip(name, game['constraint_values']):
+                lines.append(f"{n}: {v}")
+        lines.append("(X,Z) position")
+        for x, z in game['points']:
+            lines.append(f"  {round(x + self.xshift,7)}, {round(z + self.zshift,7)}")
+        return lines
+
     def getCellData(self):
         data = {
             "cell_type": self.cellType,
@@ -819,6 +907,7 @@ If you are incorporating inertia, be sure to add the constraint which restricts
             "xshift": self.xshift,
             "zshift": self.zshift,
             "init_guess": self.init_guess,
+            "starts": self.starts,
             "angles": self.angles,
             "constraint_values": self.constraint_values,
             "lines": self.draw_lines_widget.get_all_line_data()
@@ -826,7 +915,7 @@ If you are incorporating inertia, be sure to add the constraint which restricts
         return data
 
     def setupCell(self, data):
-        if not all([x in ("cell_type", "axis","mode","variables","drags","constraints", "output", "message", "xpoints", "zpoints", "xshift", "zshift", "init_guess","angles","constraint_values","lines") for x in data]):
+        if not all([x in ("cell_type", "axis","mode","variables","drags","constraints", "output", "message", "xpoints", "zpoints", "xshift", "zshift", "init_guess","starts","angles","constraint_values","lines") for x in data]):
             return
         if self.axis_to_optimize != data['axis']:
             self.choose_axis_button.click()
@@ -850,6 +939,8 @@ If you are incorporating inertia, be sure to add the constraint which restricts
 
         s = ", ".join([str(x) for x in self.init_guess])
         self.set_init_guess_lineedit.setText(s)
+        self.starts = data.get('starts', 1)
+        self.set_starts_lineedit.setText(str(self.starts))
 
         self.angles = data['angles']
         self.constraint_values = data['constraint_values']
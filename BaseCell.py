@@ -5,7 +5,7 @@ Also contains `RenderViewer`, used to render Mothball code outputs and markdown
 """
 
 from PyQt5.QtWidgets import QWidget, QVBoxLayout, QGridLayout, QPushButton,QHBoxLayout,QTextBrowser,QAction, QShortcut, QApplication
-from PyQt5.QtGui import QColor, QFont, QKeySequence
+from PyQt5.QtGui import QColor, QFont, QKeySequence, QTextCursor, QTextCharFormat
 from PyQt5.QtCore import Qt, QEvent, QObject
 from PyQt5.Qsci import QsciLexerCustom, QsciScintilla
 from utils import *
@@ -279,6 +279,24 @@ class RenderViewer(QTextBrowser):
         tokens = linter.parseOutput(output, displayOutputBackground)
         self.render(tokens)
     
+    def appendTextfromOutput(self, linter: CodeLinter, output: list, displayOutputBackground: bool = False):
+        "Add raw output after what is already shown, without rendering everything again. Used while a simulation is running, `renderTextfromOutput` renders the complete output at the end."
+        tokens = linter.parseOutput(output, displayOutputBackground)
+        if not tokens:
+            return
+        outputColors = self.colorOptions[StringLiterals.OUTPUT]
+        cursor = QTextCursor(self.document())
+        cursor.movePosition(QTextCursor.End)
+        if not self.document().isEmpty():
+            cursor.insertBlock()
+        for token, style, _ in tokens:
+            text_format = QTextCharFormat()
+            text_format.setFontFamily(self.options["Default Font"])
+            text_format.setFontPointSize(self.options["Default Font Size"])
+            if style in Style.getCodeOutputStyles():
+                text_format.setForeground(QColor(outputColors[style]))
+            cursor.insertText(token, text_format)
+    
     def renderTextfromMarkdown(self, linter: MDLinter, text: str):
         "Render the markdown into html text."
         tokens = linter.parseTextToRender(text)
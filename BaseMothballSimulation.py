@@ -1,12 +1,24 @@
 import os
 from numpy import float32 as f32
-from ExprEval import evaluate
+from ExprEval import evaluate, compile_expression
+from Lexer import lex_texts, position, STRUCTURE
 import re
 import inspect
-from collections import Counter
+from collections import Counter, deque
+import copy
+from operator import attrgetter
+import numpy as np
 import functools
+import itertools
 from Enums import ExpressionType
 import json
+import math
+import time
+import pickle
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import NamedTuple, Callable
 import sys
 
 if getattr(sys, "frozen", False):
@@ -16,6 +28,10 @@ else:
 with open(os.path.join(base_path, "Docstrings", "HelpStrings.json")) as f:
     HELP_DOCSTRINGS = json.load(f)
 
+# Splits a token into (error, function name, inputs, modifiers, arguments, error)
+TOKENIZE_REGEX = re.compile(r"(\W)?([^.\[\(\-\)\]]+)(?:\.([wasdWASD]+))?(?:\[(.*)\])?(?:\((.*)\))?(.+)?", flags=re.DOTALL)
+KEYWORD_ARGUMENT_REGEX = re.compile(r"^\s*?(\w+)\s*=\s*(.+)\s*$", flags=re.DOTALL)
+
 class OverwriteError(Exception):
     "Attempted to overwrite a basic Mothball function"
     pass
@@ -28,6 +44,129 @@ class NameString(str):
     "Subclass of str, meant for arguments that are used to name something"
     pass
 
+class OutputRecord(NamedTuple):
+    """
+    One line of output, stored unformatted. `values` holds the numbers shown after `label` (see `add_to_output`), they are only turned into text by `format_output_line` when the output is displayed.
+    For `TEXT`, `GENERAL_LABEL` and `WARNING` lines, `label` is the whole text and `values` is empty.
+    """
+    expression_type: ExpressionType
+    label: str
+    values: tuple[float, ...] = ()
+    precision: int = 7
+
+class Checkpoint(NamedTuple):
+    """
+    The state of a player after running one top level token of a sequence (see `BasePlayer.simulate` and `BasePlayer.resume`).
+    Output and history only grow while simulating, so only their lengths are stored.
+    """
+    token: str
+    state: dict
+    output_lines: int
+    history_length: int
+
+class RepeatState(NamedTuple):
+    """
+    The state of a player between two iterations of `BasePlayer.repeat` (see `BasePlayer.repeat_state`).
+    `state` holds everything the next iteration depends on, except for the `position`. `ticks` and `output_lines` count what was simulated and printed so far.
+    """
+    state: tuple
+    position: tuple
+    ticks: int
+    output_lines: int
+
+class PlayerState:
+    """
+    A snapshot of the values of a player's `STATE_ATTRIBUTES` (see `BasePlayer.snapshot`).
+    Queues are stored as tuples and other containers are copied, so a snapshot never changes after it is taken and can be restored any number of times. Snapshots can be pickled.
+    """
+    __slots__ = ("player_type", "values")
+
+    def __init__(self, player_type: type, values: tuple):
+        self.player_type = player_type
+        self.values = values
+
+    def __eq__(self, other):
+        return isinstance(other, PlayerState) and self.player_type is other.player_type and self.values == other.values
+
+    def __repr__(self):
+        return f"PlayerState({self.player_type.__name__}, {dict(zip(self.player_type.STATE_ATTRIBUTES, self.values))})"
+
+# How `snapshot` copies each type of container in a player's state, other values are immutable or never modified
+SNAPSHOT_COPIES = {deque: tuple, dict: dict.copy, list: list.copy, set: set.copy, np.ndarray: np.ndarray.copy}
+# How `restore` copies them back
+RESTORE_COPIES = {tuple: deque, dict: dict.copy, list: list.copy, set: set.copy, np.ndarray: np.ndarray.copy}
+
+def truncate_number(value: float, precision: int) -> str:
+    "Round decimals to `precision` decimal places"
+    return f"{value:.{precision}f}".rstrip("0").rstrip(".")
+
+def format_output_line(line: OutputRecord | tuple) -> tuple[ExpressionType, tuple[str]]:
+    """
+    Returns `(expression_type, tokens)`, the text of an output line split into the pieces `CodeLinter.parseOutput` colors.
+    Also accepts lines that are already `(expression_type, tokens)`, which is how outputs were stored before `OutputRecord` (and how older notebooks store `raw_output`).
+    """
+    if len(line) == 2:
+        return line[0], tuple(line[1])
+
+    expression_type, label, values, precision = line
+    match expression_type:
+        case ExpressionType.Z_LABEL | ExpressionType.X_LABEL | ExpressionType.GENERAL_LABEL_WITH_NUMBER:
+            return expression_type, (label, ": ", truncate_number(values[0], precision))
+        case ExpressionType.Z_LABEL_WITH_EXPRESSION | ExpressionType.X_LABEL_WITH_EXPRESSION | ExpressionType.GENERAL_LABEL_WITH_EXPRESSION:
+            center, offset = values
+            return expression_type, (label, ": ", truncate_number(center, precision), " - " if offset <= 0 else " + ", truncate_number(abs(offset), precision))
+        case ExpressionType.Z_INERTIA_HIT | ExpressionType.X_INERTIA_HIT | ExpressionType.Z_INERTIA_MISS | ExpressionType.X_INERTIA_MISS:
+            speed, difference = values
+            return expression_type, (label, ": ", truncate_number(speed, precision), " (", truncate_number(difference, precision), ")")
+        case ExpressionType.WARNING:
+            return expression_type, ("Warning", ": ", label)
+        case _:
+            return expression_type, (label,)
+
+def expression_variables(expression: str) -> set[str]:
+    "Returns the names of the variables that `expression` reads, or an empty set if it isn't a valid expression"
+    try:
+        is_constant, program = compile_expression(expression)
+    except (SyntaxError, IndexError):
+        return set()
+    return set() if is_constant else {value for kind, value in program if kind == 'ID'}
+
+class FunctionSignature:
+    """
+    The parameters of a Mothball function, flattened into tuples once so they don't have to be recomputed with `inspect.signature` for every token.
+
+    `parameters` excludes `self`, and is ordered positional-only, positional-or-keyword, keyword-only, then var-positional for custom functions.
+    """
+    __slots__ = ("name", "parameters", "names", "kinds", "annotations", "defaults",
+                 "positional_names", "positional_annotations", "positional_index", "required_positionals",
+                 "keyword_only", "keyword_names", "var_positional")
+
+    def __init__(self, name: str, parameters):
+        self.name = name
+        self.parameters = tuple(x for x in parameters if x.name != "self")
+        self.names = tuple(x.name for x in self.parameters)
+        self.kinds = tuple(x.kind for x in self.parameters)
+        self.annotations = tuple(x.annotation for x in self.parameters)
+        self.defaults = tuple(x.default for x in self.parameters)
+
+        positional = [x for x in self.parameters if x.kind in (inspect.Parameter.POSITIONAL_ONLY, inspect.Parameter.POSITIONAL_OR_KEYWORD)]
+        self.positional_names = tuple(x.name for x in positional)
+        self.positional_annotations = tuple(x.annotation for x in positional)
+        self.positional_index = {x.name: i for i, x in enumerate(positional)}
+        self.required_positionals = tuple(x.name for x in self.parameters if x.kind == inspect.Parameter.POSITIONAL_ONLY and x.default == inspect.Parameter.empty)
+
+        self.keyword_only = {x.name: x.annotation for x in self.parameters if x.kind == inspect.Parameter.KEYWORD_ONLY}
+        self.keyword_names = tuple(x.name for x in self.parameters if x.kind in (inspect.Parameter.POSITIONAL_OR_KEYWORD, inspect.Parameter.KEYWORD_ONLY))
+        var_positional = [x.annotation for x in self.parameters if x.kind == inspect.Parameter.VAR_POSITIONAL]
+        self.var_positional = var_positional[0] if var_positional else None
+
+    @classmethod
+    def from_function(cls, func):
+        return cls(func.__name__, inspect.signature(func).parameters.values())
+    
+    def __repr__(self):
+        return f"FunctionSignature({self.name}{self.names})"
+
 class BasePlayer:
     class CustomMothballFunction:
         def __init__(self, name: str, sequence: MothballSequence, arguments: list[inspect.Parameter]):
@@ -48,10 +187,32 @@ class BasePlayer:
                         self.keyword_only.append(arg)
                     case inspect.Parameter.VAR_POSITIONAL:
                         self.var_positional.append(arg)
+            self.signature = FunctionSignature(name, self.positional_only + self.positional_or_keyword + self.keyword_only + self.var_positional)
         
         def __repr__(self):
             return f"CustomFunction({self.name})"
 
+    class Instruction:
+        """
+        A compiled token. Holds everything about a token that does not depend on the current player state: the resolved function, inputs, modifiers and the unconverted argument strings.
+
+        The arguments are only converted (and variables looked up) when the instruction is bound with `BasePlayer.bind()`, right before it runs. 
+        `function` is `None` for custom functions, which are looked up by `name` at bind time since they can be redefined.
+        """
+        __slots__ = ("name", "function", "inputs", "modifiers", "args", "kwargs", "reverse")
+
+        def __init__(self, name: str, function, inputs: str, modifiers: int, args: list, kwargs: dict, reverse: bool):
+            self.name = name
+            self.function = function
+            self.inputs = inputs
+            self.modifiers = modifiers
+            self.args = args
+            self.kwargs = kwargs
+            self.reverse = reverse
+
+        def __repr__(self):
+            return f"Instruction({self.name})"
+
 
     pi = 3.14159265358979323846
     MODIFIERS = tuple()
@@ -61,6 +222,25 @@ class BasePlayer:
     _can_have_input=()
     _fortyfive_methods=()
 
+    # Compiled sequences and tokens are shared by every player, keyed by the class and the source string.
+    CACHE_SIZE = 4096
+
+    # A sweep only starts worker processes if running it serially is expected to take longer than this
+    SWEEP_PARALLEL_SECONDS = 1.0
+    # Output is passed to `output_sink` (see `stream_output`) at most once per this many seconds
+    OUTPUT_SINK_INTERVAL = 0.05
+    # Everything that `snapshot` saves: the state that affects how the next function runs, but not the output, history or listeners
+    STATE_ATTRIBUTES = ("precision", "inertia_threshold", "modifiers", "reverse", "previously_sprinting", "previously_sneaking", "previously_in_web", "local_vars", "local_funcs")
+    # Attributes that are not part of a Checkpoint's state
+    CHECKPOINT_EXCLUDED = frozenset(("output", "history", "output_sink", "streamed_lines", "last_flush", "checkpoints", "stop_flag"))
+    _sequence_cache: dict[tuple[type, str], tuple[str]] = {}
+    _instruction_cache: dict[tuple[type, str], "BasePlayer.Instruction"] = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.SIGNATURES = {func: FunctionSignature.from_function(func) for func in cls.FUNCTIONS.values()}
+        cls.state_getter = attrgetter(*cls.STATE_ATTRIBUTES)
+
     def __init__(self) -> None:
         self.precision = 7
         self.inertia_threshold = 0.005
@@ -74,7 +254,12 @@ class BasePlayer:
         self.local_vars: dict[str, int | float] = {"px": 0.0625}
         self.local_funcs: dict[str, BasePlayer.CustomMothballFunction] = {}
 
-        self.output: list[tuple[ExpressionType, tuple]] = []
+        self.output: list[OutputRecord] = []
+        self.output_sink: Callable[[list[OutputRecord], int], None] | None = None
+        self.streamed_lines = 0 # Lines already passed to output_sink
+        self.last_flush = 0.0
+        self.ticks_simulated = 0
+        self.checkpoints: list[Checkpoint] = []
 
         self.closed_vars: list[dict] = [] # For declaring functions only
 
@@ -87,6 +272,91 @@ class BasePlayer:
     def stop_execution(self):
         self.stop_flag = True
 
+    def snapshot(self) -> PlayerState:
+        "Returns the values of `STATE_ATTRIBUTES` as a `PlayerState`, which `restore` brings back. Cheap enough to take every tick."
+        return PlayerState(type(self), tuple([SNAPSHOT_COPIES[type(value)](value) if type(value) in SNAPSHOT_COPIES else value for value in self.state_getter(self)]))
+
+    def restore(self, state: PlayerState):
+        "Sets the state of this player to `state`, which must be from a player with the same `STATE_ATTRIBUTES`. Queues are restored as new deques."
+        if state.player_type.STATE_ATTRIBUTES is not self.STATE_ATTRIBUTES:
+            raise TypeError(f"Cannot restore the state of a {state.player_type.__name__} to a {type(self).__name__}")
+        for name, value in zip(self.STATE_ATTRIBUTES, state.values):
+            setattr(self, name, RESTORE_COPIES[type(value)](value) if type(value) in RESTORE_COPIES else value)
+
+    @classmethod
+    def from_state(cls, state: PlayerState) -> "BasePlayer":
+        "Returns a new player (of this class) with the state `state`"
+        player = cls()
+        player.restore(state)
+        return player
+
+    @staticmethod
+    def copy_state_value(value):
+        "Copies the containers in a player's state (a checkpoint shouldn't change when the player does). Everything else in the state is immutable or never modified."
+        if isinstance(value, (list, dict, set, deque, np.ndarray)):
+            return copy.copy(value)
+        return value
+
+    def make_checkpoint(self, token: str) -> Checkpoint:
+        "Returns a `Checkpoint` of the current state, reached by running `token` after the previous checkpoint"
+        state = {name: BasePlayer.copy_state_value(value) for name, value in self.__dict__.items() if name not in self.CHECKPOINT_EXCLUDED}
+        return Checkpoint(token, state, self.streamed_lines + len(self.output), len(getattr(self, "history", ())))
+
+    def rewind(self, checkpoint: Checkpoint):
+        "Undoes everything this player did since `make_checkpoint` returned `checkpoint`, except for output that was already passed to `output_sink`"
+        for name, value in checkpoint.state.items():
+            setattr(self, name, BasePlayer.copy_state_value(value))
+        del self.output[max(checkpoint.output_lines - self.streamed_lines, 0):]
+        if hasattr(self, "history"):
+            self.history = self.history[:checkpoint.history_length]
+
+    def resume(self, previous: "BasePlayer", sequence: str, previous_output: list = None) -> int:
+        """
+        Restores this player to the last checkpoint of `previous` (a player that ran `simulate(..., checkpoint=True)`) whose tokens are the same as the first tokens of `sequence`.
+        Running `simulate(sequence, checkpoint=True)` afterwards only runs the tokens after it, giving the same result as running all of `sequence` on a new player.
+
+        `previous_output` is the complete output of `previous`, only needed if it streamed its output (see `stream_output`). Returns the number of tokens that won't be run again.
+        """
+        if type(previous) is not type(self):
+            return 0
+        count = 0
+        for checkpoint, token in zip(previous.checkpoints, self.compile(sequence)):
+            if checkpoint.token != token:
+                break
+            count += 1
+        if not count:
+            return 0
+
+        checkpoint = previous.checkpoints[count - 1]
+        for name, value in checkpoint.state.items():
+            setattr(self, name, BasePlayer.copy_state_value(value))
+        self.output = list((previous.output if previous_output is None else previous_output)[:checkpoint.output_lines])
+        if hasattr(previous, "history"):
+            self.history = previous.history[:checkpoint.history_length]
+        self.checkpoints = previous.checkpoints[:count]
+        return count
+
+    def stream_output(self, sink: Callable[[list[OutputRecord], int], None] | None):
+        """
+        Passes output to `sink` while simulating instead of keeping all of it in `self.output`. `sink` is called with the new output lines and `self.ticks_simulated`, at most once every `OUTPUT_SINK_INTERVAL` seconds after the first line.
+        Lines that have been passed to `sink` are removed from `self.output`. Call `flush_output(force=True)` after simulating to pass on the rest, or `stream_output(None)` to stop streaming.
+        """
+        self.output_sink = sink
+        self.last_flush = 0.0 # The first line is passed on right away
+
+    def flush_output(self, force: bool = False):
+        "Passes the output made since the last flush to `self.output_sink`, if it is set and `OUTPUT_SINK_INTERVAL` seconds have passed since the last flush (or `force` is set)."
+        if self.output_sink is None:
+            return
+        now = time.perf_counter()
+        if not force and now - self.last_flush < self.OUTPUT_SINK_INTERVAL:
+            return
+        lines = self.output
+        self.output = []
+        self.streamed_lines += len(lines)
+        self.last_flush = now
+        self.output_sink(lines, self.ticks_simulated)
+
     @staticmethod
     def record_to_call_stack(func):
         "Decorator which appends and pops from call stack for functions which accept a `MothballSequence`"
@@ -155,6 +425,7 @@ class BasePlayer:
         
 
     def add_to_output(self, expression_type: ExpressionType, label: str = '', string_or_num: str | float = '', num2: float = 0, strip_label: bool = True):
+        "Adds a line of output. Numbers are stored as they are, together with the current precision, and formatted when the output is displayed (see `format_output_line`)."
         if strip_label:
             label = label.strip()
         match expression_type:
@@ -162,27 +433,33 @@ class BasePlayer:
                 if num2:
                     expression_type += 1 # changes ExpressionType Flag
                     nn = string_or_num - num2
-                    self.output.append((expression_type, (label, ": ", self.truncate_number(num2), " - " if nn <= 0 else " + ", self.truncate_number(abs(nn)) )))
+                    self.output.append(OutputRecord(expression_type, label, (float(num2), float(nn)), self.precision))
+                    if self.output_sink is not None:
+                        self.flush_output()
                     return nn
                 else:
-                    self.output.append((expression_type, (label, ": ", self.truncate_number(string_or_num) )))
+                    self.output.append(OutputRecord(expression_type, label, (float(string_or_num),), self.precision))
+                    if self.output_sink is not None:
+                        self.flush_output()
                     return string_or_num
 
             case ExpressionType.TEXT:
                 if strip_label:
                     string_or_num = string_or_num.strip()
-                self.output.append((expression_type, (string_or_num,)))
+                self.output.append(OutputRecord(expression_type, string_or_num))
             case ExpressionType.WARNING:
-                self.output.append((expression_type, ("Warning", ": ", string_or_num.strip() )))
+                self.output.append(OutputRecord(expression_type, string_or_num.strip()))
             case ExpressionType.Z_INERTIA_HIT | ExpressionType.X_INERTIA_HIT | ExpressionType.Z_INERTIA_MISS | ExpressionType.X_INERTIA_MISS:
                 a = abs(abs(string_or_num) - abs(num2))
-                self.output.append((expression_type, (label, ": ", self.truncate_number(string_or_num), " (", self.truncate_number(a), ")" )))
+                self.output.append(OutputRecord(expression_type, label, (float(string_or_num), float(a)), self.precision))
             case ExpressionType.GENERAL_LABEL:
-                self.output.append((expression_type, (label, )))
+                self.output.append(OutputRecord(expression_type, label))
+        if self.output_sink is not None:
+            self.flush_output()
     
     def truncate_number(self, value: float):
         "Round decimals to `self.precision` decimal places"
-        return f"{value:.{self.precision}f}".rstrip("0").rstrip(".")
+        return truncate_number(value, self.precision)
     
     def formatted(self, string: str):
         "Formats string just like an f-string"
@@ -285,21 +562,182 @@ class BasePlayer:
             raise ValueError(f"repeat() must have a nonnegative argument 'count'")
         if count == 0:
             return
-        parsed_tokens = self.parse(sequence)
         runnables = []
-        for token in parsed_tokens:
-            runnable = self.tokenize(token, locals=self.local_vars)
+        for token in self.compile(sequence):
+            runnable = self.bind(self.compile_token(token), locals=self.local_vars)
             self.run(runnable)
             runnables.append(runnable)
         
         # This is b/c if something like repeat(var(a,1) sj(a), 2) is run, the tokenizer will fail to process
         # a = 1 since var(a,1) wasn't actually run yet.
-        for _ in range(count-1):
+        start = self.repeat_state()
+        for done in range(1, count):
             if self.stop_flag:
                 raise InterruptedError("Stopped execution")
             for runnable in runnables:
                 self.run(runnable)
+
+            # Once an iteration ends in the state it started in, every remaining iteration is the same
+            end = self.repeat_state()
+            if done < count - 1 and end is not None and start is not None and end.state == start.state and self.skip_repeats(start, end, count - 1 - done):
+                break
+            start = end
+
+    def repeat_state(self) -> RepeatState | None:
+        "Returns the state of the player between two iterations of `repeat`, or `None` if iterations can't be skipped (see `skip_repeats`)"
+        return None
+
+    def skip_repeats(self, start: RepeatState, end: RepeatState, iterations: int) -> bool:
+        """
+        Called by `repeat` when an iteration (which went from `start` to `end`) ended in the state it started in.
+        Does `iterations` more of the same iteration without running them and returns `True`, or returns `False` if it can't.
+        """
+        return False
     
+    @record_to_call_stack
+    def sweep(self, variable_name: NameString, start: float, stop: float, sequence: MothballSequence, /, *returners: MothballSequence, step: float = 1):
+        """
+        Runs `sequence` once for every value of `variable_name` from `start` to `stop` (inclusive) in steps of `step`, each run starting from the current state of the player.
+        Displays a table with one row per value and the outputs of `returners` (such as `outz`, `zmm(label="mm")`) as columns. If no returners are given, the default output is used.
+
+        Long sweeps are spread across multiple processes. The player itself is left unchanged.
+        """
+        if not re.findall(r"^([a-zA-Z_][a-zA-Z0-9_]*)$", variable_name):
+            raise SyntaxError(f"'{variable_name}' is not a valid variable name")
+        header, rows = self.sweep_table(variable_name, self.sweep_values(start, stop, step), sequence, returners)
+
+        table = [header] + [row for row in rows if len(row) == len(header)]
+        widths = [max(len(row[i]) for row in table) for i in range(len(header))]
+        for row in [header] + rows:
+            if len(row) == len(header):
+                self.add_to_output(ExpressionType.TEXT, string_or_num=" ".join(f"{cell:<{width}}" for cell, width in zip(row, widths)))
+            else: # Errors and runs with a different number of outputs
+                self.add_to_output(ExpressionType.TEXT, string_or_num=" ".join(row))
+
+    @staticmethod
+    def sweep_values(start: float, stop: float, step: float = 1) -> list[int | float]:
+        "Returns the values from `start` to `stop` (inclusive) in steps of `step`. The values are ints if `start` and `step` are whole numbers."
+        if step == 0:
+            raise ValueError("sweep() step cannot be 0")
+        count = math.floor((stop - start) / step + 1e-9) + 1
+        if count <= 0:
+            raise ValueError(f"sweep() has no values from {start} to {stop} in steps of {step}")
+        if float(start).is_integer() and float(step).is_integer():
+            return [int(start) + i * int(step) for i in range(count)]
+        return [round(start + i * step, 12) for i in range(count)]
+
+    def sweep_table(self, variable_name: str, values: list, sequence: str, returners: tuple[str] = ()) -> tuple[list[str], list[list[str]]]:
+        """
+        Runs `sequence` once per value in `values` (assigned to the variable `variable_name`), starting from a copy of this player each time, followed by `returners`.
+        Returns the header (`variable_name` and the labels of the outputs) and one row of output values per value. A run that raises an exception has the error as its row.
+
+        The first run is timed and the remaining runs are distributed across a process pool if they are expected to take longer than `SWEEP_PARALLEL_SECONDS`.
+        """
+        template = self.sweep_template()
+        results = self.run_parallel(functools.partial(run_sweep, template, variable_name, sequence=sequence, returners=returners), values)
+
+        labels = next((label for label, _ in results if isinstance(label, list)), [])
+        header = [variable_name] + labels
+        rows = []
+        for value, (label, cells) in zip(values, results):
+            rows.append([str(value)] + (cells if isinstance(label, list) else [cells]))
+        return header, rows
+
+    def run_parallel(self, function: Callable[[list], list], items: list) -> list:
+        """
+        Returns `function(items)`, computed in chunks of `items`. The first item is timed and the remaining ones are distributed across a process pool if they are expected to take longer than `SWEEP_PARALLEL_SECONDS`.
+        `function` must return a list and be picklable (a module level function, or a `functools.partial` of one). Used by `sweep` and `search`.
+        """
+        start_time = time.perf_counter()
+        results = function(items[:1])
+        estimate = (time.perf_counter() - start_time) * (len(items) - 1)
+
+        remaining = items[1:]
+        if estimate >= BasePlayer.SWEEP_PARALLEL_SECONDS and len(remaining) >= 2:
+            pool = sweep_pool()
+            chunk_size = max(1, math.ceil(len(remaining) / (4 * (os.cpu_count() or 1))))
+            futures = [pool.submit(function, remaining[i:i+chunk_size]) for i in range(0, len(remaining), chunk_size)]
+            try:
+                for future in futures:
+                    while not future.done():
+                        if self.stop_flag:
+                            raise InterruptedError("Stopped execution")
+                        time.sleep(0.01)
+                    results += future.result()
+                    remaining = remaining[chunk_size:]
+            except BrokenProcessPool: # Worker processes could not be started, finish in this process
+                close_sweep_pool()
+            finally:
+                for future in futures:
+                    future.cancel()
+
+        for item in remaining:
+            if self.stop_flag:
+                raise InterruptedError("Stopped execution")
+            results += function([item])
+        return results
+
+    @record_to_call_stack
+    def search(self, sequence: MothballSequence, measure: MothballSequence, low: float, high: float, /, *ranges: MothballSequence, prune: bool = False, limit: int = 50):
+        """
+        Finds every combination of values of the variables in `ranges` for which running `sequence` ends with `measure` (a returner, such as `zmm` or `zb`) from `low` to `high` (inclusive).
+        `ranges` are triples of a variable name, its first value and its last value, for example `search(s(a) sj sa45(b), zmm, 1.5, 1.6, a, 0, 12, b, 1, 12)`. Optional parts can be given a duration from 0 to 1.
+
+        The programs are run as a tree: the state before each token that uses a new variable is snapshotted and restored for each of its values, so tokens shared by several programs only run once.
+        If `prune` is set to true, a branch is skipped when running the rest of it with every remaining variable at its first value, and again at its last value, misses the window on the same side. \\
+        That is only correct when `measure` grows (or shrinks) with every variable at once, which turning and stopping easily break, so it is off by default.
+
+        Displays up to `limit` of the programs found. Long searches are spread across multiple processes. The player itself is left unchanged.
+        """
+        if not ranges or len(ranges) % 3:
+            raise SyntaxError("search() ranges must be given as triples of a variable name, its first value and its last value")
+        values = {}
+        for i in range(0, len(ranges), 3):
+            name, first, last = ranges[i].strip(), self.safe_eval(ranges[i+1], int, self.local_vars), self.safe_eval(ranges[i+2], int, self.local_vars)
+            if not re.findall(r"^([a-zA-Z_][a-zA-Z0-9_]*)$", name):
+                raise SyntaxError(f"'{name}' is not a valid variable name")
+            values[name] = self.sweep_values(first, last, 1 if last >= first else -1)
+
+        # The variables that each token uses for the first time, which is where the search branches
+        tokens = self.compile(sequence)
+        unused = list(values)
+        levels = []
+        for token in tokens:
+            used = self.token_variables(token)
+            levels.append(tuple(name for name in unused if name in used))
+            unused = [name for name in unused if name not in levels[-1]]
+        if unused:
+            raise ValueError(f"search() variable{'s' if len(unused) > 1 else ''} {', '.join(unused)} {'are' if len(unused) > 1 else 'is'} not used in the sequence")
+
+        first = next(index for index, level in enumerate(levels) if level)
+        choices = list(itertools.product(*(values[name] for name in levels[first])))
+        results = self.run_parallel(functools.partial(run_search, self.sweep_template(), tokens, tuple(levels), values, measure, low, high, prune), choices)
+
+        found = [program for chunk, _, _ in results for program in chunk]
+        ran = sum(count for _, count, _ in results)
+        pruned = sum(count for _, _, count in results)
+
+        names = [name for level in levels for name in level]
+        header = names + [measure.strip()]
+        rows = [[str(value) for value in program] + [self.truncate_number(result)] for program, result in found[:limit]]
+        widths = [max(len(row[i]) for row in [header] + rows) for i in range(len(header))]
+        for row in ([header] + rows) if rows else []:
+            self.add_to_output(ExpressionType.TEXT, string_or_num=" ".join(f"{cell:<{width}}" for cell, width in zip(row, widths)))
+        if len(found) > limit:
+            self.add_to_output(ExpressionType.TEXT, string_or_num=f"... and {len(found) - limit} more")
+        self.add_to_output(ExpressionType.TEXT, string_or_num=f"{len(found)} of {ran + pruned} programs end with {measure.strip()} from {low} to {high} ({pruned} skipped by pruning)")
+
+    def sweep_template(self) -> bytes:
+        "Returns a pickled copy of this player without its output and history, which `run_sweep` starts each run from"
+        saved = {name: getattr(self, name) for name in ("output", "history", "call_stack", "checkpoints", "output_sink") if hasattr(self, name)}
+        try:
+            for name in saved:
+                setattr(self, name, None if name == "output_sink" else type(saved[name])())
+            return pickle.dumps(self)
+        finally:
+            for name, value in saved.items():
+                setattr(self, name, value)
+
     @record_to_call_stack
     def print(self, string: str = "", /):
         if self.reverse: # who is using this anyway
@@ -357,9 +795,7 @@ class BasePlayer:
                 raise NameError(f"Function {func} not found")
             else:
                 is_custom_func = True
-                f_sig = f.positional_only + f.positional_or_keyword + f.keyword_only + f.var_positional
-        else:
-            f_sig = inspect.signature(f).parameters.values()
+        f_sig = self.get_signature(f).parameters
 
         aliases = self.ALIASES.get(f.__name__, "")
         if not aliases:
@@ -372,27 +808,26 @@ class BasePlayer:
         
         prev_kind = None
         for y in f_sig: # PLEASE ADD * and /
-            if y.name != "self":
-                if y.kind == inspect.Parameter.VAR_POSITIONAL:
-                    varargsymbol = "*"
-                elif y.kind == inspect.Parameter.VAR_KEYWORD:
-                    varargsymbol = "**"
-                else:
-                    varargsymbol = ""
-                if y.default == inspect.Parameter.empty:
-                    self.add_to_output(ExpressionType.TEXT, string_or_num=f"    {varargsymbol}{y.name}: {y.annotation.__name__}", strip_label=False)
-                else:
-                    self.add_to_output(ExpressionType.TEXT, string_or_num=f"    {varargsymbol}{y.name}: {y.annotation.__name__} = {'_' if not y.default else y.default}", strip_label=False)
-                kind = y.kind
-                if y.kind == inspect.Parameter.POSITIONAL_OR_KEYWORD and prev_kind == inspect.Parameter.POSITIONAL_ONLY:
-                    self.add_to_output(ExpressionType.TEXT, string_or_num=f"    /,", strip_label=False)
-                elif y.kind == inspect.Parameter.KEYWORD_ONLY and prev_kind == inspect.Parameter.POSITIONAL_OR_KEYWORD:
-                    self.add_to_output(ExpressionType.TEXT, string_or_num=f"    *,", strip_label=False)
-                elif y.kind == inspect.Parameter.KEYWORD_ONLY and prev_kind == inspect.Parameter.POSITIONAL_ONLY:
-                    self.add_to_output(ExpressionType.TEXT, string_or_num=f"    /,", strip_label=False)
-                    self.add_to_output(ExpressionType.TEXT, string_or_num=f"    *,", strip_label=False)
-                
-                prev_kind = kind
+            if y.kind == inspect.Parameter.VAR_POSITIONAL:
+                varargsymbol = "*"
+            elif y.kind == inspect.Parameter.VAR_KEYWORD:
+                varargsymbol = "**"
+            else:
+                varargsymbol = ""
+            if y.default == inspect.Parameter.empty:
+                self.add_to_output(ExpressionType.TEXT, string_or_num=f"    {varargsymbol}{y.name}: {y.annotation.__name__}", strip_label=False)
+            else:
+                self.add_to_output(ExpressionType.TEXT, string_or_num=f"    {varargsymbol}{y.name}: {y.annotation.__name__} = {'_' if not y.default else y.default}", strip_label=False)
+            kind = y.kind
+            if y.kind == inspect.Parameter.POSITIONAL_OR_KEYWORD and prev_kind == inspect.Parameter.POSITIONAL_ONLY:
+                self.add_to_output(ExpressionType.TEXT, string_or_num=f"    /,", strip_label=False)
+            elif y.kind == inspect.Parameter.KEYWORD_ONLY and prev_kind == inspect.Parameter.POSITIONAL_OR_KEYWORD:
+                self.add_to_output(ExpressionType.TEXT, string_or_num=f"    *,", strip_label=False)
+            elif y.kind == inspect.Parameter.KEYWORD_ONLY and prev_kind == inspect.Parameter.POSITIONAL_ONLY:
+                self.add_to_output(ExpressionType.TEXT, string_or_num=f"    /,", strip_label=False)
+                self.add_to_output(ExpressionType.TEXT, string_or_num=f"    *,", strip_label=False)
+            
+            prev_kind = kind
         
         if is_custom_func:
             default = "This is because this was a custom defined function without a docstring written for it."
@@ -433,147 +868,133 @@ class BasePlayer:
 
         return matches_start + matches_part + matches_char_count
     
-    def remove_comments_and_check_strings(self, string: str):
-        "Removes comments delimited by `#`"
-        result = []
-        in_comment = False
-        follows_slash = False
-        in_string = False
-
-        for char in string:
-            if char == '"' and not follows_slash:
-                in_string = not in_string
-
-            if char == "#" and not follows_slash and not in_string:
-                in_comment = not in_comment
-                continue
-
-            if not in_comment:
-                result.append(char)
-
-            if char == "\\" and not follows_slash:
-                follows_slash = True
-            
-            else:
-                follows_slash = False
-        
-        if in_string:
-            raise SyntaxError('Unmatched quotes (")')
-
-        return "".join(result)
-
     def parse(self, string: str, splitters: tuple = ("\n", " ", "\r", "\t"), strict_whitespace: bool = True) -> list: 
         """
         Splits the string at any of the splitters that are outside of parenthesis.
-        Returns the first layer list of strings (or tokens), raises `SyntaxError` if there are missing spaces, or parenthesis are unmatched.
+        Returns the first layer list of strings (or tokens), raises `SyntaxError` if there are missing spaces, or parenthesis or quotes are unmatched.
 
-        Comments are delimited by the `#` symbol. Anything between comments will be ignored.
+        Comments are delimited by the `#` symbol. Anything between comments will be ignored. When splitting at whitespace, a `|` outside of parenthesis becomes `x(0) z(0)`.
 
         `repeat(sprintjump(12), 3) sprint(2) outz(16)` parses into `[repeat(sprintjump(12), 3), sprint(2), outz(16)]`
         """
 
         result = []
-        token = ""
+        pieces = [] # of the current token
         stack = [] # parenthesis
-        current = 0
-        high = len(string)
+        current = 0 # index of the current token
         expecting_whitespace = False
-        
-        matches_next_element = lambda e: ((e == ")" and stack[-1] == "(") or (e == "]" and stack[-1] == "["))
-
-        follows_slash = False
+        in_comment = False
         in_string = False
+        splits_at_whitespace = " " in splitters
 
-        string = self.remove_comments_and_check_strings(string)
+        def location():
+            line, column = position(string, current)
+            return f"line {line}, column {column}"
 
-        # Regex to change '|' into 'x(0) z(0)'
-        replace_bar_regex = r"(\|)"
-        string = re.sub(replace_bar_regex, " x(0) z(0) ", string)
-        
-        for char in string + splitters[0]:
-            if strict_whitespace:
-                if expecting_whitespace and not char.isspace():
-                    if char in ")]":
-                        raise SyntaxError(f"Unmatched brackets at character {current}: {string[max(0, current-5):min(high, current + 5)]}")
-                    else:
-                        msg = f"Space needed at character {current}"
-                        if self.call_stack:
-                            msg += f" (inside {', '.join(self.call_stack)})"
-                        msg += f": {string[max(0, current-7):min(high, current + 7)]}"
-                        raise SyntaxError(msg)
-                else:
-                    expecting_whitespace = False
+        def snippet(size: int):
+            return string[max(0, current - size):current + size]
 
-            if char == "\\":
-                follows_slash = True
-                token += char
+        def end_token():
+            token = "".join(pieces).strip()
+            result.append(token) if token else None
+            pieces.clear()
+
+        for text in lex_texts(string, STRUCTURE, group_whitespace=True):
+            if in_comment or (text == "#" and not in_string):
+                if text == "#":
+                    in_comment = not in_comment
+                current += len(text)
                 continue
-                
-            elif char == '"' and not follows_slash:
-                in_string = not in_string
-
-            elif (char == "(" or char == "[") and not follows_slash and not in_string:
-                stack.append(char)
-            elif (char == ")" or char == "]") and not follows_slash and not in_string:
-                if not stack:
-                    raise SyntaxError(f"Unmatched brackets at character {current}: {string[max(0, current-5):min(high, current + 5)]}")
-                if not matches_next_element(char):
-                    raise SyntaxError(f"Unmatched brackets at character {current}: {string[max(0, current-5):min(high, current + 5)]}")
-                stack.pop()
-                if not stack:
-                    token += char
-                    follows_slash = False
-                    if char == ")":
-                        expecting_whitespace = True
-                    current += 1
-                    continue
 
-            if char in splitters and not stack and not follows_slash and not in_string:
-                token = token.strip()
-                result.append(token) if token else None
-                token = ""
+            if expecting_whitespace and not text.isspace() and text != "|":
+                if text in ")]":
+                    raise SyntaxError(f"Unmatched brackets at {location()}: {snippet(5)}")
+                msg = f"Space needed at {location()}"
+                if self.call_stack:
+                    msg += f" (inside {', '.join(self.call_stack)})"
+                msg += f": {snippet(7)}"
+                raise SyntaxError(msg)
+
+            if in_string:
+                if text == '"':
+                    in_string = False
+                pieces.append(text)
+
+            elif text == '"':
+                in_string = True
+                pieces.append(text)
+
+            elif text == "(" or text == "[":
+                stack.append(text)
+                pieces.append(text)
+
+            elif text == ")" or text == "]":
+                if not stack or stack.pop() != ("(" if text == ")" else "["):
+                    raise SyntaxError(f"Unmatched brackets at {location()}: {snippet(5)}")
+                pieces.append(text)
+                expecting_whitespace = strict_whitespace and text == ")" and not stack
+                current += 1
+                continue
+
+            elif stack:
+                pieces.append(text)
+
+            elif text[0] in splitters:
+                end_token()
+
+            elif text == "|" and splits_at_whitespace:
+                end_token()
+                result.append("x(0)")
+                result.append("z(0)")
 
             else:
-                token += char
-                current += 1
+                pieces.append(text)
 
-            follows_slash = False
             expecting_whitespace = False
+            current += len(text)
         
+        if in_string:
+            raise SyntaxError('Unmatched quotes (")')
         if stack:
             raise SyntaxError("Unmatched open parethesis")
+        end_token()
 
         return result
     
-    def tokenize(self, string: str, locals: dict = None) -> dict:
+    @staticmethod
+    def cache_put(cache: dict, key, value):
+        "Stores `value` in one of the compile caches, evicting the oldest entry once the cache holds `CACHE_SIZE` items"
+        if len(cache) >= BasePlayer.CACHE_SIZE:
+            del cache[next(iter(cache))]
+        cache[key] = value
+        return value
+
+    def compile(self, sequence: str) -> tuple[str]:
         """
-        Tokenizes the string to a dictionary containing the function, positional arguments, and keyword arguments of appropiate types. 
-        
-        Returns as a dictionary in the form
-        ```
-        {"function": function, "inputs": str, "modifiers": int, "args": list, "kwargs": dict}
-        ```
+        Returns the top level tokens of `sequence`, parsing it only the first time it is seen.
 
-        `inputs` is a 1-2 char string determining how key presses determine game movement, examples `wa` or `s`.  \
-        `modifiers` is an int which uses bit flags to indicate which modifiers are on or off. See the attribute `MODIFIERS`
+        The tokens themselves are compiled lazily by `compile_token()` when they are first run, so errors surface in the same order as the code runs.
+        """
+        key = (type(self), sequence)
+        tokens = BasePlayer._sequence_cache.get(key)
+        if tokens is None:
+            tokens = BasePlayer.cache_put(BasePlayer._sequence_cache, key, tuple(self.parse(sequence)))
+        return tokens
+
+    def compile_token(self, string: str) -> "BasePlayer.Instruction":
+        """
+        Compiles a single token into an `Instruction`, which is cached for every later call with the same token.
 
         Raises `SyntaxError` if a positional argument follows a keyword argument. \\
         Raises `NameError` if a given function doesn't exist. \\
         Raises `TypeError` if these functions: (`stop`-related, 45 movement, or non-movement functions) recieves an input.
-        Raises any other error encountered while converting datatypes.
         """
+        key = (type(self), string)
+        instruction = BasePlayer._instruction_cache.get(key)
+        if instruction is not None:
+            return instruction
 
-        # tokenize_regex = r'(\W)?([^.\(\-)]+)(?:\.([^\(\.]+))?(?:\[(.*)\])?(?:\((.*)\))?(.+)?'
-                         # r'(\W)?([^.\(\-)]+)(?:\.([^\(\.]+))?             (?:\((.*)\))?(.+)?'
-        e1 = r"(\W)?"
-        func = r"([^.\[\(\-\)\]]+)"
-        inputs = r"(?:\.([wasdWASD]+))?"
-        modifiers = r"(?:\[(.*)\])?"
-        args = r"(?:\((.*)\))?"
-        e2 = r"(.+)?"
-
-        tokenize_regex = e1 + func + inputs + modifiers + args + e2 
-        error1, func_name, inputs, modifiers, args, error2 = re.findall(tokenize_regex, string, flags=re.DOTALL)[0]
+        error1, func_name, inputs, modifiers, args, error2 = TOKENIZE_REGEX.findall(string)[0]
 
         if error1 and error1 != "-":
             
@@ -581,47 +1002,28 @@ class BasePlayer:
         elif error2:
             raise SyntaxError(f"Unknown item {error2} in {string}")
         
-        if string[0] == "-":
-            self.reverse = True
-        else:
-            self.reverse = False
-
+        reverse = string[0] == "-"
 
         func = self.FUNCTIONS.get(func_name)
-        if func is None:
-            func = self.local_funcs.get(func_name) # CHANGES
-            if func is None:
-                if self.call_stack:
-                    error_msg = f"In {', '.join(self.call_stack)} -> "
-                else:
-                    error_msg = ''
-                error_msg += f"{func_name} is not a valid function. "
-                suggestions = self.get_suggestions(func_name)
-                
-                if suggestions:
-                    suggestions = suggestions[0:min(4, len(suggestions))]
-                    error_msg += f"Did you mean {', '.join(suggestions)}?"
-
-                raise NameError(error_msg)
-
+        if func is None and func_name not in self.local_funcs:
+            self.raise_unknown_function(func_name)
         
         positional_args = []
         keyword_args = {}
 
         args = self.parse(args, splitters=",", strict_whitespace=False)
 
-        keyword_regex = r"^\s*?(\w+)\s*=\s*(.+)\s*$"
         after_keyword = False
 
         for arg in args:
-            result = re.findall(keyword_regex, arg, flags=re.DOTALL)
+            result = KEYWORD_ARGUMENT_REGEX.findall(arg)
 
             if result: # keyword
-                key,value = result[0]
-                if key in keyword_args:
-                    raise SyntaxError(f"Repeated keyword argument {key}")
+                key_name,value = result[0]
+                if key_name in keyword_args:
+                    raise SyntaxError(f"Repeated keyword argument {key_name}")
 
-                keyword_args[key.strip()] = value.strip()
+                keyword_args[key_name.strip()] = value.strip()
                 after_keyword = True
             else: # positional
                 if after_keyword:
@@ -629,16 +1031,16 @@ class BasePlayer:
                 
                 positional_args.append(arg)
         
-        positional_args, keyword_args = self.check_types(func, positional_args, keyword_args, locals=locals)
         if modifiers:
             modifiers = self.validate_modifiers(modifiers.split(","))
         else:
             modifiers = 0
 
-        if self._can_have_input and func.__name__ not in self._can_have_input:
+        name = func.__name__ if func is not None else func_name
+        if self._can_have_input and name not in self._can_have_input:
             if inputs:
-                raise TypeError(f"{func.__name__}() cannot be modified by an input")
-            if self._fortyfive_methods and func.__name__ in self._fortyfive_methods:
+                raise TypeError(f"{name}() cannot be modified by an input")
+            if self._fortyfive_methods and name in self._fortyfive_methods:
                 inputs = "w"
 
         elif not inputs:
@@ -646,10 +1048,113 @@ class BasePlayer:
         elif inputs not in ["w","wa","wd", "s", "sa", "sd", "a", "d"]:
             raise ValueError(f"function {func_name} received bad input '{inputs}', it can only be w, s, a, d, wa, wd, sa, wd.")
 
-        if func.__name__ not in self._can_have_modifiers and modifiers:
-            raise TypeError(f"{func.__name__}() cannot be modified by a modifier")
+        if name not in self._can_have_modifiers and modifiers:
+            raise TypeError(f"{name}() cannot be modified by a modifier")
+        
+        instruction = BasePlayer.Instruction(func_name, func, inputs, modifiers, positional_args, keyword_args, reverse)
+        return BasePlayer.cache_put(BasePlayer._instruction_cache, key, instruction)
+
+    def token_variables(self, token: str, strict: bool = False, expanding: frozenset = frozenset()) -> set[str]:
+        """
+        Returns the names of the variables read by the arguments of `token`, including the ones inside sequences passed to it (like the body of `repeat`) and the `{}` fields of strings.
+
+        Only the compiled arguments are looked at, so inputs, modifiers and the text of strings never count as variables. \\
+        A function that doesn't exist yet (because it's defined earlier in the same sequence) has its arguments read as untyped expressions, unless `strict` is set, which raises the `NameError` instead. `expanding` holds the custom functions whose bodies are already being looked into, so recursive functions are only looked into once.
+        """
+        try:
+            instruction = self.compile_token(token)
+        except NameError:
+            if strict:
+                raise
+            _, _, _, _, args, _ = TOKENIZE_REGEX.findall(token)[0]
+            return set().union(*(self.argument_variables(arg, inspect.Parameter.empty, expanding) for arg in self.parse(args, splitters=",", strict_whitespace=False)))
+
+        func = instruction.function or self.local_funcs.get(instruction.name)
+        signature = self.get_signature(func)
+        names = set()
+        for i, arg in enumerate(instruction.args):
+            datatype = signature.positional_annotations[i] if i < len(signature.positional_annotations) else signature.var_positional
+            names |= self.argument_variables(arg, datatype, expanding)
+        for key, arg in instruction.kwargs.items():
+            if key in signature.keyword_only:
+                datatype = signature.keyword_only[key]
+            elif key in signature.positional_index:
+                datatype = signature.positional_annotations[signature.positional_index[key]]
+            else:
+                datatype = inspect.Parameter.empty
+            names |= self.argument_variables(arg, datatype, expanding)
+
+        if isinstance(func, BasePlayer.CustomMothballFunction) and func.name not in expanding: # The body can read variables other than its parameters
+            names |= self.sequence_variables(func.sequence, expanding=expanding | {func.name}) - set(signature.names)
+        return names
+
+    def sequence_variables(self, sequence: str, strict: bool = False, expanding: frozenset = frozenset()) -> set[str]:
+        "Returns the names of the variables read by every token of `sequence` (see `token_variables()`)"
+        return set().union(*(self.token_variables(token, strict, expanding) for token in self.compile(sequence)))
+
+    def argument_variables(self, arg: str, datatype: type, expanding: frozenset = frozenset()) -> set[str]:
+        "Returns the names of the variables read by a single argument `arg`, which is converted to `datatype` when its token runs"
+        if datatype == NameString:
+            return set()
+        if datatype == MothballSequence:
+            try:
+                return self.sequence_variables(arg, True, expanding)
+            except Exception: # Not a sequence, `var()` evaluates its value as an expression
+                pass
+        if datatype == str or datatype in (inspect.Parameter.empty, None, MothballSequence) and arg.strip().startswith('"'):
+            fields = re.findall(r"(?<!\\)\{([^{}]*)\}", arg)
+            return set().union(*(expression_variables(field) for field in fields))
+        return expression_variables(arg)
+
+    def bind(self, instruction: "BasePlayer.Instruction", locals: dict = None) -> dict:
+        """
+        Converts the arguments of a compiled `instruction` using the current variables and returns a token for `run()` in the form
+        ```
+        {"function": function, "inputs": str, "modifiers": int, "args": list, "kwargs": dict}
+        ```
+
+        Raises any error encountered while converting datatypes.
+        """
+        func = instruction.function
+        if func is None:
+            func = self.local_funcs.get(instruction.name)
+            if func is None:
+                self.raise_unknown_function(instruction.name)
+
+        self.reverse = instruction.reverse
+        positional_args, keyword_args = self.check_types(func, instruction.args, instruction.kwargs, locals=locals)
+        return {"function": func, "inputs": instruction.inputs, "modifiers": instruction.modifiers, "args": positional_args, "kwargs": keyword_args}
+
+    def raise_unknown_function(self, func_name: str):
+        "Raises `NameError` for a function that doesn't exist, with suggestions of what might have been meant"
+        if self.call_stack:
+            error_msg = f"In {', '.join(self.call_stack)} -> "
+        else:
+            error_msg = ''
+        error_msg += f"{func_name} is not a valid function. "
+        suggestions = self.get_suggestions(func_name)
         
-        return {"function": func, "inputs": inputs, "modifiers": modifiers, "args": positional_args, "kwargs": keyword_args}
+        if suggestions:
+            suggestions = suggestions[0:min(4, len(suggestions))]
+            error_msg += f"Did you mean {', '.join(suggestions)}?"
+
+        raise NameError(error_msg)
+
+    def tokenize(self, string: str, locals: dict = None) -> dict:
+        """
+        Tokenizes the string to a dictionary containing the function, positional arguments, and keyword arguments of appropiate types. 
+        
+        Returns as a dictionary in the form
+        ```
+        {"function": function, "inputs": str, "modifiers": int, "args": list, "kwargs": dict}
+        ```
+
+        `inputs` is a 1-2 char string determining how key presses determine game movement, examples `wa` or `s`.  \
+        `modifiers` is an int which uses bit flags to indicate which modifiers are on or off. See the attribute `MODIFIERS`
+
+        See `compile_token()` and `bind()` for the errors raised.
+        """
+        return self.bind(self.compile_token(string), locals=locals)
     
     def validate_modifiers(self, modifiers: list):
         m = 0
@@ -667,30 +1172,16 @@ class BasePlayer:
 
         Raises any appropiate error encountered while converting strings to the necessary datatypes.
         """
-        # print(self.local_vars)
         if locals is None:
             locals = self.local_vars
 
         converted_args = []
         converted_kwargs = {}
 
-        if isinstance(func, BasePlayer.CustomMothballFunction):
-            positional_only = {x.name:x.annotation for x in func.positional_only}
-            positional_or_keyword = {x.name:x.annotation for x in func.positional_or_keyword}
-            keyword_only = {x.name:x.annotation for x in func.keyword_only}
-            var_positional = {x.name:x.annotation for x in func.var_positional}
-            required_positionals = {x.name:x.annotation for x in func.positional_only if x.default == inspect.Parameter.empty}
-
-        else:
-            signature = inspect.signature(func).parameters.values()
-
-            positional_only = {x.name:x.annotation for x in signature if x.kind == inspect.Parameter.POSITIONAL_ONLY and x.name != "self"}
-            positional_or_keyword = {x.name:x.annotation for x in signature if x.kind == inspect.Parameter.POSITIONAL_OR_KEYWORD and x.name != "self"}
-            keyword_only = {x.name:x.annotation for x in signature if x.kind == inspect.Parameter.KEYWORD_ONLY}
-            var_positional = {x.name:x.annotation for x in signature if x.kind == inspect.Parameter.VAR_POSITIONAL}
-
-            # Watch out for potential errors
-            required_positionals = {x.name:x.annotation for x in signature if x.kind == inspect.Parameter.POSITIONAL_ONLY and x.default == inspect.Parameter.empty and x.name != "self"}
+        signature = self.get_signature(func)
+        positional_names = signature.positional_names
+        positional_annotations = signature.positional_annotations
+        required_positionals = signature.required_positionals
 
         # Idea: First check the positional arguments using positional_only and positional_or_keyword. 
         # Once positional_only runs out, start using positional_or_keyword.
@@ -698,15 +1189,14 @@ class BasePlayer:
         # Raise error if there's too many positional arguments (var_positional is empty)
 
         ### Check the positional arguments ###
-        can_be_positional = positional_only | positional_or_keyword
-
         if len(required_positionals) > len(args):
             number_of_missing = len(required_positionals) - len(args)
-            raise TypeError(f"{func.__name__} missing {number_of_missing} positional-only argument{'s' if number_of_missing > 1 else ''}: {', '.join(list(required_positionals)[len(args):])}")
+            raise TypeError(f"{func.__name__} missing {number_of_missing} positional-only argument{'s' if number_of_missing > 1 else ''}: {', '.join(required_positionals[len(args):])}")
 
-        for i in range(min(len(args), len(can_be_positional))):
+        check_duration = func.__name__ not in self.local_funcs
+        for i in range(min(len(args), len(positional_names))):
 
-            datatype = list(can_be_positional.values())[i]
+            datatype = positional_annotations[i]
             if datatype == inspect.Parameter.empty:
                 try:
                     converted_value = self.safe_eval(args[i], float, locals)
@@ -716,46 +1206,47 @@ class BasePlayer:
             else:
                 converted_value = self.safe_eval(args[i], datatype, locals)
 
-            if list(can_be_positional)[i] == "duration" and func.__name__ not in self.local_funcs:
+            if check_duration and positional_names[i] == "duration":
                 if converted_value is not None and converted_value < 0:
                     raise ValueError(f"Positional argument 'duration' should be a non-negative integer")
                 elif converted_value is None:
                     converted_value = 1
-            # elif list(can_be_positional)[i] == "label":
-            #     if converted_value is None:
-            #         converted_value = func.__name__
-
 
             converted_args.append(converted_value)
         
-        if len(args) < len(can_be_positional):
-            a = len(args) - len(can_be_positional)
-            can_be_positional = {x:can_be_positional[x] for x in list(can_be_positional)[a:]}
+        # Positional parameters that were already filled can't be given as keywords, unless every one of them was filled
+        first_keyword = 0
+        if len(args) < len(positional_names):
+            first_keyword = len(args)
         
-        elif var_positional and len(args) > len(can_be_positional):
-            for j in args[len(can_be_positional):]:
-                c = self.safe_eval(j, list(var_positional.values())[0], locals)
+        elif signature.var_positional is not None and len(args) > len(positional_names):
+            for j in args[len(positional_names):]:
+                c = self.safe_eval(j, signature.var_positional, locals)
                 converted_args.append(c)
         
-        elif not var_positional and len(args) > len(can_be_positional):
-            raise TypeError(f"{func.__name__} accepts at most {len(can_be_positional)} positional arguments, got {len(args)} instead")
+        elif signature.var_positional is None and len(args) > len(positional_names):
+            raise TypeError(f"{func.__name__} accepts at most {len(positional_names)} positional arguments, got {len(args)} instead")
         
-        can_be_keyword = can_be_positional | keyword_only
-
         ### Check the keyword args ###
         for kw, value in kwargs.items():
-            datatype = can_be_keyword.get(kw)
+            index = signature.positional_index.get(kw)
+            if index is not None and index >= first_keyword:
+                datatype = positional_annotations[index]
+            else:
+                datatype = signature.keyword_only.get(kw)
 
             if datatype is None:
                 raise TypeError(f"{func.__name__} has no keyword argument '{kw}'")
             
             converted_kwargs[kw] = self.safe_eval(value, datatype, locals)
-            # else:
-
-                # converted_kwargs[kw] = datatype(value)
-                
         
         return converted_args, converted_kwargs
+
+    def get_signature(self, func) -> FunctionSignature:
+        "Returns the precomputed `FunctionSignature` of a built-in or custom function"
+        if isinstance(func, BasePlayer.CustomMothballFunction):
+            return func.signature
+        return self.SIGNATURES[func]
         
     def run(self, token: dict):
         """
@@ -794,22 +1285,32 @@ class BasePlayer:
             self.local_vars = x
         else:
             func(self, *args, **kwargs)
+        if self.output_sink is not None:
+            self.flush_output()
     
-    def simulate(self, sequence: str, return_defaults = True, locals: dict = None, suppress_exception: bool = True):
-        "Execute Mothball Code. If no output was made and `return_defaults == True`, return the default output (see `show_default_output()`). `locals` is a dict of values for variables."
+    def simulate(self, sequence: str, return_defaults = True, locals: dict = None, suppress_exception: bool = True, checkpoint: bool = False):
+        """
+        Execute Mothball Code. If no output was made and `return_defaults == True`, return the default output (see `show_default_output()`). `locals` is a dict of values for variables.
+        If `checkpoint` is set, a `Checkpoint` is added to `self.checkpoints` after each top level token, and the tokens that already have one (after `resume`) are skipped.
+        """
         try:
-            parsed_tokens = self.parse(sequence)
-
-            for token in parsed_tokens:
+            tokens = self.compile(sequence)
+            if checkpoint:
+                if any(c.token != token for c, token in zip(self.checkpoints, tokens)) or len(self.checkpoints) > len(tokens):
+                    raise ValueError("The checkpoints of this player are not from this sequence")
+                tokens = tokens[len(self.checkpoints):]
+            for token in tokens:
                 if self.stop_flag:
                     raise InterruptedError("Stopped execution")
-                runnable = self.tokenize(token, locals=locals)
+                runnable = self.bind(self.compile_token(token), locals=locals)
                 if self.stop_flag:
                     raise InterruptedError("Stopped execution")
                 self.run(runnable)
+                if checkpoint:
+                    self.checkpoints.append(self.make_checkpoint(token))
 
         
-            if return_defaults and not self.output:
+            if return_defaults and not self.output and not self.streamed_lines:
                 self.show_default_output()
         except Exception as e:
             if suppress_exception:
@@ -820,14 +1321,129 @@ class BasePlayer:
 
     def show_output(self):
         s = ""
-        for tup in self.output:
-            ss = "".join(tup[1])
+        for line in self.output:
+            ss = "".join(format_output_line(line)[1])
             print(ss)
             s += ss + "\n"
         return s
     
-    FUNCTIONS = {"function": function, "func":function, "print": print, "repeat": repeat, "r": repeat, "setprecision":setprecision, "precision":setprecision, "pre":setprecision, "ballhelp": ballhelp, "help": ballhelp, "var": var}
-    ALIASES = {"function": ["function", "func"], "print": ["print"], "repeat": ["repeat", "r"], "setprecision": ["setprecision", "pre", "precision"], "ballhelp":["ballhelp", "help"], "var": ["var"]}
+    FUNCTIONS = {"function": function, "func":function, "print": print, "repeat": repeat, "r": repeat, "setprecision":setprecision, "precision":setprecision, "pre":setprecision, "ballhelp": ballhelp, "help": ballhelp, "var": var, "sweep": sweep, "search": search}
+    ALIASES = {"function": ["function", "func"], "print": ["print"], "repeat": ["repeat", "r"], "setprecision": ["setprecision", "pre", "precision"], "ballhelp":["ballhelp", "help"], "var": ["var"], "sweep": ["sweep"], "search": ["search"]}
+
+BasePlayer.SIGNATURES = {func: FunctionSignature.from_function(func) for func in BasePlayer.FUNCTIONS.values()}
+BasePlayer.state_getter = attrgetter(*BasePlayer.STATE_ATTRIBUTES)
+
+def run_sweep(template: bytes, variable_name: str, values: list, sequence: str, returners: tuple[str]) -> list[tuple[list[str] | str, list[str] | str]]:
+    """
+    Runs part of a `sweep`: for each value, unpickles a fresh player from `template`, sets `variable_name`, runs `sequence` then `returners`.
+    Returns a `(labels, cells)` pair per value, or `("Error", message)` if the run raised an exception. Runs in the sweep's worker processes.
+    """
+    results = []
+    for value in values:
+        player: BasePlayer = pickle.loads(template)
+        player.local_vars[variable_name] = value
+        try:
+            player.simulate(sequence, return_defaults=False, suppress_exception=False)
+            player.output = []
+            if returners:
+                for returner in returners:
+                    player.simulate(returner, return_defaults=False, suppress_exception=False)
+            else:
+                player.show_default_output()
+        except Exception as e:
+            results.append(("Error", f"Error ({type(e).__name__}): {e}"))
+            continue
+        labels, cells = [], []
+        for line in player.output:
+            _, parts = format_output_line(line)
+            if len(parts) > 2 and parts[1] == ": ": # label: value
+                labels.append(parts[0])
+                cells.append("".join(parts[2:]))
+            else:
+                labels.append("")
+                cells.append("".join(parts))
+        results.append((labels, cells))
+    return results
+
+def run_search(template: bytes, tokens: tuple[str], levels: tuple[tuple[str]], values: dict[str, list], measure: str, low: float, high: float, prune: bool, choices: list[tuple]) -> list[tuple[list[tuple[tuple, float]], int, int]]:
+    """
+    Runs part of a `search`: the programs whose first branching variables (the first non empty level) take one of `choices`.
+    `levels` holds the variables each token of `tokens` uses for the first time. Returns a single `(found, ran, pruned)`, where `found` holds the values of the variables and the measure of each program inside the window,
+    and `ran` and `pruned` count the programs that were run and skipped. Runs in the search's worker processes.
+    """
+    player: BasePlayer = pickle.loads(template)
+    names = [name for level in levels for name in level]
+    found = []
+    ran = pruned = 0
+
+    def run(token: str):
+        player.simulate(token, return_defaults=False, suppress_exception=False)
+
+    def measured() -> float:
+        player.output = []
+        player.simulate(measure, return_defaults=False, suppress_exception=False)
+        return float(player.last_returned_value)
+
+    def restore(state: PlayerState):
+        player.restore(state)
+        player.output = []
+        if hasattr(player, "history"):
+            player.history = type(player.history)()
+
+    def explore(index: int, choices: list[tuple] | None = None):
+        nonlocal ran, pruned
+        while index < len(tokens) and not levels[index]:
+            run(tokens[index])
+            index += 1
+        if index == len(tokens):
+            ran += 1
+            result = measured()
+            if low <= result <= high:
+                found.append((tuple(player.local_vars[name] for name in names), result))
+            return
+
+        state = player.snapshot()
+        if choices is None:
+            choices = list(itertools.product(*(values[name] for name in levels[index])))
+        remaining = [name for level in levels[index + 1:] for name in level]
+        programs = len(choices) * math.prod(len(values[name]) for name in remaining)
+        if prune and programs > 2:
+            ends = []
+            for end in (0, -1):
+                player.local_vars.update(zip(levels[index], choices[end]))
+                player.local_vars.update((name, values[name][end]) for name in remaining)
+                for token in tokens[index:]:
+                    run(token)
+                ends.append(measured())
+                restore(state)
+            if max(ends) < low or min(ends) > high:
+                pruned += programs
+                return
+
+        for choice in choices:
+            player.local_vars.update(zip(levels[index], choice))
+            run(tokens[index])
+            explore(index + 1)
+            restore(state)
+
+    explore(0, choices)
+    return [(found, ran, pruned)]
+
+_sweep_pool: ProcessPoolExecutor = None
+
+def sweep_pool() -> ProcessPoolExecutor:
+    "Returns the process pool shared by every `sweep`, creating it on first use. Processes are spawned (not forked) since the app runs simulations from a Qt thread."
+    global _sweep_pool
+    if _sweep_pool is None:
+        _sweep_pool = ProcessPoolExecutor(max_workers=os.cpu_count() or 1, mp_context=multiprocessing.get_context("spawn"))
+    return _sweep_pool
+
+def close_sweep_pool():
+    "Shuts down the process pool used by `sweep`, a new one is created by the next sweep that needs it"
+    global _sweep_pool
+    if _sweep_pool is not None:
+        _sweep_pool.shutdown(wait=False, cancel_futures=True)
+        _sweep_pool = None
     
 
 if __name__ == "__main__":
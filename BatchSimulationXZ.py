@@ -0,0 +1,387 @@
+"""
+Contains `BatchPlayerSimulationXZ`, which runs one Mothball sequence for many starting states at once, and `simulate_batch`, a shortcut for using it. \\
+Every player's position, velocity, facing, ground slipperiness and potion effects are NumPy arrays with one element per player, and each tick of the movement kernel is done with array operations on all of them.
+The results are bit identical to running `PlayerSimulationXZ` on each starting state separately.
+
+Only movement and setter functions are meant to be used in batch sequences; returners (`outz`, `poss`, etc.) and `taps` expect a single player.
+"""
+
+import numpy as np
+from numpy import float32 as f32
+from math import sin, cos, sqrt
+from typing import Literal, NamedTuple
+from collections import deque
+from MothballSimulationXZ import PlayerSimulationXZ, Tick
+from FloatMath import fround, fround_array, F_0_0001, F_0_02, F_0_1, F_0_2, F_NEG_0_15, F_0_3, F_0_30000010133, F_0_16277136, F_0_21600002, F_0_91, F_0_98, F_1, F_PI, F_180, F_DEG_TO_RAD, F_RAD_TO_INDEX, F_QUARTER_TURN_INDEX, sine_table_array
+
+def is_single_array(value) -> bool:
+    "Returns `True` if `value` is a float32 scalar or array, meaning that operations with another float32 round to float32."
+    return type(value) is f32 or (isinstance(value, np.ndarray) and value.dtype == np.float32)
+
+def to_rotation(angle, offset) -> np.ndarray:
+    "Same as `f32(angle + offset)`, except `angle` and `offset` can be arrays. The sum is done in double like it is for numpy scalars."
+    return (np.asarray(angle, dtype=np.float64) + offset).astype(np.float32)
+
+class BatchResult(NamedTuple):
+    "The final state of each player (arrays of shape `(N,)`) and their state after every tick (arrays of shape `(ticks, N)`)."
+    x: np.ndarray
+    z: np.ndarray
+    vx: np.ndarray
+    vz: np.ndarray
+    ticks_x: np.ndarray
+    ticks_z: np.ndarray
+    ticks_vx: np.ndarray
+    ticks_vz: np.ndarray
+
+class BatchPlayerSimulationXZ(PlayerSimulationXZ):
+    """
+    `PlayerSimulationXZ` for `size` players at once. `x`, `z`, `vx`, `vz` are float64 arrays, `rotation` and `default_ground_slip` are float32 arrays and `speed_effect`, `slow_effect` are int arrays.
+
+    Inputs, modifiers and everything else in the sequence are the same for every player. Each `Tick` in `history` holds arrays.
+    """
+    def __init__(self, size: int) -> None:
+        super().__init__()
+        self.size = size
+        self.x = np.zeros(size)
+        self.z = np.zeros(size)
+        self.vx = np.zeros(size)
+        self.vz = np.zeros(size)
+        self.rotation = np.zeros(size, dtype=np.float32)
+        self.last_rotation = np.zeros(size, dtype=np.float32)
+        self.default_ground_slip = np.full(size, f32(0.6))
+        self.speed_effect = np.zeros(size, dtype=int)
+        self.slow_effect = np.zeros(size, dtype=int)
+        self.history: list[Tick] = [] # Ticks of arrays don't fit in a TickHistory
+
+    @classmethod
+    def from_player(cls, player: PlayerSimulationXZ, size: int) -> "BatchPlayerSimulationXZ":
+        "Returns a batch of `size` copies of the state of `player` (see `PlayerSimulationXZ.snapshot`)"
+        batch = cls(size)
+        batch.restore(player.snapshot())
+        for attribute in ("x", "z", "vx", "vz", "rotation", "default_ground_slip", "speed_effect", "slow_effect"):
+            setattr(batch, attribute, np.full(size, getattr(batch, attribute)))
+        return batch
+
+    def show_default_output(self):
+        "Outputs are made for one player, use `result()` instead"
+
+    def get_angle(self):
+        if self.angle_queue:
+            self.rotation = self.angle_queue.popleft()
+        if self.turn_queue:
+            turn = self.turn_queue.popleft()
+            if is_single_array(self.rotation) and not is_single_array(turn): # float32 + float is a double for numpy scalars, but not for arrays
+                self.rotation = np.asarray(self.rotation, dtype=np.float64) + turn
+            else:
+                self.rotation = self.rotation + turn
+        return self.rotation
+
+    def move_old(self, duration: int, rotation: f32 = None, rotation_offset: float = 0.0, slip: f32 = None, is_sprinting: bool = False, is_sneaking: bool = False, speed: int = None, slow: int = None, state: Literal["ground", "air", "jump"] = "ground"):
+        "Same as `PlayerSimulationXZ.move_old`, for every player at once"
+        self.move_batch(duration, rotation, rotation_offset, slip, is_sprinting, is_sneaking, speed, slow, state)
+
+    def move_new(self, duration: int, rotation: f32 = None, rotation_offset: float = 0.0, slip: f32 = None, is_sprinting: bool = False, is_sneaking: bool = False, speed: int = None, slow: int = None, state: Literal["ground", "air", "jump"] = "ground"):
+        "Same as `PlayerSimulationXZ.move_new`, for every player at once"
+        self.move_batch(duration, rotation, rotation_offset, slip, is_sprinting, is_sneaking, speed, slow, state)
+
+    def move_batch(self, duration: int, rotation: f32 = None, rotation_offset: float = 0.0, slip: f32 = None, is_sprinting: bool = False, is_sneaking: bool = False, speed: int = None, slow: int = None, state: Literal["ground", "air", "jump"] = "ground"):
+        """
+        The movement kernel of `move_old` and `move_new` (depending on `version_computation`) as array operations.
+
+        Every value that is a float32 in `PlayerSimulationXZ` is a float64 array holding float32 values here, rounded with `fround_array` wherever the scalar code calls `fround`.
+        Branches that depend on the player (inertia, web, ladder) are done with masks.
+        """
+        new_computation = self.version_computation == self.NEW_COMPUTATION
+
+        if self.modifiers  & self.WATER:
+            slip=f32(0.8/0.91)
+        elif self.modifiers & self.LAVA:
+            slip=f32(0.5/0.91)
+
+        sj_boost = self.new_sprintjump_boost if new_computation else self.old_sprintjump_boost
+        if self.previous_slip is None:
+            self.previous_slip = self.default_ground_slip
+
+        if isinstance(rotation_offset, (int, float)) and rotation_offset == 45:
+            self.inputs = "wa"
+
+        if speed is None:
+            speed = self.speed_effect
+        if slow is None:
+            slow = self.slow_effect
+
+        self.state = state
+        if ((self.sneak_delay and self.previously_sneaking) or (not self.sneak_delay and is_sneaking)) and self.modifiers & self.LAVA:
+            self.state = self.AIR
+
+        override_rotation = False
+        if (rotation is not None):
+            override_rotation = True
+            rotation = to_rotation(rotation, rotation_offset)
+
+        if slip is None or (not isinstance(slip, np.ndarray) and not slip):
+            slip = self.default_ground_slip
+
+        single_angles = self.total_angles != -1
+
+        for _ in range(duration):
+            if not override_rotation:
+                rotation = to_rotation(self.get_angle(), rotation_offset)
+            yaw = rotation.astype(np.float64)
+            vx = np.asarray(self.vx, dtype=np.float64)
+            vz = np.asarray(self.vz, dtype=np.float64)
+
+            self.x = self.x + vx
+            self.z = self.z + vz
+
+            if self.modifiers & self.SOULSAND:
+                vx = vx * 0.4
+                vz = vz * 0.4
+
+            forward, strafe = self.movement_values()
+
+            if self.reverse:
+                forward = -forward
+                strafe = -strafe
+                sj_boost *= -1
+
+            # Finalize Momentum
+            if is_single_array(self.previous_slip):
+                drag = fround_array(F_0_91 * np.asarray(self.previous_slip, dtype=np.float64))
+            else:
+                drag = F_0_91 * self.previous_slip
+            vx = vx * drag
+            vz = vz * drag
+
+            # Apply inertia or web
+            if self.inertia_axis == 1:
+                vx = np.where((np.abs(vx) < self.inertia_threshold) | self.previously_in_web, 0.0, vx)
+                vz = np.where((np.abs(vz) < self.inertia_threshold) | self.previously_in_web, 0.0, vz)
+            elif self.inertia_axis == 2:
+                stopped = (np.sqrt(vz*vz + vx*vx) < self.inertia_threshold) | self.previously_in_web
+                vx = np.where(stopped, 0.0, vx)
+                vz = np.where(stopped, 0.0, vz)
+
+            if new_computation:
+                M, single_M = self.movement_multiplier_new(slip, is_sprinting, speed, slow, self.state)
+            else:
+                M, single_M = self.movement_multiplier_old(slip, is_sprinting, speed, slow, self.state)
+
+            # Sprint jump boost
+            if self.state == self.JUMP and is_sprinting:
+                sin_facing, cos_facing = self.get_sin_cos(fround_array(yaw * F_DEG_TO_RAD))
+                if single_angles and is_single_array(sj_boost):
+                    vx = vx - fround_array(sin_facing * float(sj_boost))
+                    vz = vz + fround_array(cos_facing * float(sj_boost))
+                else:
+                    vx = vx - sin_facing * float(sj_boost)
+                    vz = vz + cos_facing * float(sj_boost)
+
+            # Inputs are the same for every player, so forward and strafe stay scalars until they are scaled by M
+            if self.modifiers & self.BLOCK:
+                forward = fround(forward * 0.2)
+                strafe  = fround(strafe * 0.2)
+
+            if (self.sneak_delay and self.previously_sneaking) or (not self.sneak_delay and is_sneaking):
+                forward = fround(forward * 0.3)
+                strafe = fround(strafe * 0.3)
+
+            forward = fround(forward * F_0_98)
+            strafe = fround(strafe * F_0_98)
+
+            if new_computation:
+                distance = strafe * strafe + forward * forward
+                moving = distance >= 1e-7
+                if moving:
+                    distance = fround(sqrt(distance))
+                    if distance < 1.0:
+                        distance = 1.0
+                    else:
+                        distance = distance+0.0000001125593117
+                    distance = M / distance
+                    yaw_radians = fround_array(yaw * F_DEG_TO_RAD)
+            else:
+                distance = fround(fround(strafe * strafe) + fround(forward * forward))
+                moving = distance >= F_0_0001
+                if moving:
+                    distance = fround(sqrt(distance))
+                    if distance < F_1:
+                        distance = F_1
+                    distance = fround_array(M / distance) if single_M else M / distance
+                    yaw_radians = fround_array(fround_array(yaw * F_PI) / F_180)
+
+            if moving:
+                sin_yaw, cos_yaw = self.get_sin_cos(yaw_radians)
+                if not single_angles:
+                    sin_yaw = fround_array(sin_yaw)
+                    cos_yaw = fround_array(cos_yaw)
+
+                if single_M and not new_computation:
+                    forward = fround_array(forward * distance)
+                    strafe = fround_array(strafe * distance)
+                    vx = vx + fround_array(fround_array(strafe * cos_yaw) - fround_array(forward * sin_yaw))
+                    vz = vz + fround_array(fround_array(forward * cos_yaw) + fround_array(strafe * sin_yaw))
+                else:
+                    forward = forward * distance
+                    strafe = strafe * distance
+                    vx = vx + (strafe * cos_yaw - forward * sin_yaw)
+                    vz = vz + (forward * cos_yaw + strafe * sin_yaw)
+
+            if self.modifiers & self.WEB:
+                vx = vx / 4
+                vz = vz / 4
+            if self.modifiers & self.LADDER:
+                vx = np.clip(vx, -0.15, 0.15)
+                vz = np.clip(vz, -0.15, 0.15)
+
+            self.vx = vx
+            self.vz = vz
+
+            # Prep for next tick
+            self.previous_slip = slip
+            self.previously_sprinting = is_sprinting
+            self.previously_sneaking = is_sneaking
+            self.previously_in_web = bool(self.modifiers & self.WEB)
+            self.last_turn = rotation - self.last_rotation
+            self.last_rotation = rotation
+
+            self.history.append(Tick('w' in self.inputs, 'a' in self.inputs, 's' in self.inputs, 'd' in self.inputs, is_sneaking, is_sprinting, self.state == self.JUMP, bool(self.modifiers & self.BLOCK), self.last_turn, self.x, self.z, self.vx, self.vz))
+
+    def movement_multiplier_old(self, slip, is_sprinting, speed, slow, state):
+        "Same as `PlayerSimulationXZ.movement_multiplier_old`, with `slip`, `speed` and `slow` being arrays (or scalars)"
+        single = True
+        if self.modifiers & self.WATER or self.modifiers & self.LAVA:
+            M = F_0_02
+
+        elif state == self.AIR:
+            M = F_0_02
+
+            if (self.air_sprint_delay and self.previously_sprinting) or (not self.air_sprint_delay and is_sprinting):
+                M = fround(M + M * 0.3)
+
+        else:
+            M = self.potion_multiplier(speed, slow)
+
+            if is_sprinting:
+                M = fround_array(M * (1.0 + F_0_3))
+
+            if is_single_array(slip):
+                drag = fround_array(F_0_91 * np.asarray(slip, dtype=np.float64))
+                M = fround_array(M * fround_array(F_0_16277136 / fround_array(fround_array(drag * drag) * drag)))
+            else:
+                drag = F_0_91 * slip
+                M = M * (F_0_16277136 / (drag * drag * drag))
+                single = False
+
+        return M, single
+
+    def movement_multiplier_new(self, slip, is_sprinting, speed, slow, state):
+        "Same as `PlayerSimulationXZ.movement_multiplier_new`, with `slip`, `speed` and `slow` being arrays (or scalars)"
+        single = True
+        if self.modifiers & self.WATER or self.modifiers & self.LAVA:
+            M = F_0_02
+
+        elif state == self.AIR:
+            M = F_0_02
+
+            if (self.air_sprint_delay and self.previously_sprinting) or (not self.air_sprint_delay and is_sprinting):
+                M = fround(M + M * 0.3)
+
+        else:
+            M = self.potion_multiplier(speed, slow)
+
+            if is_sprinting:
+                M = fround_array(M * (1.0 + F_0_30000010133))
+
+            if is_single_array(slip):
+                slip = np.asarray(slip, dtype=np.float64)
+                M = fround_array(M * fround_array(F_0_21600002 / fround_array(fround_array(slip * slip) * slip)))
+            else:
+                M = M * (F_0_21600002 / (slip * slip * slip))
+                single = False
+
+        return M, single
+
+    @staticmethod
+    def potion_multiplier(speed, slow) -> np.ndarray:
+        "The ground movement multiplier before sprinting and slipperiness, for each player's speed and slowness levels"
+        speed = np.asarray(speed, dtype=np.float64)
+        slow = np.asarray(slow, dtype=np.float64)
+        M = np.full(np.broadcast(speed, slow).shape, F_0_1)
+        M = np.where(speed > 0, fround_array(M * (1.0 + F_0_2 * speed)), M)
+        M = np.where(slow > 0, fround_array(M * np.maximum(1.0 + F_NEG_0_15 * slow, 0)), M)
+        return M
+
+    def get_sin_cos(self, rad: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        "Same as `PlayerSimulationXZ.get_sin_cos` for an array of angles, gathering from the shared sine table"
+        if self.total_angles == -1:
+            return np.array([sin(r) for r in rad.flat]).reshape(rad.shape), np.array([cos(r) for r in rad.flat]).reshape(rad.shape)
+        table = sine_table_array(self.total_angles)
+        if self.total_angles == 65536:
+            scaled = fround_array(rad * F_RAD_TO_INDEX)
+            sin_index = scaled.astype(np.int64) & 65535
+            cos_index = fround_array(scaled + F_QUARTER_TURN_INDEX).astype(np.int64) & 65535
+        else:
+            sin_index = (1 / (2 * PlayerSimulationXZ.pi) * self.total_angles * rad).astype(np.int64) & (self.total_angles - 1)
+            cos_index = (1 / (2 * PlayerSimulationXZ.pi) * self.total_angles * rad + self.total_angles / 4).astype(np.int64) & (self.total_angles - 1)
+        return table[sin_index].astype(np.float64), table[cos_index].astype(np.float64)
+
+    def get_optimal_strafe_jump_angle(self, speed: int = None, slow: int = None, slip: f32 = None, is_sneaking: bool = False):
+        "Same as `PlayerSimulationXZ.get_optimal_strafe_jump_angle`, computed once for each distinct (speed, slowness, slip). Returns an array if players need different angles."
+        speeds = np.broadcast_to(self.speed_effect if speed is None else speed, (self.size,))
+        slows = np.broadcast_to(self.slow_effect if slow is None else slow, (self.size,))
+        slips = np.broadcast_to(self.default_ground_slip if slip is None else slip, (self.size,))
+        keys, first, inverse = np.unique(np.stack([speeds, slows, slips.astype(np.float64)], axis=1), axis=0, return_index=True, return_inverse=True)
+
+        players = [self.player(i) for i in first]
+        angles = np.array([p.get_optimal_strafe_jump_angle(speed, slow, slip, is_sneaking) for p in players])
+
+        if len(angles) == 1:
+            return float(angles[0])
+        return angles[inverse.reshape(-1)]
+
+    def player(self, index: int) -> PlayerSimulationXZ:
+        "Returns a `PlayerSimulationXZ` with the state of the player at `index`"
+        def element(value):
+            return value[index] if isinstance(value, np.ndarray) and value.ndim else value
+
+        p = PlayerSimulationXZ()
+        p.angle_queue = deque(self.angle_queue)
+        p.turn_queue = deque(self.turn_queue)
+        for attribute in ("state", "air_sprint_delay", "sneak_delay", "previously_sprinting", "previously_sneaking", "previously_in_web", "local_vars", "call_stack",
+                          "inertia_threshold", "inertia_axis", "modifiers", "reverse", "inputs", "version_computation", "total_angles", "precision"):
+            setattr(p, attribute, getattr(self, attribute))
+        for attribute in ("x", "z", "vx", "vz", "rotation", "last_rotation", "last_turn", "default_ground_slip", "previous_slip", "speed_effect", "slow_effect"):
+            setattr(p, attribute, element(getattr(self, attribute)))
+        p.x, p.z, p.vx, p.vz = float(p.x), float(p.z), float(p.vx), float(p.vz)
+        p.speed_effect, p.slow_effect = int(p.speed_effect), int(p.slow_effect)
+        return p
+
+    def result(self) -> BatchResult:
+        "Returns the final and per tick state of every player"
+        shape = (self.size,)
+        def final(value):
+            return np.broadcast_to(np.asarray(value, dtype=np.float64), shape).copy()
+        def ticks(name):
+            return np.array([np.broadcast_to(getattr(tick, name), shape) for tick in self.history]).reshape(-1, self.size)
+        return BatchResult(final(self.x), final(self.z), final(self.vx), final(self.vz), ticks("x"), ticks("z"), ticks("vx"), ticks("vz"))
+
+def simulate_batch(sequence: str, x = 0.0, z = 0.0, vx = 0.0, vz = 0.0, facing = 0.0, slip = 0.6, speed = 0, slow = 0) -> BatchResult:
+    """
+    Runs `sequence` once for every starting state and returns their final and per tick positions and velocities.
+
+    Each argument is a number or an array, all arrays must have the same length (the number of players). `facing` and `slip` are rounded to float32 like they are in Mothball.
+    Errors in `sequence` are raised instead of being written to the output.
+    """
+    x, z, vx, vz, facing, slip, speed, slow = np.broadcast_arrays(*(np.asarray(a) for a in (x, z, vx, vz, facing, slip, speed, slow)))
+    player = BatchPlayerSimulationXZ(x.size)
+    player.x = x.astype(np.float64).reshape(-1)
+    player.z = z.astype(np.float64).reshape(-1)
+    player.vx = vx.astype(np.float64).reshape(-1)
+    player.vz = vz.astype(np.float64).reshape(-1)
+    player.rotation = facing.astype(np.float32).reshape(-1)
+    player.default_ground_slip = slip.astype(np.float32).reshape(-1)
+    player.speed_effect = speed.astype(int).reshape(-1)
+    player.slow_effect = slow.astype(int).reshape(-1)
+    player.simulate(sequence, return_defaults=False, suppress_exception=False)
+    return player.result()
@@ -18,12 +18,19 @@ from PyQt5.QtWidgets import QHBoxLayout, QPushButton, QWidget, QComboBox, QShort
 import os, json
 
 class Worker(QObject):
+    """
+    Runs a cell's code in its own thread. Output is sent in chunks through `progress` (new lines, ticks simulated so far) while running, and the rest through `finished` at the end.
+    If `previous` (the player of the cell's last run, and `previous_output` its output) is given, the run continues from its last checkpoint that is still valid (see `BasePlayer.resume`).
+    """
     finished = pyqtSignal(list, dict, int)
+    progress = pyqtSignal(list, int)
 
-    def __init__(self, input_str, simulation_type):
+    def __init__(self, input_str, simulation_type, previous = None, previous_output: list = None):
         super().__init__()
         self.input_str = input_str
         self.simulation_type = simulation_type
+        self.previous = previous
+        self.previous_output = previous_output
         self.p = None
         self.isrunning = False
 
@@ -32,14 +39,21 @@ class Worker(QObject):
         try:
             if self.simulation_type == CellType.XZ:
                 self.p = mxz.PlayerSimulationXZ()
-                self.p.simulate(self.input_str, suppress_exception=False)
+                if self.previous is not None:
+                    self.p.resume(self.previous, self.input_str, self.previous_output)
+                self.p.stream_output(self.progress.emit)
+                self.p.simulate(self.input_str, suppress_exception=False, checkpoint=True)
                 self.finished.emit(self.p.output, self.p.macros, 1)
             elif self.simulation_type == CellType.Y:
                 self.p = my.PlayerSimulationY()
-                a = self.p.simulate(self.input_str, suppress_exception= False)
+                if self.previous is not None:
+                    self.p.resume(self.previous, self.input_str, self.previous_output)
+                self.p.stream_output(self.progress.emit)
+                a = self.p.simulate(self.input_str, suppress_exception= False, checkpoint=True)
                 self.finished.emit(self.p.output, {}, 1)
         except Exception as e:
-            self.finished.emit([(ExpressionType.GENERAL_LABEL, (f"Error occurred: {str(e)}",))], {}, 0)
+            output = self.p.output if self.p else [] # Output that hasn't been streamed yet
+            self.finished.emit(output + [(ExpressionType.GENERAL_LABEL, (f"Error occurred: {str(e)}",))], {}, 0)
         self.isrunning = False
 
     def cancel(self):
@@ -57,6 +71,7 @@ class SimulationSection(Cell):
         self.mc_macros_folders: dict = generalOptions.get("Macro Folders", {"default":FileHandler.getMacros()})
         self.macros = {}
         self.worker = None
+        self.last_player = None
         self.t = None
         self.p = parent # The main Mothball instance 
 
@@ -234,10 +249,14 @@ class SimulationSection(Cell):
         text = self.input_field.text()
 
         self.t = QThread()
-        self.worker = Worker(text, self.mode)
+        self.worker = Worker(text, self.mode, self.last_player, self.raw_output)
         self.worker.moveToThread(self.t)
 
+        self.raw_output = []
+        self.output_field.clear()
+
         self.t.started.connect(self.worker.run)
+        self.worker.progress.connect(self.onSimulationProgress)
         self.worker.finished.connect(self.onSimulationCompletion)
         self.worker.finished.connect(self.t.quit)
         self.worker.finished.connect(self.worker.deleteLater)
@@ -258,10 +277,18 @@ class SimulationSection(Cell):
         self.run_shortcut.activated.connect(self.run_simulation)
         
 
+    def onSimulationProgress(self, output, ticks: int):
+        "Shows output sent by the worker while the simulation is still running"
+        self.output_field.appendTextfromOutput(self.linter, output)
+        self.raw_output.extend(output)
+        self.output_label.setText(f"Output: ({ticks} ticks)")
+
     def onSimulationCompletion(self, output, macros, result: int):
         "result = 1 means success, result = 0 means failure"
-        self.output_field.renderTextfromOutput(self.linter, output)
-        self.raw_output = output
+        self.output_label.setText("Output:")
+        self.last_player = self.worker.p # Its checkpoints let the next run skip the unchanged start of the code
+        self.raw_output.extend(output)
+        self.output_field.renderTextfromOutput(self.linter, self.raw_output)
         
         if self.mode == CellType.XZ:
             if macros:
@@ -1,27 +1,29 @@
 import re
-
+import functools
+import operator
+
+_TOKEN_SPECIFICATION = [
+    ('NUMBER', r'\d+(\.\d+)?[eE]-\d+|\d+(\.\d+)?[eE]\d+|\d+\.\d+|\d+\.|\.\d+|\d+'),  # Integer or decimal number
+    ('PLUS', r'\+'),              # Addition (+)
+    ('MINUS', r'-'),              # Subtraction (-)
+    ('POW', r'\*\*'),             # Exponent (**)
+    ('TIMES', r'\*'),             # Multiplication (*)
+    ('DIVIDE', r'/'),             # Division (/)
+    ('LPAREN', r'\('),            # Left Parenthesis
+    ('RPAREN', r'\)'),            # Right Parenthesis
+    ('ID', r'[A-Za-z_][A-Za-z_0-9]*'),  # Variable name (w/ underscores) (for substitutions)
+    ('WHITESPACE', r'\s+'),             # Whitespace
+    ('MISMATCH', r'.'),           # Anything else (will raise an error)
+]
+_TOKEN_REGEX = re.compile('|'.join(f'(?P<{pair[0]}>{pair[1]})' for pair in _TOKEN_SPECIFICATION))
+_BINARY_OPERATORS = {'+': operator.add, '-': operator.sub, '*': operator.mul, '/': operator.truediv, '**': operator.pow}
 
 def _tokenize(expression):
-    token_specification = [
-        ('NUMBER', r'\d+(\.\d+)?[eE]-\d+|\d+(\.\d+)?[eE]\d+|\d+\.\d+|\d+\.|\.\d+|\d+'),  # Integer or decimal number
-        ('PLUS', r'\+'),              # Addition (+)
-        ('MINUS', r'-'),              # Subtraction (-)
-        ('POW', r'\*\*'),             # Exponent (**)
-        ('TIMES', r'\*'),             # Multiplication (*)
-        ('DIVIDE', r'/'),             # Division (/)
-        ('LPAREN', r'\('),            # Left Parenthesis
-        ('RPAREN', r'\)'),            # Right Parenthesis
-        ('ID', r'[A-Za-z_][A-Za-z_0-9]*'),  # Variable name (w/ underscores) (for substitutions)
-        ('WHITESPACE', r'\s+'),             # Whitespace
-        ('MISMATCH', r'.'),           # Anything else (will raise an error)
-    ]
-
-    tok_regex = '|'.join(f'(?P<{pair[0]}>{pair[1]})' for pair in token_specification)
     r = []
     nest = 0
     not_expecting_number_or_variable = False
     prevkind, prevvalue = None, None
-    for match_object in re.finditer(tok_regex, expression):
+    for match_object in _TOKEN_REGEX.finditer(expression):
         kind = match_object.lastgroup
         value = match_object.group()
         if kind == 'MISMATCH':
@@ -60,77 +62,94 @@ def _tokenize(expression):
     return r
 
 
-def _apply_operator(operands: list, operator: str):
-    if operator == 'UNARY_MINUS':
-        if not operands:
-            raise SyntaxError(f"Invalid expression")
-        a = operands.pop()
-        operands.append(-a)
-        return operands
-    
-    if len(operands) <= 1:
-        raise SyntaxError("Invalid Expression")
-    b = operands.pop()
-    a = operands.pop()
-    if operator == '+':
-        operands.append(a + b)
-    elif operator == '-':
-        operands.append(a - b)
-    elif operator == '*':
-        operands.append(a * b)
-    elif operator == '/':
-        operands.append(a / b)
-    elif operator == '**':
-        operands.append(a ** b)
-    return operands
-
-def _evaluate(tokens, variables):
-    # print(tokens)
+def _compile(tokens):
+    """
+    Converts the tokens to a postfix program with the shunting-yard algorithm. Returns a list of `(kind, value)` instructions,
+    where `kind` is `'NUMBER'`, `'ID'` (look up a variable), `'UNARY_MINUS'` or `'OPERATOR'` (with the operator as the value).
+    """
     precedence = {'+': 1, '-': 1, '*': 2, '/': 2, '**': 3, 'UNARY_MINUS': 4}
-    operands = []
+    program = []
     operators = []
     prevkind = None
-    prevvalue = None
+
+    def apply_operator(operator):
+        if operator == 'UNARY_MINUS':
+            program.append(('UNARY_MINUS', None))
+        else:
+            program.append(('OPERATOR', operator))
+
     for kind, value in tokens:
-        if kind == 'NUMBER':
-            operands.append(value)
-        elif kind == 'ID':
-            if value in variables:
-                operands.append(variables[value])
-            else:
-                raise ValueError(f"Unknown variable: {value}")
+        if kind == 'NUMBER' or kind == 'ID':
+            program.append((kind, value))
             
         elif kind == 'MINUS':
             if (prevkind is None) or (prevkind in ['PLUS', 'MINUS', 'TIMES', 'DIVIDE', 'POW', 'LPAREN']):
                 # unary minus occurs at start or after another operator or after a left parenthesis;
                 while operators and operators[-1] in precedence and precedence[operators[-1]] >= precedence['UNARY_MINUS']:
-                    operands = _apply_operator(operands, operators.pop())
+                    apply_operator(operators.pop())
                 operators.append('UNARY_MINUS')
             else:
                 # Binary minus
                 while operators and operators[-1] in precedence and precedence[operators[-1]] >= precedence['-']:
-                    operands = _apply_operator(operands, operators.pop())
+                    apply_operator(operators.pop())
                 operators.append('-')
         elif kind == 'PLUS' or kind == 'TIMES' or kind == 'DIVIDE' or kind == 'POW':
             while (operators and operators[-1] in precedence and precedence[operators[-1]] >= precedence[value]):
-                operands = _apply_operator(operands, operators.pop())
+                apply_operator(operators.pop())
             operators.append(value)
         elif kind == 'LPAREN':
             operators.append('(')
         elif kind == 'RPAREN':
             while operators[-1] != '(':
-                operands = _apply_operator(operands, operators.pop())
-            # print(operands)
-            # print(operators)
+                apply_operator(operators.pop())
             operators.pop()
         prevkind = kind
-        prevvalue = value
 
     while operators:
-        operands = _apply_operator(operands, operators.pop())
+        apply_operator(operators.pop())
+
+    return program
+
+def _evaluate(program, variables):
+    "Runs a program from `_compile()`, looking up variables in `variables`"
+    operands = []
+    for kind, value in program:
+        if kind == 'NUMBER':
+            operands.append(value)
+        elif kind == 'ID':
+            if value in variables:
+                operands.append(variables[value])
+            else:
+                raise ValueError(f"Unknown variable: {value}")
+        elif kind == 'UNARY_MINUS':
+            if not operands:
+                raise SyntaxError(f"Invalid expression")
+            operands.append(-operands.pop())
+        else:
+            if len(operands) <= 1:
+                raise SyntaxError("Invalid Expression")
+            b = operands.pop()
+            operands.append(_BINARY_OPERATORS[value](operands.pop(), b))
 
     return operands[0]
 
+@functools.lru_cache(maxsize=4096)
+def compile_expression(expression: str) -> tuple:
+    """
+    Tokenizes and compiles `expression` once, the result is cached by the expression text. Raises `SyntaxError` if the expression can't be tokenized.
+
+    Returns `(True, value)` for an expression without variables whose value is already known, and `(False, program)` otherwise.
+    """
+    program = _compile(_tokenize(expression))
+    if len(program) == 1 and program[0][0] == 'NUMBER': # A plain number
+        return True, _to_result(program[0][1])
+    return False, tuple(program)
+
+def _to_result(result):
+    if isinstance(result, float) and result.is_integer():
+        return int(result)
+    return result
+
 def evaluate(expression, variables: dict=None):
     if not expression:
         return 0
@@ -140,17 +159,18 @@ def evaluate(expression, variables: dict=None):
     elif not isinstance(expression, str):
         raise ValueError(f"Invalid expression of type {type(expression)}: {expression}")
 
+    if expression.isdecimal(): # Fast path for the most common case, a whole number
+        return _to_result(float(expression))
+
+    is_constant, program = compile_expression(expression)
+    if is_constant:
+        return program
 
     if variables is None:
         variables = {}
 
-    # print(expression)
-    tokens = _tokenize(expression)
     try:
-        result=  _evaluate(tokens, variables)
-        if isinstance(result, float) and result.is_integer():
-            return int(result)
-        return result
+        return _to_result(_evaluate(program, variables))
     except Exception as e:
         raise SyntaxError(f"{e} in expression '{expression}'")
 
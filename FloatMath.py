@@ -0,0 +1,121 @@
+"""
+Contains `fround`, the float32 constants and the sine table used by the movement simulations. \\
+Minecraft does most of its movement math in single precision. Instead of doing every operation with `numpy.float32` scalars (which are slow to construct and operate on), the simulations keep every value as a Python float and call `fround` exactly where the game (and the original numpy code) rounds to float32.
+
+The rules for emulating numpy's float32 scalars with Python floats:
+- `f32 (+ - * /) f32` is computed in double and rounded with `fround`, which gives the correctly rounded float32 result
+- `f32 (+ - * /) float` (or an int) is done in double, without rounding
+- `f32(x)` is `fround(x)`
+"""
+
+import struct
+import functools
+from array import array
+from math import sin, frexp, ldexp, copysign, floor
+import numpy as np
+from numpy import float32 as f32
+
+_single = struct.Struct("f")
+_pack = _single.pack
+_unpack = _single.unpack
+
+PI = 3.14159265358979323846
+
+def fround(value: float) -> float:
+    "Rounds `value` to the nearest float32 and returns it as a Python float. Same as `float(numpy.float32(value))`, but several times faster."
+    try:
+        return _unpack(_pack(value))[0]
+    except OverflowError: # struct refuses to round finite doubles to infinity, numpy doesn't
+        return float(f32(value))
+
+def fround_array(values) -> np.ndarray:
+    "Vectorized `fround`: rounds every element of `values` to float32 and returns them as a float64 array."
+    return np.asarray(values, dtype=np.float64).astype(np.float32).astype(np.float64)
+
+def repeated_add(x: float, v: float, n: int) -> float:
+    """
+    Returns the result of doing `x += v` `n` times in double precision, rounding after every addition, without doing `n` additions.
+
+    While `x` stays inside one binade (a range [2^e, 2^(e+1)) where doubles are evenly spaced), adding `v` always rounds to adding the same multiple of the spacing, so many additions can be done at once exactly.
+    Additions near the edges of a binade, and ties, are done one at a time. The cost is proportional to the number of binades crossed.
+    """
+    x = float(x)
+    v = float(v)
+    while n > 0:
+        y = x + v
+        if y == x and copysign(1.0, y) == copysign(1.0, x): # fixed point (v is 0 or too small to change x)
+            return x
+        if x == 0.0 or abs(v) >= abs(x) or not (y == y):
+            x = y
+            n -= 1
+            continue
+
+        _, exponent = frexp(x)
+        spacing = ldexp(1.0, exponent - 53)
+        low = ldexp(1.0, exponent - 1)
+        high = ldexp(1.0, exponent)
+        step = y - x # exact, x and y are within a factor of 2 of each other
+        if abs(v - step) * 2 == spacing: # a tie, which rounds differently depending on x
+            x = y
+            n -= 1
+            continue
+
+        # Stay away from the edges of the binade, where the spacing of the sum can change
+        margin = 2 * abs(v) + 2 * spacing
+        magnitude = abs(x)
+        direction = copysign(1.0, x) * step
+        if direction > 0:
+            count = floor((high - margin - magnitude) / direction)
+        else:
+            count = floor((magnitude - low - margin) / -direction)
+
+        if count >= 1:
+            count = min(count, n)
+            x += count * step # exact, every value in between is a multiple of the spacing in the same binade
+            n -= count
+        else:
+            x = y
+            n -= 1
+    return x
+
+def is_single(value) -> bool:
+    "Returns `True` if `value` is a `numpy.float32`, meaning that operations with another float32 round to float32."
+    return type(value) is f32
+
+# Float32 constants, as Python floats
+F_0_0001 = fround(0.0001)
+F_0_02 = fround(0.02)
+F_0_1 = fround(0.1)
+F_0_2 = fround(0.2)
+F_NEG_0_15 = fround(-0.15)
+F_0_3 = fround(0.3)
+F_0_30000010133 = fround(0.30000010133)
+F_0_16277136 = fround(0.16277136)
+F_0_21600002 = fround(0.21600002)
+F_0_91 = fround(0.91)
+F_0_98 = fround(0.98)
+F_1 = 1.0
+F_PI = fround(PI)
+F_180 = 180.0
+F_DEG_TO_RAD = fround(0.017453292)
+F_RAD_TO_INDEX = fround(10430.378)
+F_QUARTER_TURN_INDEX = 16384.0
+
+@functools.lru_cache(maxsize=None)
+def sine_table(total_angles: int = 65536) -> array:
+    """
+    Returns Minecraft's sine lookup table for `total_angles` angles: entry `i` is `sin(i * 2pi / total_angles)` rounded to float32. Indexing it gives Python floats.
+
+    Each table is built once and shared by every player. `mcsin` and `mccos` only differ in how they compute the index into it.
+    """
+    return array("f", [sin(i * PI * 2.0 / total_angles) for i in range(total_angles)])
+
+@functools.lru_cache(maxsize=None)
+def sine_table_array(total_angles: int = 65536) -> np.ndarray:
+    "The same table as `sine_table`, as a read only float32 NumPy array (sharing its memory), for vectorized code to index into."
+    table = np.frombuffer(sine_table(total_angles), dtype=np.float32)
+    table.flags.writeable = False
+    return table
+
+SIN_TABLE = sine_table(65536)
+SIN_TABLE_ARRAY = sine_table_array(65536)
@@ -0,0 +1,38 @@
+"""
+Contains `lex_texts`, the lexer for Mothball code. \\
+It is shared by the simulations (see `BasePlayer.parse`) and the code linter (see `CodeLinter.parseText`). Both only need the text of the tokens, `position` gives the line and column of an index when reporting an error.
+"""
+
+import re
+import functools
+
+SEPARATORS = '(){}[]\\ .",/|-=+*#\n\t\r'
+"Characters the linter highlights on their own"
+
+STRUCTURE = '()[]\\",|#'
+"The only characters that change how Mothball code is split into function calls"
+
+WHITESPACE = ' \n\t\r'
+
+@functools.lru_cache(maxsize=None)
+def lexer_regex(separators: str, group_whitespace: bool):
+    "Regex matching a backslash and the character it escapes, a run of whitespace (if `group_whitespace`), a run of non-separator characters, or a single separator"
+    if group_whitespace:
+        separators += WHITESPACE
+    escaped = re.escape(separators)
+    whitespace = f"[{re.escape(WHITESPACE)}]+|" if group_whitespace else ""
+    return re.compile(rf"\\[\s\S]?|{whitespace}[^{escaped}]+|[\s\S]")
+
+def lex_texts(text: str, separators: str = SEPARATORS, group_whitespace: bool = False) -> list[str]:
+    """
+    Splits `text` into tokens in a single pass and returns their text. Running `''.join(lex_texts(text))` returns the original string.
+
+    Each character in `separators` is its own token, a backslash is kept together with the character it escapes, and everything else is grouped into words.
+    If `group_whitespace` is set, consecutive spaces, tabs and newlines are grouped into one token.
+    """
+    return lexer_regex(separators, group_whitespace).findall(text)
+
+def position(text: str, index: int) -> tuple[int, int]:
+    "Returns the (line, column) of `text[index]`, both starting at 1"
+    line_start = text.rfind("\n", 0, index) + 1
+    return text.count("\n", 0, index) + 1, index - line_start + 1
@@ -9,6 +9,8 @@ import MothballSimulationY as my
 from utils import *
 import string
 from Enums import *
+from Lexer import lex_texts
+from BaseMothballSimulation import OutputRecord, format_output_line
 
 # PLEASE FIX OUTPUT RENDERING CRASH
 
@@ -333,45 +335,20 @@ class CodeLinter:
             return [] # maybe will allow custom funcs to have kwargs
         elif self.mode == CellType.XZ:
             f = mxz.PlayerSimulationXZ.FUNCTIONS[name]
-            sigs = [x for x,y in inspect.signature(f).parameters.items() if y.kind == inspect.Parameter.POSITIONAL_OR_KEYWORD or y.kind == inspect.Parameter.KEYWORD_ONLY]
-            return sigs
+            return list(mxz.PlayerSimulationXZ.SIGNATURES[f].keyword_names)
         elif self.mode == CellType.Y:
             f = my.PlayerSimulationY.FUNCTIONS[name]
-            sigs = [x for x,y in inspect.signature(f).parameters.items() if y.kind == inspect.Parameter.POSITIONAL_OR_KEYWORD or y.kind == inspect.Parameter.KEYWORD_ONLY]
-            return sigs
+            return list(my.PlayerSimulationY.SIGNATURES[f].keyword_names)
 
     def parseText(self):
         """
         Parse `self.text`, returns a list of parsed tokens `result`. Running `''.join(result)` returns the original string.
         """
-        results = []
-        item = ""
-        follows_backslash = False
-        for char in self.text:
-            if follows_backslash:
-                follows_backslash = False
-                item += char
-                results.append(item)
-                item = ""
-            elif not follows_backslash:
-                if char in '(){}[]\\ .",/|-=+*#\n\t':
-                    if item:
-                        results.append(item)
-                    item = ""
-                    if char != "\\":
-                        results.append(char)
-                    elif char == "\\":
-                        follows_backslash = True
-                        item = char
-                    continue
-                item += char
-        if item:
-            results.append(item)
-        return results
+        return lex_texts(self.text)
 
-    def parseOutput(self, outputLines: list[tuple[str]], displayOutputBackground: bool = True):
+    def parseOutput(self, outputLines: list[OutputRecord | tuple[int, tuple[str]]], displayOutputBackground: bool = True):
         """
-        Parse the output
+        Parse the output. The numbers in each line are formatted here (see `format_output_line`), lines that are already text are also accepted.
         """
         MAP = {ExpressionType.X_LABEL: Style.OUTPUT_XLABEL,
          ExpressionType.X_LABEL_WITH_EXPRESSION: Style.OUTPUT_XLABEL,
@@ -392,7 +369,7 @@ class CodeLinter:
         # print(outputLines)
 
         for i, line in enumerate(outputLines):
-            expr_type, tokens = line
+            expr_type, tokens = format_output_line(line)
             
             match expr_type:
                 case ExpressionType.X_LABEL | ExpressionType.Z_LABEL | ExpressionType.GENERAL_LABEL_WITH_NUMBER: # outx: 1.23 --> [outx, : , 1.23]
@@ -465,15 +442,13 @@ class CodeLinter:
         func_name = func.__name__
         aliases = mxz.PlayerSimulationXZ.ALIASES.get(func_name)
 
-        params = inspect.signature(func).parameters.values()
+        params = mxz.PlayerSimulationXZ.SIGNATURES[func].parameters
         positional: list[inspect.Parameter] = []
         positional_or_keyword: list[inspect.Parameter] = []
         keyword: list[inspect.Parameter] = []
         var_position: list[inspect.Parameter] = []
 
         for i in params:
-            if i.name == "self":
-                continue
             if i.kind == inspect.Parameter.POSITIONAL_ONLY:
                 positional.append(i)
             if i.kind == inspect.Parameter.POSITIONAL_OR_KEYWORD:
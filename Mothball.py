@@ -9,6 +9,7 @@ Contains:
 
 import CrashHandler
 import sys,os
+import multiprocessing
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QPushButton, QHBoxLayout, QScrollArea, QMenu, QMainWindow, QFileDialog, QMessageBox, QShortcut
 )
@@ -547,6 +548,7 @@ class MainWindow(QMainWindow):
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support() # sweep() starts worker processes, which need this in the bundled executable
     app = QApplication(sys.argv)
     window = MainWindow()
     
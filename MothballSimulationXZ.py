@@ -1,34 +1,114 @@
 from math import sin, cos, atan2 as arctan, sqrt, copysign, degrees as deg, asin
 from numpy import float32 as f32, uint64 as u64, int32 as i32
 from typing import Literal
-from BaseMothballSimulation import BasePlayer, MothballSequence
+from BaseMothballSimulation import BasePlayer, MothballSequence, RepeatState
 from Enums import ExpressionType
+from FloatMath import fround, is_single, F_0_0001, F_0_02, F_0_1, F_0_2, F_NEG_0_15, F_0_3, F_0_30000010133, F_0_16277136, F_0_21600002, F_0_91, F_0_98, F_1, F_PI, F_180, F_DEG_TO_RAD, F_RAD_TO_INDEX, F_QUARTER_TURN_INDEX, SIN_TABLE, sine_table, repeated_add
 from collections import deque
-
-class Tick:
-    def __init__(self, w: bool, a: bool, s: bool, d: bool, sneak: bool, sprint: bool, space: bool, right_click: bool, last_turn: float, x: float = None, z: float = None, vx: float = None, vz: float = None):
-        self.w = w
-        self.a = a
-        self.s = s
-        self.d = d
-        self.sneak = sneak
-        self.sprint = sprint
-        self.space = space
-        self.right_click = right_click
-        self.last_turn = last_turn
-        self.x = x
-        self.z = z
-        self.vx = vx
-        self.vz = vz
-    
-    def __repr__(self):
-        keys = f"Keys: ({'w' if self.w else ''}{'a' if self.a else ''}{'s' if self.s else ''}{'d' if self.d else ''})"
-        mvt = f"Mvt: ({self.x}, {self.z}, {self.vx}, {self.vz})"
-        return f"Tick({keys} {mvt})"
+import functools
+from TickHistory import Tick, TickHistory, input_keys, KEY_W, KEY_A, KEY_S, KEY_D, KEY_SNEAK, KEY_SPRINT, KEY_JUMP, KEY_RIGHT_CLICK
+import numpy as np
+
+class Sensitivity:
+    """
+    The derivatives of a player's position (`dx`, `dz`) and velocity (`dvx`, `dvz`) with respect to its velocity when the tracking started, updated every tick by `PlayerSimulationXZ` while it is its `sensitivity`. \\
+    Each axis only depends on its own starting velocity. While nothing clamps the velocity, the position is an affine function of the starting velocity with a slope of `dx` (or `dz`).
+
+    `kx` and `kz` are the derivatives of the position with respect to the position when the tracking started, 1 until the position is set.
+    Ticks where inertia, webs or ladders stop the velocity from depending on its starting value are listed in `breaks` as `(tick, axis, reason)`, counting ticks from 1.
+    """
+    __slots__ = ("dx", "dz", "dvx", "dvz", "kx", "kz", "ticks", "breaks")
+
+    def __init__(self):
+        self.dx = 0.0
+        self.dz = 0.0
+        self.dvx = 1.0
+        self.dvz = 1.0
+        self.kx = 1.0
+        self.kz = 1.0
+        self.ticks = 0
+        self.breaks: list[tuple[int, str, str]] = []
+
+    def move(self):
+        "Start of a tick, the position moves by the velocity"
+        self.ticks += 1
+        self.dx += self.dvx
+        self.dz += self.dvz
+
+    def drag(self, factor: float, vx: float, vz: float, inertia_threshold: float, inertia_axis: int, in_web: bool):
+        "The velocity is scaled by `factor` to become (`vx`, `vz`), then inertia or the web of the previous tick may set it to 0"
+        self.dvx *= factor
+        self.dvz *= factor
+        reason = "web" if in_web else "inertia"
+        if inertia_axis == 1:
+            if abs(vx) < inertia_threshold or in_web:
+                self.stop("x", reason)
+            if abs(vz) < inertia_threshold or in_web:
+                self.stop("z", reason)
+        elif inertia_axis == 2:
+            if sqrt(vz*vz + vx*vx) < inertia_threshold or in_web:
+                self.stop("x", reason)
+                self.stop("z", reason)
+
+    def modifiers(self, vx: float, vz: float, web: bool, ladder: bool):
+        "End of a tick with a velocity of (`vx`, `vz`), before webs slow it down and ladders clamp it"
+        if web:
+            self.dvx /= 4
+            self.dvz /= 4
+            vx = vx / 4
+            vz = vz / 4
+        if ladder:
+            if abs(vx) > 0.15:
+                self.stop("x", "ladder")
+            if abs(vz) > 0.15:
+                self.stop("z", "ladder")
+
+    def stop(self, axis: Literal["x", "z"], reason: str):
+        "The velocity on `axis` was set to a value that doesn't depend on its starting value"
+        if axis == "x":
+            if self.dvx:
+                self.breaks.append((self.ticks, "x", reason))
+            self.dvx = 0.0
+        else:
+            if self.dvz:
+                self.breaks.append((self.ticks, "z", reason))
+            self.dvz = 0.0
+
+    def chain(self, inner: "Sensitivity"):
+        "Continues with the changes tracked by `inner`, which started tracking where this one is now"
+        for tick, axis, reason in inner.breaks:
+            if (self.dvx if axis == "x" else self.dvz):
+                self.breaks.append((self.ticks + tick, axis, reason))
+        self.dx = inner.kx * self.dx + self.dvx * inner.dx
+        self.dz = inner.kz * self.dz + self.dvz * inner.dz
+        self.kx *= inner.kx
+        self.kz *= inner.kz
+        self.dvx *= inner.dvx
+        self.dvz *= inner.dvz
+        self.ticks += inner.ticks
+
+    def snapshot(self) -> "Sensitivity":
+        "Returns a copy, which `restore` brings back"
+        copy = Sensitivity()
+        copy.restore(self)
+        return copy
+
+    def restore(self, other: "Sensitivity"):
+        "Sets every derivative and break to the ones of `other`"
+        for name in Sensitivity.__slots__:
+            setattr(self, name, getattr(other, name))
+        self.breaks = list(other.breaks)
+
+    def first_break(self, axis: Literal["x", "z"]) -> tuple[int, str, str] | None:
+        "Returns the first break on `axis`, if any"
+        return next((found for found in self.breaks if found[1] == axis), None)
 
 class PlayerSimulationXZ(BasePlayer):
     pi = 3.14159265358979323846
 
+    STATE_ATTRIBUTES = BasePlayer.STATE_ATTRIBUTES + ("x", "z", "vx", "vz", "default_ground_slip", "current_slip", "previous_slip", "total_angles", "rotation", "last_rotation", "last_turn",
+                                                      "angle_queue", "turn_queue", "air_sprint_delay", "sneak_delay", "inertia_axis", "inputs", "version_computation", "state", "speed_effect", "slow_effect")
+
     # These are 45-strafe movement, and cannot have an input appended (WASD)
     _fortyfive_methods = ("walk45", "walkair45", "walkjump45", "sprint45", "sprintair45", "sprintjump45", "sneak45", "sneakair45", "sneakjump45", "sneaksprint45", "sneaksprintair45", "sneaksprintjump45", "walkpessi45", "sprintpessi45", "forcemomentum45")
 
@@ -42,6 +122,10 @@ class PlayerSimulationXZ(BasePlayer):
     mm_to_dist = dist_to_block = lambda mm: (mm + copysign(f32(0.6), mm))
     dist_to_mm = block_to_dist = lambda dist: (dist - copysign(f32(0.6), dist))
 
+    # `solve_speed` tries this many speeds at once, and widens its search around the first guess at most this many times
+    SOLVER_BATCH = 32
+    SOLVER_ROUNDS = 6
+
     old_sprintjump_boost = f32(0.2)
     new_sprintjump_boost = 0.2
 
@@ -74,7 +158,7 @@ class PlayerSimulationXZ(BasePlayer):
     ], "returners": [
         "outz", "zmm", "zb", "outvz", "outx", "xmm", "xb", "outvx", "vec", "help", "print", "effectsmultiplier", "effects", "dimensions", "dim", "outangle", "outa", "outfacing", "outf", "outturn", "outt", "macro", "angleinfo", "ai"
     ], "calculators": [
-        "bwmm", "xbwmm", "wall", "xwall", "inv", "xinv", "blocks", "xblocks", "repeat", "r", "possibilities", "poss", "xpossibilities", "xposs", "xzpossibilities", "xzposs", 'taps'
+        "bwmm", "xbwmm", "wall", "xwall", "inv", "xinv", "blocks", "xblocks", "repeat", "r", "possibilities", "poss", "xpossibilities", "xposs", "xzpossibilities", "xzposs", 'taps', "sweep", "search"
     ], "setters": [
         "face", "facing", "f", "turn", "setposz", "z", "setvz", "vz", "setposx", "x", "setvx", "vx", "setslip", "slip", "setprecision", "precision", "pre", "inertia", "sprintairdelay", "sdel", "version", "v", "anglequeue", "aq", "tq", "turnqueue", "speed", "slow", "slowness", "sndel", "sneakdelay", "var", "function", "func", "alias", "toggle", "singleaxisinertia","inertialistener", "il", "xinertialistener", "xil", "zinertialistener", "zil", "xzinertialistener", "xzil", "addposx", "addposz", "addz", "addx", "addvx", "addvz"
     ]}
@@ -113,8 +197,9 @@ class PlayerSimulationXZ(BasePlayer):
         self.speed_effect = 0
         self.slow_effect = 0
 
-        self.history: list[Tick] = []
+        self.history = TickHistory()
         self.macros: dict[str, str] = {}
+        self.sensitivity: Sensitivity | None = None
 
     def get_angle(self):
         "Returns the next angle from the rotation queue or if no angle is in the rotation queue, return the default facing."
@@ -126,6 +211,7 @@ class PlayerSimulationXZ(BasePlayer):
         return self.rotation
 
     def move(self, duration: int, rotation: f32 = None, rotation_offset: float = 0.0, slip: f32 = None, is_sprinting: bool = False, is_sneaking: bool = False, speed: int = None, slow: int = None, state: Literal["ground", "air", "jump"] = "ground"):
+        self.ticks_simulated += max(duration, 0)
         if self.version_computation == self.OLD_COMPUTATION:
             self.move_old(duration, rotation, rotation_offset, slip, is_sprinting, is_sneaking, speed, slow, state)
         elif self.version_computation == self.NEW_COMPUTATION:
@@ -173,93 +259,129 @@ class PlayerSimulationXZ(BasePlayer):
         if not slip: # If slip is not given, assume its ground slip since air slip (0.1) is always passed into the argument
             slip = self.default_ground_slip
         
-        for _ in range(duration):
+        single_angles = self.total_angles != -1
+        inertia_threshold = float(self.inertia_threshold)
+
+        # Recording possibilities, inertia or sensitivity needs every tick to be simulated
+        sensitivity = self.sensitivity
+        can_fast_forward = not self.record and not self.record_inertia and sensitivity is None
+        last_tick_state = None
+        keys = input_keys(self.inputs, is_sneaking, is_sprinting, right_click=bool(self.modifiers & self.BLOCK))
+
+        for tick in range(duration):
             if not override_rotation:
                 rotation = f32(self.get_angle() + rotation_offset)
-                
+            yaw = float(rotation)
+            vx = float(self.vx)
+            vz = float(self.vz)
+
             # MOVING THE PLAYER
-            self.x += self.vx
-            self.z += self.vz
+            self.x += vx
+            self.z += vz
+            if sensitivity is not None:
+                sensitivity.move()
 
             if self.modifiers & self.SOULSAND: # Like 13 df accurate minimum
-                self.vx *= 0.4
-                self.vz *= 0.4
+                vx *= 0.4
+                vz *= 0.4
 
             forward, strafe = self.movement_values()
 
             if self.reverse:
-                forward *= f32(-1)
-                strafe *= f32(-1)
+                forward = -forward
+                strafe = -strafe
                 sj_boost *= -1
 
             # Finalize Momentum
-            self.vx *= f32(0.91) * self.previous_slip
-            self.vz *= f32(0.91) * self.previous_slip
+            if is_single(self.previous_slip):
+                drag = fround(F_0_91 * float(self.previous_slip))
+            else:
+                drag = F_0_91 * self.previous_slip
+            vx *= drag
+            vz *= drag
+            if sensitivity is not None:
+                sensitivity.drag(float(drag) * 0.4 if self.modifiers & self.SOULSAND else float(drag), vx, vz, inertia_threshold, self.inertia_axis, self.previously_in_web)
 
             # Apply inertia or web
             if self.inertia_axis == 1:
-                if abs(self.vx) < self.inertia_threshold or self.previously_in_web:
-                    self.vx = 0.0
-                if abs(self.vz) < self.inertia_threshold or self.previously_in_web:
-                    self.vz = 0.0
+                if abs(vx) < inertia_threshold or self.previously_in_web:
+                    vx = 0.0
+                if abs(vz) < inertia_threshold or self.previously_in_web:
+                    vz = 0.0
             elif self.inertia_axis == 2:
-                if sqrt(self.vz**2 + self.vx**2) < self.inertia_threshold or self.previously_in_web:
-                    self.vx = 0.0
-                    self.vz = 0.0
+                if sqrt(vz*vz + vx*vx) < inertia_threshold or self.previously_in_web:
+                    vx = 0.0
+                    vz = 0.0
 
             # Get Movement Multiplier M
-            M = self.movement_multiplier_old(slip, is_sprinting, speed, slow, self.state)
+            M, single_M = self.movement_multiplier_old(slip, is_sprinting, speed, slow, self.state)
 
             # Sprint jump boost
             if self.state == self.JUMP and is_sprinting:
-                facing = f32(rotation * f32(0.017453292)) # TO CHANGE
-                self.vx -= self.mcsin(facing) * sj_boost
-                self.vz += self.mccos(facing) * sj_boost
+                sin_facing, cos_facing = self.get_sin_cos(fround(yaw * F_DEG_TO_RAD)) # TO CHANGE
+                if single_angles and is_single(sj_boost):
+                    vx -= fround(sin_facing * float(sj_boost))
+                    vz += fround(cos_facing * float(sj_boost))
+                else:
+                    vx -= sin_facing * float(sj_boost)
+                    vz += cos_facing * float(sj_boost)
 
             # BLOCKING
             if self.modifiers & self.BLOCK:
-                forward = f32(float(forward) * 0.2)
-                strafe  = f32(float(strafe) * 0.2)
+                forward = fround(forward * 0.2)
+                strafe  = fround(strafe * 0.2)
 
             # SNEAKING
             if (self.sneak_delay and self.previously_sneaking) or (not self.sneak_delay and is_sneaking):
-                forward = f32(float(forward) * 0.3)
-                strafe = f32(float(strafe) * 0.3)
+                forward = fround(forward * 0.3)
+                strafe = fround(strafe * 0.3)
 
-            forward *= f32(0.98)
-            strafe *= f32(0.98)
+            forward = fround(forward * F_0_98)
+            strafe = fround(strafe * F_0_98)
 
-            distance = f32(strafe * strafe + forward * forward)
-            # print(forward, strafe)
-            # print(distance)
+            distance = fround(fround(strafe * strafe) + fround(forward * forward))
             # Avoid division by 0
-            if distance >= f32(0.0001):
+            if distance >= F_0_0001:
 
                 # Normalize distance IF above 1
-                distance = f32(sqrt(float(distance)))
-                # print(distance)
-                if distance < f32(1.0):
-                    distance = f32(1.0)
+                distance = fround(sqrt(distance))
+                if distance < F_1:
+                    distance = F_1
 
                 # Modifies strafe and forward to account for movement
-                distance = M / distance
-                forward = forward * distance
-                strafe = strafe * distance
+                if single_M:
+                    distance = fround(M / distance)
+                    forward = fround(forward * distance)
+                    strafe = fround(strafe * distance)
+                else:
+                    distance = M / distance
+                    forward = forward * distance
+                    strafe = strafe * distance
 
                 # Adds rotated vectors to velocity
-                sin_yaw = f32(self.mcsin(rotation * f32(PlayerSimulationXZ.pi) / f32(180.0)))
-                cos_yaw = f32(self.mccos(rotation * f32(PlayerSimulationXZ.pi) / f32(180.0)))
-
-                self.vx += float(strafe * cos_yaw - forward * sin_yaw)
-                self.vz += float(forward * cos_yaw + strafe * sin_yaw)
+                sin_yaw, cos_yaw = self.get_sin_cos(fround(fround(yaw * F_PI) / F_180))
+                if not single_angles:
+                    sin_yaw = fround(sin_yaw)
+                    cos_yaw = fround(cos_yaw)
+
+                if single_M:
+                    vx += fround(fround(strafe * cos_yaw) - fround(forward * sin_yaw))
+                    vz += fround(fround(forward * cos_yaw) + fround(strafe * sin_yaw))
+                else:
+                    vx += strafe * cos_yaw - forward * sin_yaw
+                    vz += forward * cos_yaw + strafe * sin_yaw
 
+            if sensitivity is not None:
+                sensitivity.modifiers(vx, vz, self.modifiers & self.WEB, self.modifiers & self.LADDER)
             if self.modifiers & self.WEB:
-                self.vx = self.vx / 4
-                self.vz = self.vz / 4
+                vx = vx / 4
+                vz = vz / 4
             if self.modifiers & self.LADDER:
-                self.vx = min(max(self.vx, -0.15),0.15)
-                self.vz = min(max(self.vz, -0.15),0.15)
-            
+                vx = min(max(vx, -0.15),0.15)
+                vz = min(max(vz, -0.15),0.15)
+
+            self.vx = vx
+            self.vz = vz
             
             # Prep for next tick
             self.previous_slip = slip
@@ -274,7 +396,15 @@ class PlayerSimulationXZ(BasePlayer):
 
             self.inertialistener_helper()
 
-            self.history.append(Tick('w' in self.inputs, 'a' in self.inputs, 's' in self.inputs, 'd' in self.inputs, is_sneaking, is_sprinting, self.state == self.JUMP, bool(self.modifiers & self.BLOCK), self.last_turn, self.x, self.z, self.vx, self.vz))
+            self.history.append(keys | KEY_JUMP if self.state == self.JUMP else keys, self.last_turn, self.x, self.z, self.vx, self.vz)
+
+            # Once a tick ends in the same state as the previous one, every remaining tick is the same
+            if can_fast_forward and tick < duration - 1 and not self.angle_queue and not self.turn_queue:
+                tick_state = self.get_tick_state(sj_boost)
+                if tick_state == last_tick_state:
+                    self.fast_forward(duration - 1 - tick)
+                    break
+                last_tick_state = tick_state
     
     def move_new(self, duration: int, rotation: f32 = None, rotation_offset: float = 0.0, slip: f32 = None, is_sprinting: bool = False, is_sneaking: bool = False, speed: int = None, slow: int = None, state: Literal["ground", "air", "jump"] = "ground"):
         """
@@ -318,77 +448,95 @@ class PlayerSimulationXZ(BasePlayer):
         if not slip: # If slip is not given, assume its ground slip since air slip (0.1) is always passed into the argument
             slip = self.default_ground_slip
         
-        for _ in range(duration):
+        single_angles = self.total_angles != -1
+        inertia_threshold = float(self.inertia_threshold)
+
+        # Recording possibilities, inertia or sensitivity needs every tick to be simulated
+        sensitivity = self.sensitivity
+        can_fast_forward = not self.record and not self.record_inertia and sensitivity is None
+        last_tick_state = None
+        keys = input_keys(self.inputs, is_sneaking, is_sprinting, right_click=bool(self.modifiers & self.BLOCK))
+
+        for tick in range(duration):
             if not override_rotation:
                 rotation = f32(self.get_angle() + rotation_offset)
-                
+            yaw = float(rotation)
+            vx = float(self.vx)
+            vz = float(self.vz)
+
             # MOVING THE PLAYER
-            self.x += self.vx
-            self.z += self.vz
+            self.x += vx
+            self.z += vz
+            if sensitivity is not None:
+                sensitivity.move()
 
             if self.modifiers & self.SOULSAND: # Like 13 df accurate minimum (old computation)
-                self.vx *= 0.4
-                self.vz *= 0.4
+                vx *= 0.4
+                vz *= 0.4
 
             forward, strafe = self.movement_values()
 
             if self.reverse:
-                forward *= f32(-1)
-                strafe *= f32(-1)
+                forward = -forward
+                strafe = -strafe
                 sj_boost *= -1
 
             # Finalize Momentum
-            self.vx *= f32(0.91) * self.previous_slip
-            self.vz *= f32(0.91) * self.previous_slip
+            if is_single(self.previous_slip):
+                drag = fround(F_0_91 * float(self.previous_slip))
+            else:
+                drag = F_0_91 * self.previous_slip
+            vx *= drag
+            vz *= drag
+            if sensitivity is not None:
+                sensitivity.drag(float(drag) * 0.4 if self.modifiers & self.SOULSAND else float(drag), vx, vz, inertia_threshold, self.inertia_axis, self.previously_in_web)
 
             # Apply inertia or web
             if self.inertia_axis == 1:
-                if abs(self.vx) < self.inertia_threshold or self.previously_in_web:
-                    self.vx = 0.0
-                if abs(self.vz) < self.inertia_threshold or self.previously_in_web:
-                    self.vz = 0.0
+                if abs(vx) < inertia_threshold or self.previously_in_web:
+                    vx = 0.0
+                if abs(vz) < inertia_threshold or self.previously_in_web:
+                    vz = 0.0
             elif self.inertia_axis == 2:
-                if sqrt(self.vz*self.vz + self.vx*self.vx) < self.inertia_threshold or self.previously_in_web:
-                    self.vx = 0.0
-                    self.vz = 0.0
+                if sqrt(vz*vz + vx*vx) < inertia_threshold or self.previously_in_web:
+                    vx = 0.0
+                    vz = 0.0
 
             # Get Movement Multiplier M
-            M = self.movement_multiplier_new(slip, is_sprinting, speed, slow, self.state)
-
+            M, single_M = self.movement_multiplier_new(slip, is_sprinting, speed, slow, self.state)
 
             # Sprint jump boost
             if self.state == self.JUMP and is_sprinting:
-                facing = f32(rotation * f32(0.017453292)) # TO CHANGE
-                self.vx -= self.mcsin(facing) * sj_boost
-                self.vz += self.mccos(facing) * sj_boost
+                sin_facing, cos_facing = self.get_sin_cos(fround(yaw * F_DEG_TO_RAD)) # TO CHANGE
+                if single_angles and is_single(sj_boost):
+                    vx -= fround(sin_facing * float(sj_boost))
+                    vz += fround(cos_facing * float(sj_boost))
+                else:
+                    vx -= sin_facing * float(sj_boost)
+                    vz += cos_facing * float(sj_boost)
 
             # BLOCKING
             if self.modifiers & self.BLOCK:
-                forward = f32(float(forward) * 0.2)
-                strafe  = f32(float(strafe) * 0.2)
+                forward = fround(forward * 0.2)
+                strafe  = fround(strafe * 0.2)
 
             # SNEAKING
             if (self.sneak_delay and self.previously_sneaking) or (not self.sneak_delay and is_sneaking):
-                forward = f32(float(forward) * 0.3)
-                strafe = f32(float(strafe) * 0.3)
+                forward = fround(forward * 0.3)
+                strafe = fround(strafe * 0.3)
 
-            forward *= f32(0.98)
-            strafe *= f32(0.98)
+            forward = fround(forward * F_0_98)
+            strafe = fround(strafe * F_0_98)
 
-            # idk yet if this is the right place to put it relative to the other movement. It most definitel 
-            forward = float(forward)
-            strafe = float(strafe)
-
-            distance = float(strafe * strafe + forward * forward)
+            distance = strafe * strafe + forward * forward
             if distance >= 1e-7:
 
                 # Normalize distance IF above 1
-                distance = f32(sqrt(distance))
-                # print(distance)
+                distance = fround(sqrt(distance))
                 if distance < 1.0:
                     distance = 1.0
                 else:
-                    distance = float(distance+0.0000001125593117) # genuinely no idea what im doing here
+                    distance = distance+0.0000001125593117 # genuinely no idea what im doing here
 
                 # Modifies strafe and forward to account for movement
                 distance = M / distance
@@ -396,20 +544,26 @@ class PlayerSimulationXZ(BasePlayer):
                 strafe = strafe * distance
 
                 # Adds rotated vectors to velocity
-                sin_yaw = f32(self.mcsin(rotation * f32(0.017453292)))
-                cos_yaw = f32(self.mccos(rotation * f32(0.017453292)))
+                sin_yaw, cos_yaw = self.get_sin_cos(fround(yaw * F_DEG_TO_RAD))
+                if not single_angles:
+                    sin_yaw = fround(sin_yaw)
+                    cos_yaw = fround(cos_yaw)
 
-                self.vx += strafe * float(cos_yaw) - forward * float(sin_yaw)
-                self.vz += forward * float(cos_yaw) + strafe * float(sin_yaw)
+                vx += strafe * cos_yaw - forward * sin_yaw
+                vz += forward * cos_yaw + strafe * sin_yaw
 
+            if sensitivity is not None:
+                sensitivity.modifiers(vx, vz, self.modifiers & self.WEB, self.modifiers & self.LADDER)
             # Not verified to be 1.14+ accurate yet
             if self.modifiers & self.WEB:
-                self.vx = self.vx / 4
-                self.vz = self.vz / 4
+                vx = vx / 4
+                vz = vz / 4
             if self.modifiers & self.LADDER:
-                self.vx = min(max(self.vx, -0.15),0.15)
-                self.vz = min(max(self.vz, -0.15),0.15)
-            
+                vx = min(max(vx, -0.15),0.15)
+                vz = min(max(vz, -0.15),0.15)
+
+            self.vx = vx
+            self.vz = vz
             
             # Prep for next tick
             self.previous_slip = slip
@@ -424,7 +578,69 @@ class PlayerSimulationXZ(BasePlayer):
 
             self.inertialistener_helper()
 
-            self.history.append(Tick('w' in self.inputs, 'a' in self.inputs, 's' in self.inputs, 'd' in self.inputs, is_sneaking, is_sprinting, self.state == self.JUMP, bool(self.modifiers & self.BLOCK), self.last_turn, self.x, self.z, self.vx, self.vz))
+            self.history.append(keys | KEY_JUMP if self.state == self.JUMP else keys, self.last_turn, self.x, self.z, self.vx, self.vz)
+
+            # Once a tick ends in the same state as the previous one, every remaining tick is the same
+            if can_fast_forward and tick < duration - 1 and not self.angle_queue and not self.turn_queue:
+                tick_state = self.get_tick_state(sj_boost)
+                if tick_state == last_tick_state:
+                    self.fast_forward(duration - 1 - tick)
+                    break
+                last_tick_state = tick_state
+
+    def get_tick_state(self, sj_boost) -> tuple:
+        "Returns everything that the velocity of the next tick of a movement call depends on (besides the arguments of the call). Signed zeros are told apart."
+        return (self.vx, copysign(1.0, self.vx), self.vz, copysign(1.0, self.vz), float(self.last_rotation), float(self.last_turn), self.previous_slip, self.previously_sprinting, self.previously_sneaking, self.previously_in_web, float(sj_boost))
+
+    def fast_forward(self, ticks: int):
+        """
+        Moves the player `ticks` more ticks when the velocity has converged (the state after a tick repeats), so each tick only adds the same velocity to the position.
+
+        The final position is computed with `repeated_add` (exact, without adding tick by tick) and the positions in `history` with `numpy.add.accumulate`, which adds sequentially just like the simulation does.
+        """
+        history = self.history
+        xs = np.add.accumulate(np.concatenate(([self.x], np.full(ticks, self.vx))))[1:]
+        zs = np.add.accumulate(np.concatenate(([self.z], np.full(ticks, self.vz))))[1:]
+        history.extend(history.keys[-1], history.last_turn[-1], xs, zs, self.vx, self.vz)
+        self.x = repeated_add(self.x, self.vx, ticks)
+        self.z = repeated_add(self.z, self.vz, ticks)
+
+    def repeat_state(self) -> RepeatState | None:
+        "Returns the state of the player between two iterations of `repeat`, or `None` while recording possibilities, inertia or sensitivity, which need every tick to be simulated"
+        if self.record or self.record_inertia or self.sensitivity is not None or not isinstance(self.history, TickHistory):
+            return None
+        state = tuple(value for name, value in zip(self.STATE_ATTRIBUTES, self.snapshot().values) if name != "x" and name != "z")
+        return RepeatState(state + (copysign(1.0, self.vx), copysign(1.0, self.vz)), (self.x, self.z), len(self.history), self.streamed_lines + len(self.output))
+
+    def skip_repeats(self, start: RepeatState, end: RepeatState, iterations: int) -> bool:
+        """
+        Does `iterations` more iterations of a `repeat` at once, after an iteration ended in the state it started in. Every iteration then adds the same velocities to the position, one per tick.
+
+        That only holds if the iteration printed nothing and only moved the player in between, which is checked by redoing the additions of the last iteration.
+        Positions are added with `numpy.add.accumulate`, which adds sequentially just like the simulation does, so the results are exact.
+        """
+        ticks = end.ticks - start.ticks
+        if ticks <= 0 or end.output_lines != start.output_lines:
+            return False
+
+        history = self.history
+        # The velocity at the start of each tick is the one the previous tick ended with
+        vxs = np.concatenate(([self.vx], history.vx[-ticks:-1]))
+        vzs = np.concatenate(([self.vz], history.vz[-ticks:-1]))
+        x, z = start.position
+        xs = np.add.accumulate(np.concatenate(([x], vxs)))[1:]
+        zs = np.add.accumulate(np.concatenate(([z], vzs)))[1:]
+        if not (np.array_equal(xs, history.x[-ticks:]) and np.array_equal(zs, history.z[-ticks:]) and xs[-1] == self.x and zs[-1] == self.z):
+            return False
+
+        xs = np.add.accumulate(np.concatenate(([self.x], np.tile(vxs, iterations))))[1:]
+        zs = np.add.accumulate(np.concatenate(([self.z], np.tile(vzs, iterations))))[1:]
+        history.extend(np.tile(history.keys[-ticks:], iterations), np.tile(history.last_turn[-ticks:], iterations), xs, zs,
+                       np.tile(history.vx[-ticks:], iterations), np.tile(history.vz[-ticks:], iterations))
+        self.x = float(xs[-1])
+        self.z = float(zs[-1])
+        self.ticks_simulated += ticks * iterations
+        return True
 
     def get_inertia_speed(self):
         "Get the speed of hitting inertia, depending on whether the player is midair, on ground, and with what slipperiness."
@@ -518,91 +734,103 @@ class PlayerSimulationXZ(BasePlayer):
 
     def movement_multiplier_old(self, slip, is_sprinting, speed, slow, state):
         """
-        Calculates and returns the movement multiplier `M`.
+        Calculates and returns the movement multiplier `M`, and whether `M` is a float32 (it is a double if `slip` isn't a float32).
 
         See https://www.mcpk.wiki/wiki/Horizontal_Movement_Formulas for the formula used to calculate `M`
 
         Notets on fluids: The equation for water is the same as air with S = 0.8/0.91 and M being either 1 or 0 multiplied by 0.98 or 1, similarly for lava, set S = 0.5/0.91
         """
+        single = True
         if self.modifiers & self.WATER or self.modifiers & self.LAVA: # It doesnt matter if you are in web
-            M = f32(0.02)
+            M = F_0_02
         
         elif state == self.AIR:
-            M = f32(0.02) # In water, walk and sprint are the same, potion effects do not affect water or air, shiftng is different
+            M = F_0_02 # In water, walk and sprint are the same, potion effects do not affect water or air, shiftng is different
 
             if (self.air_sprint_delay and self.previously_sprinting) or (not self.air_sprint_delay and is_sprinting):
-                M = f32(M + M * 0.3)
+                M = fround(M + M * 0.3)
 
         else: # either on jump or on ground
-            M = f32(0.1)
+            M = F_0_1
 
             # Deal with potion effects 
             if speed > 0:
-                M = f32(M * (1.0 + f32(0.2) * float(speed)))
+                M = fround(M * (1.0 + F_0_2 * float(speed)))
             if slow > 0:
-                M = f32(M * max(1.0 + f32(-0.15) * float(slow), 0))
+                M = fround(M * max(1.0 + F_NEG_0_15 * float(slow), 0))
 
             if is_sprinting:
-                M = f32(M * (1.0 + f32(0.3)))
+                M = fround(M * (1.0 + F_0_3))
 
-            drag = f32(0.91) * slip
-            M *= f32(0.16277136) / (drag * drag * drag)
+            if is_single(slip):
+                drag = fround(F_0_91 * float(slip))
+                M = fround(M * fround(F_0_16277136 / fround(fround(drag * drag) * drag)))
+            else:
+                drag = F_0_91 * slip
+                M *= F_0_16277136 / (drag * drag * drag)
+                single = False
         
-        return M
+        return M, single
     
     def movement_multiplier_new(self, slip, is_sprinting, speed, slow, state):
         """
-        Calculates and returns the movement multiplier `M`.
+        Calculates and returns the movement multiplier `M`, and whether `M` is a float32 (it is a double if `slip` isn't a float32).
 
         See https://www.mcpk.wiki/wiki/Horizontal_Movement_Formulas for the formula used to calculate `M`
 
         Notets on fluids: The equation for water is the same as air with S = 0.8/0.91 and M being either 1 or 0 multiplied by 0.98 or 1, similarly for lava, set S = 0.5/0.91
         """
+        single = True
         if self.modifiers & self.WATER or self.modifiers & self.LAVA: # It doesnt matter if you are in web
-            M = f32(0.02)
+            M = F_0_02
         
         elif state == self.AIR:
-            M = f32(0.02) # In water, walk and sprint are the same, potion effects do not affect water or air, shiftng is different
+            M = F_0_02 # In water, walk and sprint are the same, potion effects do not affect water or air, shiftng is different
 
             if (self.air_sprint_delay and self.previously_sprinting) or (not self.air_sprint_delay and is_sprinting):
-                M = f32(M + M * 0.3)
+                M = fround(M + M * 0.3)
 
         else: # either on jump or on ground
-            M = f32(0.1)
+            M = F_0_1
 
             # Deal with potion effects 
             if speed > 0:
-                M = f32(M * (1.0 + f32(0.2) * float(speed)))
+                M = fround(M * (1.0 + F_0_2 * float(speed)))
             if slow > 0:
-                M = f32(M * max(1.0 + f32(-0.15) * float(slow), 0))
+                M = fround(M * max(1.0 + F_NEG_0_15 * float(slow), 0))
 
             if is_sprinting:
-                M = f32(M * (1.0 + f32(0.30000010133)))
+                M = fround(M * (1.0 + F_0_30000010133))
 
-            M = M * (f32(0.21600002) / (slip * slip * slip))
+            if is_single(slip):
+                slip = float(slip)
+                M = fround(M * fround(F_0_21600002 / fround(fround(slip * slip) * slip)))
+            else:
+                M = M * (F_0_21600002 / (slip * slip * slip))
+                single = False
         
-        return M
+        return M, single
 
     def movement_values(self):
         """
-        Returns two values `forward` and `strafe` either valued at `-1`, `0`, or `1`, based on `self.inputs`.
+        Returns two values `forward` and `strafe` either valued at `-1.0`, `0.0`, or `1.0`, based on `self.inputs`.
 
-        if "w" is in the inputs, `forward = 1`. If "a" is in inputs, `strafe = 1`, etc.
+        if "w" is in the inputs, `forward = 1.0`. If "a" is in inputs, `strafe = 1.0`, etc.
         """
 
         if "w" in self.inputs:
-            forward = f32(1.0)
+            forward = 1.0
         elif "s" in self.inputs:
-            forward = f32(-1.0)
+            forward = -1.0
         else:
-            forward = f32(0.0)
+            forward = 0.0
 
         if "a" in self.inputs:
-            strafe = f32(1.0)
+            strafe = 1.0
         elif "d" in self.inputs:
-            strafe = f32(-1.0)
+            strafe = -1.0
         else:
-            strafe = f32(0.0)
+            strafe = 0.0
 
         return forward, strafe
 
@@ -809,29 +1037,32 @@ class PlayerSimulationXZ(BasePlayer):
 
     # PRIVATE FUNCTION
     def get_optimal_strafe_jump_angle(self, speed: int = None, slow: int = None, slip: f32 = None, is_sneaking: bool = False):
-        # TODO/NOTE: i can probably optimize this for speed but like its low priority and likely not significant for 99.99999% cases 
-        player = PlayerSimulationXZ.copy_player(self)
-        player.x = 0.0
-        player.z = 0.0
-        player.vx = 0.0
-        player.vz = 0.0
-        player.angle_queue = []
-        player.rotation = 0.0
-        if speed is not None:
-            player.speed_effect = speed
-        if slow is not None:
-            player.slow_effect = slow
-        if slip is not None:
-            player.default_ground_slip = slip
-        
-        if is_sneaking:
-            player.simulate("snsj.wa")
-        else:
-            player.simulate("sj.wa")
-        
-
+        "Returns the angle of a `sj.wa` (or `snsj.wa` if `is_sneaking`) from rest, which is the offset that `sprintstrafejump` turns by. Looked up in `strafe_jump_angle`."
+        if speed is None:
+            speed = self.speed_effect
+        if slow is None:
+            slow = self.slow_effect
+        if slip is None:
+            slip = self.default_ground_slip
+        return PlayerSimulationXZ.strafe_jump_angle(speed, slow, float(slip), is_single(slip), bool(is_sneaking), self.sneak_delay, self.air_sprint_delay, self.previously_sprinting, self.version_computation, self.total_angles)
 
-        # print(abs(deg(arctan(-player.vx, player.vz))))
+    @staticmethod
+    @functools.lru_cache(maxsize=BasePlayer.CACHE_SIZE)
+    def strafe_jump_angle(speed: int, slow: int, slip: float, single_slip: bool, is_sneaking: bool, sneak_delay: bool, air_sprint_delay: bool, previously_sprinting: bool, version_computation: int, total_angles: int) -> float:
+        """
+        Simulates the jump of `get_optimal_strafe_jump_angle` on a new player, memoized for the whole process since the arguments are everything the result depends on.
+        `slip` is a float32 if `single_slip` is set.
+        """
+        player = PlayerSimulationXZ()
+        player.speed_effect = speed
+        player.slow_effect = slow
+        player.default_ground_slip = f32(slip) if single_slip else slip
+        player.sneak_delay = sneak_delay
+        player.air_sprint_delay = air_sprint_delay
+        player.previously_sprinting = previously_sprinting
+        player.version_computation = version_computation
+        player.total_angles = total_angles
+        player.simulate("snsj.wa" if is_sneaking else "sj.wa", return_defaults=False)
         return abs(deg(arctan(-player.vx, player.vz)))
 
     # RETURNERS:
@@ -887,8 +1118,8 @@ class PlayerSimulationXZ(BasePlayer):
         angle_rad = angle * f32(self.pi) / f32(180)
         sin_index = u64(i32(angle_rad * f32(10430.378)) & 65535)
         cos_index = u64(i32(angle_rad * f32(10430.378) + f32(16384.0)) & 65535)
-        sin_value = sin(sin_index * self.pi * 2.0 / 65536)
-        cos_value = sin(cos_index * self.pi * 2.0 / 65536)
+        sin_value = SIN_TABLE[sin_index]
+        cos_value = SIN_TABLE[cos_index]
         cos_index_adj = (int(cos_index) - 16384) % 65536
         sin_angle = deg(asin(sin_value))
         cos_angle = deg(asin(cos_value))
@@ -917,15 +1148,23 @@ class PlayerSimulationXZ(BasePlayer):
 
     def setposz(self, value: float, /):
         self.z = value
+        if self.sensitivity is not None:
+            self.sensitivity.dz = self.sensitivity.kz = 0.0
     
     def setvz(self, value: float, /):
         self.vz = value
+        if self.sensitivity is not None:
+            self.sensitivity.dvz = 0.0
 
     def setposx(self, value: float, /):
         self.x = value
+        if self.sensitivity is not None:
+            self.sensitivity.dx = self.sensitivity.kx = 0.0
     
     def setvx(self, value: float, /):
         self.vx = value
+        if self.sensitivity is not None:
+            self.sensitivity.dvx = 0.0
     
     def addposz(self, value: float, /):
         self.z += value
@@ -1181,23 +1420,8 @@ class PlayerSimulationXZ(BasePlayer):
     
     @staticmethod
     def copy_player(player: "PlayerSimulationXZ"):
-        "Copies the player"
-        p = PlayerSimulationXZ()
-        p.angle_queue = player.angle_queue
-        p.turn_queue = player.turn_queue
-        p.rotation = player.rotation
-        p.state = player.state
-        p.default_ground_slip = player.default_ground_slip
-        p.previous_slip = player.previous_slip
-        p.air_sprint_delay = player.air_sprint_delay
-        p.sneak_delay = player.sneak_delay
-        p.previously_sprinting = player.previously_sprinting
-        p.speed_effect = player.speed_effect
-        p.slow_effect = player.slow_effect
-        p.local_vars = player.local_vars
-        p.call_stack = player.call_stack
-
-        return p
+        "Copies the player (see `snapshot`). The copy shares nothing with `player`, so running it doesn't change `player`."
+        return PlayerSimulationXZ.from_state(player.snapshot())
 
     @BasePlayer.record_to_call_stack
     def taps(self, *seq_or_num: MothballSequence):
@@ -1237,25 +1461,37 @@ class PlayerSimulationXZ(BasePlayer):
         # self.call_stack.pop()
 
     
-    def optimize(self, x: float, z: float, sequence: str, conversion = lambda x: x, /) -> tuple[float, float] | float:
-        p1 = PlayerSimulationXZ.copy_player(self)
-        p1.inertia_threshold = 0.0
-        p1.simulate(sequence)
+    def track_sensitivity(self, sequence: str, return_defaults: bool = True) -> Sensitivity:
+        """
+        Simulates `sequence` while tracking how the position depends on the velocity at its start, and returns what was tracked (see `Sensitivity`).
+
+        If the player was already tracking, its tracking continues through `sequence`.
+        """
+        outer = self.sensitivity
+        self.sensitivity = tracked = Sensitivity()
+        try:
+            self.simulate(sequence, return_defaults=return_defaults)
+        finally:
+            if outer is not None:
+                outer.chain(tracked)
+            self.sensitivity = outer
+        return tracked
 
-        p2 = PlayerSimulationXZ.copy_player(self)
-        p2.inertia_threshold = 0.0
-        p2.vz = 1.0
-        p2.vx = 1.0
-        p2.simulate(sequence)
+    def optimize(self, x: float, z: float, sequence: str, conversion = lambda x: x, /) -> tuple[float, float] | float:
+        # One run of `sequence` from the origin and from rest. Without inertia, the position is an affine function of the starting speed, and its slope is tracked along the way.
+        p = PlayerSimulationXZ.from_state(self.snapshot())
+        p.x = p.z = p.vx = p.vz = 0.0
+        p.inertia_threshold = 0.0
+        tracked = p.track_sensitivity(sequence)
 
         if x:
-            if p1.x == p2.x:
+            if tracked.dx == 0:
                 raise ZeroDivisionError(f"Float division by 0, perhaps you reset your position at the end of a sequence or nested same axis optimize functions?")
-            vx = (p1.x - conversion(x)) / (p1.x - p2.x)
+            vx = (conversion(x) - p.x) / tracked.dx
         if z:
-            if p1.z == p2.z:
+            if tracked.dz == 0:
                 raise ZeroDivisionError(f"Float division by 0, perhaps you reset your position at the end of a sequence or nested same axis optimize functions?")
-            vz = (p1.z - conversion(z)) / (p1.z - p2.z)
+            vz = (conversion(z) - p.z) / tracked.dz
         
         if x and z:
             return vx, vz
@@ -1263,77 +1499,156 @@ class PlayerSimulationXZ(BasePlayer):
             return vx
         elif z:
             return vz
-    
-    @BasePlayer.record_to_call_stack
-    def bwmm(self, zmm: float, sequence: MothballSequence, /):
-        "Attempts to find the speed such that executing `sequence` results in using `zmm` blocks of momentum on the Z axis. A warning is raised if the simulation using the calculated speed doesn't match `zmm`, meaning that inertia was encountered while simulating."
-        vz = self.optimize(None, zmm, sequence, PlayerSimulationXZ.mm_to_dist)
 
+    def solve_speed(self, axis: Literal["x", "z"], target: float, sequence: str, guess: float = 0.0) -> float | None:
+        """
+        Returns the starting speed on `axis` such that running `sequence` from a position of 0 on that axis ends at `target` (a distance), with inertia, webs and ladders.
+        Unlike `optimize`, it doesn't assume that the final position is an affine function of the speed, so it still works after the velocity was clamped.
 
-        self.simulate(f" z(0) vz({vz}) outvz(label=\"Vz Needed\") {sequence} zmm(label=\"Zmm Used\") ", return_defaults=False)
+        Speeds around `guess` are tried until some end before `target` and some after it, then that bracket is narrowed down until it only holds 2 neighbouring floats.
+        Each step tries `SOLVER_BATCH` speeds, in one `BatchPlayerSimulationXZ` when the sequence runs the same way in a batch. Returns the speed that ends closest to `target`, or `None` if no bracket is found.
+        """
+        from BatchSimulationXZ import BatchPlayerSimulationXZ # It imports this module
+        state = self.snapshot()
+        batched = None # Unknown until the first batch is checked
+
+        def run(speed: float) -> float:
+            p = PlayerSimulationXZ.from_state(state)
+            setattr(p, axis, 0.0)
+            setattr(p, "v" + axis, float(speed))
+            p.simulate(sequence, return_defaults=False)
+            return getattr(p, axis)
+
+        def errors(speeds: np.ndarray) -> np.ndarray:
+            nonlocal batched
+            if self.stop_flag:
+                raise InterruptedError("Stopped execution")
+            if batched is not False:
+                try:
+                    batch = BatchPlayerSimulationXZ.from_player(self, speeds.size)
+                    setattr(batch, axis, np.zeros(speeds.size))
+                    setattr(batch, "v" + axis, speeds.copy())
+                    batch.simulate(sequence, return_defaults=False, suppress_exception=False)
+                    positions = np.broadcast_to(np.asarray(getattr(batch, axis), dtype=np.float64), speeds.shape)
+                except Exception:
+                    batched = False
+                else:
+                    # Returners and nested functions may not run the same way in a batch, so the first batch is checked against a single player
+                    if batched is None:
+                        batched = bool(positions[0] == run(speeds[0]))
+                    if batched:
+                        return positions - target
+            return np.array([run(speed) for speed in speeds]) - target
+
+        def sign_change(speeds: np.ndarray, found: np.ndarray) -> int | None:
+            "Index of the speed before the sign change of `found` closest to the middle"
+            changes = np.flatnonzero(np.sign(found[:-1]) * np.sign(found[1:]) < 0)
+            if changes.size == 0:
+                return None
+            return int(changes[np.argmin(np.abs(changes - speeds.size // 2))])
+
+        width = max(abs(guess), 0.1)
+        for _ in range(self.SOLVER_ROUNDS):
+            speeds = guess + width * np.linspace(-1.0, 1.0, self.SOLVER_BATCH)
+            found = errors(speeds)
+            if np.any(found == 0):
+                return float(speeds[np.flatnonzero(found == 0)[0]])
+            index = sign_change(speeds, found)
+            if index is not None:
+                break
+            width *= 4
+        else:
+            return None
+
+        low, high = float(speeds[index]), float(speeds[index + 1])
+        low_error, high_error = float(found[index]), float(found[index + 1])
+        while True:
+            speeds = np.unique(np.linspace(low, high, self.SOLVER_BATCH + 2)[1:-1])
+            speeds = speeds[(speeds > low) & (speeds < high)]
+            if speeds.size == 0: # `low` and `high` are neighbouring floats
+                break
+            found = errors(speeds)
+            if np.any(found == 0):
+                return float(speeds[np.flatnonzero(found == 0)[0]])
+            speeds = np.concatenate(([low], speeds, [high]))
+            found = np.concatenate(([low_error], found, [high_error]))
+            index = int(np.flatnonzero(np.sign(found[:-1]) * np.sign(found[1:]) < 0)[0])
+            low, high = float(speeds[index]), float(speeds[index + 1])
+            low_error, high_error = float(found[index]), float(found[index + 1])
+
+        return low if abs(low_error) <= abs(high_error) else high
+
+    def optimized_run(self, axis: Literal["x", "z"], target: float, sequence: str, returner: str, to_dist = lambda x: x, from_dist = lambda x: x, /, *, return_defaults: bool = True):
+        """
+        Runs `sequence` from a position of 0 and the speed on `axis` that makes it end at `target` (converted to a distance by `to_dist`), then runs `returner`. Shared by `bwmm`, `wall`, `blocks` and their X versions.
 
-        if abs(PlayerSimulationXZ.dist_to_mm(self.z) - zmm) > 1e-5:
-            self.add_to_output(ExpressionType.WARNING, string_or_num="encountered inertia on Z while optimizing!")
+        The speed is found by `optimize`. If the velocity gets clamped (see `Sensitivity`) and `target` is missed, the run is undone and done again with the speed found by `solve_speed`.
+        Output isn't passed to the output sink during the run, so it can be undone.
+        """
+        name = axis.upper()
+        speed = self.optimize(target, None, sequence, to_dist) if axis == "x" else self.optimize(None, target, sequence, to_dist)
+
+        def run(speed: float) -> Sensitivity:
+            self.simulate(f" {axis}(0) v{axis}({speed}) outv{axis}(label=\"V{axis} Needed\") ", return_defaults=False)
+            return self.track_sensitivity(f" {sequence} {returner} ", return_defaults=return_defaults)
+
+        def missed() -> bool:
+            return abs(from_dist(getattr(self, axis)) - target) > 1e-5
+
+        sink, self.output_sink = self.output_sink, None
+        try:
+            checkpoint = self.make_checkpoint("")
+            outer = None if self.sensitivity is None else self.sensitivity.snapshot()
+            tracked = run(speed)
+            clamped = tracked.first_break(axis) if missed() else None
+            solved = None
+            if clamped is not None:
+                self.rewind(checkpoint)
+                if outer is not None:
+                    self.sensitivity.restore(outer)
+                solved = self.solve_speed(axis, to_dist(target), sequence, speed)
+                tracked = run(speed if solved is None else solved)
+        finally:
+            self.output_sink = sink
+
+        if missed():
+            found = tracked.first_break(axis) or clamped
+            if found is None:
+                self.add_to_output(ExpressionType.WARNING, string_or_num=f"encountered inertia on {name} while optimizing!")
+            else:
+                message = f"target is unreachable on {name}, encountered {found[2]} at tick {found[0]}!"
+                self.add_to_output(ExpressionType.WARNING, string_or_num=message if solved is None else message + " Showing the closest speed.")
+        self.flush_output()
+    
+    @BasePlayer.record_to_call_stack
+    def bwmm(self, zmm: float, sequence: MothballSequence, /):
+        "Attempts to find the speed such that executing `sequence` results in using `zmm` blocks of momentum on the Z axis. If inertia is encountered, the exact speed is searched for instead, and a warning is raised if no speed matches `zmm`."
+        self.optimized_run("z", zmm, sequence, "zmm(label=\"Zmm Used\")", PlayerSimulationXZ.mm_to_dist, PlayerSimulationXZ.dist_to_mm, return_defaults=False)
 
     @BasePlayer.record_to_call_stack
     def wall(self, z: float, sequence: MothballSequence, /):
-        "Attempts to find the speed such that executing `sequence` results in a displacement of `z` on the Z axis. A warning is raised if the simulation using the calculated speed doesn't match `z`, meaning that inertia was encountered while simulating."
-        vz = self.optimize(None, z, sequence)
-
-
-        self.simulate(f" z(0) vz({vz}) outvz(label=\"Vz Needed\") {sequence} outz(label=\"Z dist\")")
-        
-
-        if abs(self.z - z) > 1e-5:
-            self.add_to_output(ExpressionType.WARNING, string_or_num="encountered inertia on Z while optimizing!")
+        "Attempts to find the speed such that executing `sequence` results in a displacement of `z` on the Z axis. If inertia is encountered, the exact speed is searched for instead, and a warning is raised if no speed matches `z`."
+        self.optimized_run("z", z, sequence, "outz(label=\"Z dist\")")
     
     @BasePlayer.record_to_call_stack
     def blocks(self, zb: float, sequence: MothballSequence, /):
-        "Attempts to find the speed such that executing `sequence` results in traversing `zb` blocks on the Z axis. A warning is raised if the simulation using the calculated speed doesn't match `zb`, meaning that inertia was encountered while simulating."
-        vz = self.optimize(None, zb, sequence, PlayerSimulationXZ.block_to_dist)
-
-
-        self.simulate(f" z(0) vz({vz}) outvz(label=\"Vz Needed\") {sequence} zb(label=\"Z blocks\")")
-        
-
-        if abs(PlayerSimulationXZ.dist_to_block(self.z) - zb) > 1e-5:
-            self.add_to_output(ExpressionType.WARNING, string_or_num="encountered inertia on Z while optimizing!")
+        "Attempts to find the speed such that executing `sequence` results in traversing `zb` blocks on the Z axis. If inertia is encountered, the exact speed is searched for instead, and a warning is raised if no speed matches `zb`."
+        self.optimized_run("z", zb, sequence, "zb(label=\"Z blocks\")", PlayerSimulationXZ.block_to_dist, PlayerSimulationXZ.dist_to_block)
     
     @BasePlayer.record_to_call_stack
     def xbwmm(self, xmm: float, sequence: MothballSequence, /):
-        "Attempts to find the speed such that executing `sequence` results in using `xmm` blocks of momentum on the X axis. A warning is raised if the simulation using the calculated speed doesn't match `xmm`, meaning that inertia was encountered while simulating."
-        vx = self.optimize(xmm, None, sequence, PlayerSimulationXZ.mm_to_dist)
-
-
-        self.simulate(f" x(0) vx({vx}) outvx(label=\"Vx Needed\") {sequence} xmm(label=\"Xmm Used\") ", return_defaults=False)
-
-
-        if abs(PlayerSimulationXZ.dist_to_mm(self.x) - xmm) > 1e-5:
-            self.add_to_output(ExpressionType.WARNING, string_or_num="encountered inertia on X while optimizing!")
+        "Attempts to find the speed such that executing `sequence` results in using `xmm` blocks of momentum on the X axis. If inertia is encountered, the exact speed is searched for instead, and a warning is raised if no speed matches `xmm`."
+        self.optimized_run("x", xmm, sequence, "xmm(label=\"Xmm Used\")", PlayerSimulationXZ.mm_to_dist, PlayerSimulationXZ.dist_to_mm, return_defaults=False)
 
     @BasePlayer.record_to_call_stack
     def xwall(self, x: float, sequence: MothballSequence, /):
-        "Attempts to find the speed such that executing `sequence` results in a displacement of `x` on the X axis. A warning is raised if the simulation using the calculated speed doesn't match `x`, meaning that inertia was encountered while simulating."
-        vx = self.optimize(x, None, sequence)
-
-
-        self.simulate(f" x(0) vx({vx}) outvx(label=\"Vx Needed\") {sequence} outx(label=\"X dist\")")
-        
-
-        if abs(self.x - x) > 1e-5:
-            self.add_to_output(ExpressionType.WARNING, string_or_num="encountered inertia on X while optimizing!")
+        "Attempts to find the speed such that executing `sequence` results in a displacement of `x` on the X axis. If inertia is encountered, the exact speed is searched for instead, and a warning is raised if no speed matches `x`."
+        self.optimized_run("x", x, sequence, "outx(label=\"X dist\")")
 
     @BasePlayer.record_to_call_stack
     def xblocks(self, xb: float, sequence: MothballSequence, /):
-        "Attempts to find the speed such that executing `sequence` results in traversing `xb` blocks on the X axis. A warning is raised if the simulation using the calculated speed doesn't match `xb`, meaning that inertia was encountered while simulating."
-        vx = self.optimize(xb, None, sequence, PlayerSimulationXZ.block_to_dist)
-
-
-        self.simulate(f" x(0) vx({vx}) outvx(label=\"Vx Needed\") {sequence} xb(label=\"X blocks\")")
-        
-
-        if abs(PlayerSimulationXZ.dist_to_block(self.x) - xb) > 1e-5:
-            self.add_to_output(ExpressionType.WARNING, string_or_num="encountered inertia on X while optimizing!")
+        "Attempts to find the speed such that executing `sequence` results in traversing `xb` blocks on the X axis. If inertia is encountered, the exact speed is searched for instead, and a warning is raised if no speed matches `xb`."
+        self.optimized_run("x", xb, sequence, "xb(label=\"X blocks\")", PlayerSimulationXZ.block_to_dist, PlayerSimulationXZ.dist_to_block)
 
     def mcsin(self, rad):
         if self.total_angles == -1:
@@ -1342,7 +1657,7 @@ class PlayerSimulationXZ(BasePlayer):
             index = int(rad * f32(10430.378)) & 65535
         else:
             index = int(1 / (2 * PlayerSimulationXZ.pi) * self.total_angles * rad) & (self.total_angles - 1)
-        return f32(sin(index * self.pi * 2.0 / self.total_angles))
+        return f32(sine_table(self.total_angles)[index])
 
     def mccos(self, rad):
         if self.total_angles == -1:
@@ -1351,26 +1666,35 @@ class PlayerSimulationXZ(BasePlayer):
             index = int(rad * f32(10430.378) + f32(16384.0)) & 65535
         else:
             index = int(1 / (2 * PlayerSimulationXZ.pi) * self.total_angles * rad + self.total_angles / 4) & (self.total_angles - 1)
-        return f32(sin(index * self.pi * 2.0 / self.total_angles))
+        return f32(sine_table(self.total_angles)[index])
+    
+    def get_sin_cos(self, rad: float) -> tuple[float, float]:
+        "Same as `mcsin(rad), mccos(rad)`, but `rad` is a Python float holding a float32 and the results are Python floats. Used by the movement functions."
+        if self.total_angles == -1:
+            return sin(rad), cos(rad)
+        elif self.total_angles == 65536:
+            scaled = fround(rad * F_RAD_TO_INDEX)
+            return SIN_TABLE[int(scaled) & 65535], SIN_TABLE[int(fround(scaled + F_QUARTER_TURN_INDEX)) & 65535]
+        else:
+            table = sine_table(self.total_angles)
+            sin_index = int(1 / (2 * PlayerSimulationXZ.pi) * self.total_angles * rad) & (self.total_angles - 1)
+            cos_index = int(1 / (2 * PlayerSimulationXZ.pi) * self.total_angles * rad + self.total_angles / 4) & (self.total_angles - 1)
+            return table[sin_index], table[cos_index]
     
     def macro(self, name: str, formatting: str = 'mpk', /):
         formatting = formatting.lower().strip()
+        history = self.history.columns()
+        booleans = [['true' if pressed else 'false' for pressed in ((history.keys & key) != 0).tolist()] for key in (KEY_W, KEY_A, KEY_S, KEY_D, KEY_SPRINT, KEY_SNEAK, KEY_JUMP, KEY_RIGHT_CLICK)]
+        turns = [f"{turn:.3f}" for turn in history.last_turn.tolist()]
         if formatting == 'mpk':
             lines = ["X,Y,Z,YAW,PITCH,ANGLE_X,ANGLE_Y,W,A,S,D,SPRINT,SNEAK,JUMP,LMB,RMB,VEL_X,VEL_Y,VEL_Z"]
-            for i in self.history:
-                lines.append(f"0.0,0.0,0.0,0.0,0.0,{i.last_turn:.3f},0.0,{'true' if i.w else 'false'},{'true' if i.a else 'false'},{'true' if i.s else 'false'},{'true' if i.d else 'false'},{'true' if i.sprint else 'false'},{'true' if i.sneak else 'false'},{'true' if i.space else 'false'},false,{'true' if i.right_click else 'false'},0.0,0.0,0.0")
+            for turn, w, a, s, d, sprint, sneak, space, right_click in zip(turns, *booleans):
+                lines.append(f"0.0,0.0,0.0,0.0,0.0,{turn},0.0,{w},{a},{s},{d},{sprint},{sneak},{space},false,{right_click},0.0,0.0,0.0")
             self.macros[name+'.csv'] = "\n".join(lines)
         elif formatting == 'cyv': # CYV: WASD sprint sneak jump angle
             lines = []
-            for i in self.history:
-                lines.append(['true' if i.w else 'false',
-                              'true' if i.a else 'false',
-                              'true' if i.s else 'false',
-                              'true' if i.d else 'false',
-                              'true' if i.space else 'false',
-                              'true' if i.sprint else 'false',
-                              'true' if i.sneak else 'false',
-                            f'{i.last_turn:.3f}', '0.0'])
+            for turn, w, a, s, d, sprint, sneak, space, right_click in zip(turns, *booleans):
+                lines.append([w, a, s, d, space, sprint, sneak, turn, '0.0'])
             self.macros[name+'.json'] = lines
         else:
             raise ValueError(f"No such formatting {formatting}, options are either 'mpk' or 'cyv'.")
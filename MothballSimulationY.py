@@ -1,6 +1,136 @@
+import bisect
+import functools
+from array import array
 from numpy import float32 as f32
 from Enums import ExpressionType
 from BaseMothballSimulation import BasePlayer, MothballSequence
+from FloatMath import repeated_add
+
+class JumpTable:
+    """
+    The y and vy of a jump after each tick (index 0 is the state it starts from), as computed by `duration` and `height`. Ticks are only computed once they are asked for.
+    If `ceiling` is set, y is clamped to `ceiling - 1.8` (and vy set to 0) whenever it goes above it.
+
+    Only the first `MAX_TICKS` ticks are stored. Later ticks are simulated again from the last stored tick (or the last one simulated) when they are asked for (see `state`), so a cached table never takes more than a few dozen kilobytes.
+    """
+    # Ticks computed at once when looking for the landing tick
+    CHUNK = 64
+    MAX_TICKS = 2048
+
+    def __init__(self, y: float, vy: float, inertia: float, gravity: float, slow_falling: bool, ceiling: float = None):
+        self.ys = array("d", [y])
+        self.vys = array("d", [vy])
+        self.inertia = inertia
+        self.gravity = gravity
+        self.slow_falling = slow_falling
+        self.ceiling = ceiling
+        self.apex = None # the first tick where vy <= 0, after which y never grows (if gravity > 0)
+        self.tail = None # (tick, y, vy) of the last tick simulated past the stored ones, which `state` continues from
+
+    def fall(self, vy: float) -> float:
+        "Returns the vy of the next tick"
+        if self.slow_falling and vy <= 0:
+            vy = (vy - min(0.01, self.gravity)) * 0.98
+        else:
+            vy = (vy - self.gravity) * 0.98
+        if abs(vy) < self.inertia:
+            vy = 0
+        return vy
+
+    def step(self, y: float, vy: float) -> tuple[float, float]:
+        "Returns the y and vy of the tick after one with `y` and `vy`"
+        y = y + vy
+        if self.ceiling is not None and y > self.ceiling - 1.8:
+            y = self.ceiling - 1.8
+            vy = 0
+        return y, self.fall(vy)
+
+    def extend(self, ticks: int):
+        "Computes and stores every tick up to `ticks` (or `MAX_TICKS`)"
+        y, vy = self.ys[-1], self.vys[-1]
+        for _ in range(min(ticks, self.MAX_TICKS) + 1 - len(self.ys)):
+            y, vy = self.step(y, vy)
+            self.ys.append(y)
+            self.vys.append(vy)
+
+    @property
+    def full(self) -> bool:
+        "Whether every tick that can be stored is"
+        return len(self.ys) > self.MAX_TICKS
+
+    def state(self, tick: int) -> tuple[float, float]:
+        "Returns the y and vy after `tick` ticks, simulating the ticks past the stored ones without storing them"
+        self.extend(tick)
+        if tick < len(self.ys):
+            return self.ys[tick], self.vys[tick]
+        start, y, vy = self.tail if self.tail is not None and self.tail[0] <= tick else (len(self.ys) - 1, self.ys[-1], self.vys[-1])
+        for remaining in range(tick - start, 0, -1):
+            next_y, next_vy = self.step(y, vy)
+            if next_vy == vy and next_y == y + vy and (vy <= 0 or self.ceiling is None): # vy stopped changing and the ceiling can't be hit anymore, so every tick left adds vy to y
+                y = repeated_add(y, vy, remaining)
+                break
+            y, vy = next_y, next_vy
+        self.tail = (tick, y, vy)
+        return y, vy
+
+    def find_apex(self) -> int:
+        "Returns the first tick where vy <= 0. Only call this if gravity > 0."
+        tick = 0
+        while self.apex is None:
+            self.apex = next((tick for tick in range(tick, len(self.vys)) if self.vys[tick] <= 0), None)
+            if self.apex is None and self.full:
+                tick = len(self.vys) - 1
+                y, vy = self.ys[-1], self.vys[-1]
+                while vy > 0:
+                    y, vy = self.step(y, vy)
+                    tick += 1
+                self.apex = tick
+                self.tail = (tick, y, vy)
+            tick = len(self.vys)
+            self.extend(tick + self.CHUNK)
+        return self.apex
+
+    def landing(self, floor: float) -> int | None:
+        "Returns the first tick where y <= `floor` and vy <= 0, or `None` if y can't get there (if gravity <= 0, or vy stays under the inertia threshold)"
+        if self.gravity > 0: # y rises until the apex and then falls, binary search the fall
+            apex = self.find_apex()
+            while self.ys[-1] > floor and not self.full:
+                if self.vys[-1] == 0 and self.fall(0) == 0: # gravity is under the inertia threshold
+                    return None
+                self.extend(len(self.ys) + self.CHUNK)
+            if self.ys[-1] <= floor and apex < len(self.ys):
+                return bisect.bisect_left(self.ys, -floor, lo=apex, key=lambda y: -y)
+
+            # The landing is past the stored ticks
+            tick = max(apex, len(self.ys) - 1)
+            y, vy = self.state(tick)
+            while y > floor:
+                if vy == 0 and self.fall(0) == 0:
+                    return None
+                next_y, next_vy = self.step(y, vy)
+                if next_vy == vy and next_y == y + vy: # vy stopped changing (below 0), so y after k more ticks is repeated_add(y, vy, k), which only decreases with k
+                    end = 1
+                    while repeated_add(y, vy, end) > floor:
+                        end *= 2
+                    ticks = bisect.bisect_left(range(end + 1), True, key=lambda k: repeated_add(y, vy, k) <= floor)
+                    y = repeated_add(y, vy, ticks)
+                    tick += ticks
+                    break
+                y, vy = next_y, next_vy
+                tick += 1
+            self.tail = (tick, y, vy)
+            return tick
+
+        tick = 0
+        y, vy = self.ys[0], self.vys[0]
+        while True:
+            if y <= floor and vy <= 0:
+                return tick
+            next_y, next_vy = self.step(y, vy)
+            if self.ceiling is None and vy >= 0 or next_vy == vy and next_y == y: # y never goes down again (vy can get stuck at the smallest negative float)
+                return None
+            y, vy = next_y, next_vy
+            tick += 1
 
 class PlayerSimulationY(BasePlayer):
 
@@ -20,12 +150,14 @@ class PlayerSimulationY(BasePlayer):
 
     MODIFIERS = [WATER, LAVA, WEB, LADDER]
 
+    STATE_ATTRIBUTES = BasePlayer.STATE_ATTRIBUTES + ("y", "vy", "state", "ceiling", "hit_ceiling", "jump_boost", "jump_strength", "gravity", "slow_falling")
+
     FUNCTIONS_BY_TYPE = {
         "fast-movers": ["jump", "j", "air", "a", "slime"],
         "slow-movers": ["up", "down"],
         "stoppers": [],
         "returners": ["outty", "outsty", "outy", "outvy", "help", "duration", "height", "blip", "print"],
-        "calculators": ["repeat", "r", "poss", "inertialistener", "il"],
+        "calculators": ["repeat", "r", "poss", "inertialistener", "il", "sweep", "search"],
         "setters": ["setposy", "sety", "y", "setvy", "vy", "inertia","setceiling", "ceil", "precision", "setprecision", 'pre', 'addposy', 'addy', 'addvy', 'jumpboost', 'jb', 'jumpstrength', 'js', 'gravity', 'grav', 'slowfall', 'sf']
     }
 
@@ -50,6 +182,7 @@ class PlayerSimulationY(BasePlayer):
         self.slow_falling = False
 
     def move(self, duration, jump_boost = None, jump_strength = None, gravity = None, slow_falling = None, up = False, down = False, state = GROUND):
+        self.ticks_simulated += max(duration, 0)
 
         for _ in range(duration):
             
@@ -218,6 +351,47 @@ class PlayerSimulationY(BasePlayer):
     def slowfalling(self, toggle: bool, /):
         self.slow_falling = toggle
     
+    @staticmethod
+    @functools.lru_cache(maxsize=256)
+    def jump_table(vy: float, inertia: float, gravity: float, slow_falling: bool) -> JumpTable:
+        "Returns the `JumpTable` of a jump from y = 0 with `vy` and no ceiling, shared by every call with the same settings. `duration` and `height` read from these instead of simulating the jump every time."
+        return JumpTable(0, vy, inertia, gravity, slow_falling)
+
+    @staticmethod
+    @functools.lru_cache(maxsize=256)
+    def ceiling_table(ceiling: float, inertia: float, gravity: float, slow_falling: bool) -> JumpTable:
+        "Returns the `JumpTable` of the rest of a jump after it hits `ceiling`, starting from the tick it hits it. Shared by every jump that hits it, whatever its initial vy."
+        table = JumpTable(ceiling - 1.8, 0, inertia, gravity, slow_falling, ceiling)
+        table.vys[0] = table.fall(0)
+        return table
+
+    def jump_tables(self, ceiling: float, inertia: float, jump_boost: int, jump_strength: float, gravity: float, slow_falling: bool) -> tuple[JumpTable, int | None, JumpTable | None]:
+        """
+        Returns the table of a jump with these settings, the tick it hits `ceiling` (if it does) and the table of the rest of the jump from there.
+        After hitting a ceiling, a jump always continues the same way (from `ceiling - 1.8` with vy = 0), so the second table is shared by jumps with different settings.
+        """
+        vy = jump_strength + 0.1 * (jump_boost if jump_boost <= 128 else jump_boost-256)
+        table = PlayerSimulationY.jump_table(vy, inertia, gravity, slow_falling)
+        if ceiling == 0.0:
+            return table, None, None
+        if gravity <= 0: # the jump might never fall back down, so it has no apex to look for the ceiling before
+            return JumpTable(0, vy, inertia, gravity, slow_falling, ceiling), None, None
+
+        top = max(table.find_apex(), 1) # y only grows from tick 1 until the apex, and then only falls
+        table.extend(top)
+        last = min(top, len(table.ys) - 1)
+        hit = bisect.bisect_right(table.ys, ceiling - 1.8, 1, last + 1)
+        if hit > last: # look at the ticks up to the apex that aren't stored
+            y, vy = table.ys[last], table.vys[last]
+            while hit <= top:
+                y, vy = table.step(y, vy)
+                if y > ceiling - 1.8:
+                    break
+                hit += 1
+        if hit > top:
+            return table, None, None
+        return table, hit, PlayerSimulationY.ceiling_table(ceiling, inertia, gravity, slow_falling)
+
     def duration(self, floor: float = 0.0, ceiling: float = 0.0, /, *, inertia: float = None, jump_boost: int = None, jump_strength: float = None, gravity: float = None, slow_falling: bool = None):
         if inertia is None:
             inertia = self.inertia_threshold
@@ -229,27 +403,19 @@ class PlayerSimulationY(BasePlayer):
             gravity = self.gravity
         if slow_falling is None:
             slow_falling = self.slow_falling
-        
-        vy = jump_strength + 0.1 * (jump_boost if jump_boost <= 128 else jump_boost-256)
-        y = 0
-        ticks = 0
 
-        while y > floor or vy > 0:
-            y = y + vy
-            if ceiling != 0.0 and y > ceiling - 1.8:
-                y = ceiling - 1.8
-                vy = 0
-            if slow_falling and vy <= 0:
-                vy = (vy - min(0.01, gravity)) * 0.98
-            else:
-                vy = (vy - gravity) * 0.98
-            if abs(vy) < inertia:
-                vy = 0
-            ticks += 1
+        table, hit, rest = self.jump_tables(ceiling, inertia, jump_boost, jump_strength, gravity, slow_falling)
+        if hit is not None and table.ys[0] <= floor and table.vys[0] <= 0: # vy is positive until the apex, so this is the only tick that can land before the ceiling is hit
+            hit = None
+        if hit is not None:
+            table = rest
+        ticks = table.landing(floor)
 
-        if vy >= 0:
+        if ticks is None or table.state(ticks)[1] >= 0:
             self.add_to_output(ExpressionType.WARNING, string_or_num='Impossible jump height. Too high.')
             return
+        if hit is not None:
+            ticks += hit
 
         ceiling = f' {ceiling}bc' if ceiling != 0.0 else ''
         self.add_to_output(ExpressionType.GENERAL_LABEL, f"Duration of a {floor}b{ceiling} jump: {ticks} ticks")
@@ -265,23 +431,12 @@ class PlayerSimulationY(BasePlayer):
             gravity = self.gravity
         if slow_falling is None:
             slow_falling = self.slow_falling
-        
-        vy = jump_strength + 0.1 * (jump_boost if jump_boost <= 128 else jump_boost-256)
-        y = 0
-        ticks = 0
 
-        for i in range(duration):
-            y = y + vy
-            if ceiling != 0.0 and y > ceiling - 1.8:
-                y = ceiling - 1.8
-                vy = 0
-            if slow_falling and vy <= 0:
-                vy = (vy - min(0.01, gravity)) * 0.98
-            else:
-                vy = (vy - gravity) * 0.98
-            if abs(vy) < inertia:
-                vy = 0
-            ticks += 1
+        table, hit, rest = self.jump_tables(ceiling, inertia, jump_boost, jump_strength, gravity, slow_falling)
+        tick = max(duration, 0)
+        if hit is not None and tick >= hit:
+            table, tick = rest, tick - hit
+        y, _ = table.state(tick)
 
         ceiling = f' {ceiling}bc' if ceiling != 0.0 else ''
         self.add_to_output(ExpressionType.GENERAL_LABEL_WITH_NUMBER, f"Height after {duration} ticks{ceiling} ", round(y, self.precision))
@@ -1,3 +1,4 @@
+import time
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg
 from matplotlib.ticker import MultipleLocator
 from matplotlib.figure import Figure
@@ -5,6 +6,9 @@ from matplotlib.lines import Line2D
 
 class PlotWidget(FigureCanvasQTAgg):
     "Widget for displaying a plot"
+    # Seconds between redraws of a main line that is updated live
+    LIVE_REDRAW_INTERVAL = 0.1
+
     def __init__(self, parent=None):
         self.fig = Figure(figsize=(3.6, 3.6), facecolor="#393939", layout="constrained") # in inches
         self.ax = self.fig.add_subplot(111)
@@ -16,6 +20,7 @@ class PlotWidget(FigureCanvasQTAgg):
 
         self.mainline: list[Line2D] = []
         self.data: list[Line2D] = []
+        self.last_live_draw = 0.0
 
         self.ax.set_facecolor("#5B5B5B")
         self.ax.tick_params(colors="white")
@@ -29,7 +34,21 @@ class PlotWidget(FigureCanvasQTAgg):
         self.ax.yaxis.set_minor_locator(MultipleLocator(0.0625))
         self.ax.grid(which="both", linestyle="--", linewidth=0.5, color='white')
 
-    def addMainLine(self, x, y):
+    def addMainLine(self, x, y, live = False):
+        """
+        Plots the main trajectory. If `live`, the line is moved instead of replaced and only redrawn once every `LIVE_REDRAW_INTERVAL` seconds, for trajectories that change many times a second.
+        The last live update might not be drawn, so finish with a call without `live`.
+        """
+        if live and self.mainline:
+            self.mainline[0].set_data(x, y)
+            now = time.perf_counter()
+            if now - self.last_live_draw < self.LIVE_REDRAW_INTERVAL:
+                return
+            self.last_live_draw = now
+            self.ax.relim()
+            self.ax.autoscale_view()
+            self.draw_idle()
+            return
         if self.mainline:
             self.mainline[0].remove()
         self.mainline = self.ax.plot(x,y, marker="o", linestyle="-", color="lime")
@@ -0,0 +1,178 @@
+"""
+Contains `Tick` and `TickHistory`, the per tick record of a `PlayerSimulationXZ` that `macro` reads. \\
+Ticks are stored in columns (one NumPy array per value and one byte of pressed keys per tick) instead of one Python object per tick.
+"""
+
+import numpy as np
+from typing import NamedTuple
+
+# Bits of the pressed keys of a tick
+KEY_W = 1
+KEY_A = 2
+KEY_S = 4
+KEY_D = 8
+KEY_SNEAK = 16
+KEY_SPRINT = 32
+KEY_JUMP = 64
+KEY_RIGHT_CLICK = 128
+
+class Tick:
+    def __init__(self, w: bool, a: bool, s: bool, d: bool, sneak: bool, sprint: bool, space: bool, right_click: bool, last_turn: float, x: float = None, z: float = None, vx: float = None, vz: float = None):
+        self.w = w
+        self.a = a
+        self.s = s
+        self.d = d
+        self.sneak = sneak
+        self.sprint = sprint
+        self.space = space
+        self.right_click = right_click
+        self.last_turn = last_turn
+        self.x = x
+        self.z = z
+        self.vx = vx
+        self.vz = vz
+    
+    def __repr__(self):
+        keys = f"Keys: ({'w' if self.w else ''}{'a' if self.a else ''}{'s' if self.s else ''}{'d' if self.d else ''})"
+        mvt = f"Mvt: ({self.x}, {self.z}, {self.vx}, {self.vz})"
+        return f"Tick({keys} {mvt})"
+
+class TickColumns(NamedTuple):
+    "Views of every column of a `TickHistory`, one element per tick"
+    keys: np.ndarray
+    last_turn: np.ndarray
+    x: np.ndarray
+    z: np.ndarray
+    vx: np.ndarray
+    vz: np.ndarray
+
+def input_keys(inputs: str, sneak: bool = False, sprint: bool = False, jump: bool = False, right_click: bool = False) -> int:
+    "Returns the key bits of the WASD `inputs` (like `'wa'`) and the other keys"
+    return ((KEY_W if 'w' in inputs else 0) | (KEY_A if 'a' in inputs else 0) | (KEY_S if 's' in inputs else 0) | (KEY_D if 'd' in inputs else 0)
+            | (KEY_SNEAK if sneak else 0) | (KEY_SPRINT if sprint else 0) | (KEY_JUMP if jump else 0) | (KEY_RIGHT_CLICK if right_click else 0))
+
+class TickHistory:
+    """
+    The keys, turn, position and velocity of every simulated tick, stored in arrays that grow geometrically (41 bytes per tick).
+
+    Indexing or iterating gives `Tick` objects, built on demand. Use `columns()` (or `keys`, `x`, ...) to get NumPy views of the stored values without copying them.
+    A view stays valid after more ticks are appended, but only shows the ticks that were there when it was made.
+    """
+    INITIAL_CAPACITY = 256
+
+    def __init__(self):
+        self.size = 0
+        self._keys = np.empty(self.INITIAL_CAPACITY, dtype=np.uint8)
+        self._last_turn = np.empty(self.INITIAL_CAPACITY)
+        self._x = np.empty(self.INITIAL_CAPACITY)
+        self._z = np.empty(self.INITIAL_CAPACITY)
+        self._vx = np.empty(self.INITIAL_CAPACITY)
+        self._vz = np.empty(self.INITIAL_CAPACITY)
+
+    def _reserve(self, capacity: int):
+        "Makes room for at least `capacity` ticks, at least doubling the current capacity"
+        if capacity <= self._x.size:
+            return
+        capacity = max(capacity, 2 * self._x.size)
+        for name in ("_keys", "_last_turn", "_x", "_z", "_vx", "_vz"):
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+
+    def append(self, keys: int, last_turn: float, x: float, z: float, vx: float, vz: float):
+        "Adds a tick. `keys` is a combination of the `KEY_` bits (see `input_keys`)."
+        n = self.size
+        if n == self._x.size:
+            self._reserve(n + 1)
+        self._keys[n] = keys
+        self._last_turn[n] = last_turn
+        self._x[n] = x
+        self._z[n] = z
+        self._vx[n] = vx
+        self._vz[n] = vz
+        self.size = n + 1
+
+    def extend(self, keys, last_turn, x, z, vx, vz):
+        "Adds several ticks at once. Each argument is an array with one element per tick, or a number shared by all of them."
+        count = len(x)
+        n = self.size
+        self._reserve(n + count)
+        self._keys[n:n+count] = keys
+        self._last_turn[n:n+count] = last_turn
+        self._x[n:n+count] = x
+        self._z[n:n+count] = z
+        self._vx[n:n+count] = vx
+        self._vz[n:n+count] = vz
+        self.size = n + count
+
+    def clear(self):
+        "Removes every tick. Views made before stay as they were."
+        self.__init__()
+
+    def columns(self) -> TickColumns:
+        "Returns read only views of every column"
+        return TickColumns(self.keys, self.last_turn, self.x, self.z, self.vx, self.vz)
+
+    def _view(self, column: np.ndarray) -> np.ndarray:
+        view = column[:self.size]
+        view.flags.writeable = False
+        return view
+
+    @property
+    def keys(self) -> np.ndarray:
+        return self._view(self._keys)
+
+    @property
+    def last_turn(self) -> np.ndarray:
+        return self._view(self._last_turn)
+
+    @property
+    def x(self) -> np.ndarray:
+        return self._view(self._x)
+
+    @property
+    def z(self) -> np.ndarray:
+        return self._view(self._z)
+
+    @property
+    def vx(self) -> np.ndarray:
+        return self._view(self._vx)
+
+    @property
+    def vz(self) -> np.ndarray:
+        return self._view(self._vz)
+
+    def pressed(self, key: int) -> np.ndarray:
+        "Returns a bool array of the ticks where `key` (one of the `KEY_` bits) is pressed"
+        return (self.keys & key) != 0
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, index: int | slice) -> "Tick | TickHistory":
+        "Returns the `Tick` at `index`, or a new `TickHistory` with a copy of the ticks in a slice"
+        if isinstance(index, slice):
+            history = TickHistory()
+            history.extend(*(column[index] for column in self.columns()))
+            return history
+        if index < 0:
+            index += self.size
+        if not 0 <= index < self.size:
+            raise IndexError("tick index out of range")
+        keys = int(self._keys[index])
+        return Tick(bool(keys & KEY_W), bool(keys & KEY_A), bool(keys & KEY_S), bool(keys & KEY_D), bool(keys & KEY_SNEAK), bool(keys & KEY_SPRINT), bool(keys & KEY_JUMP), bool(keys & KEY_RIGHT_CLICK),
+                    float(self._last_turn[index]), float(self._x[index]), float(self._z[index]), float(self._vx[index]), float(self._vz[index]))
+
+    def __iter__(self):
+        for index in range(self.size):
+            yield self[index]
+
+    def __repr__(self):
+        return f"TickHistory({list(self)})"
+
+    def __getstate__(self):
+        return {"size": self.size, **{name: getattr(self, name)[:self.size].copy() for name in ("_keys", "_last_turn", "_x", "_z", "_vx", "_vz")}}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
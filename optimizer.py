@@ -1,9 +1,25 @@
+import multiprocessing
 import numpy as np
-from scipy.optimize import minimize
+from concurrent.futures import wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from scipy.optimize import minimize, OptimizeResult
+from scipy.stats import qmc
 from ExprEval import evaluate
 from Enums import OptimizeCellAxis
+from FloatMath import F_DEG_TO_RAD, F_RAD_TO_INDEX, F_QUARTER_TURN_INDEX, SIN_TABLE_ARRAY
+from BaseMothballSimulation import sweep_pool, close_sweep_pool
+
+class OptimizationCancelled(Exception):
+    "Raised from the SLSQP callback to stop `Optimizer.optimize` early"
 
 class Optimizer:
+    # Equality constraints count as satisfied in game within this distance, inequalities on positions must be satisfied exactly.
+    # F and FC constraints also get the float32 rounding of their yaws (see `gameScores`).
+    GAME_EQUALITY_TOLERANCE = 1e-6
+    # How many sine table steps either way the discrete search in `verify` tries moving each angle by, and how many moves it makes at most
+    GAME_SEARCH_RADIUS = 4
+    GAME_SEARCH_ROUNDS = 100
+
     def __init__(self):
         self.init = 0.3169516
         self.n = 12
@@ -20,6 +36,11 @@ class Optimizer:
         self.F_optimal = []
         self.res = 0
 
+        self.weightsX = None # see setupWeights
+        self.weightsZ = None
+        self.trajectoryKey = None # the iterate that trajectoryCache is for
+        self.trajectoryCache = None
+
     def setupVars(self, extraVars: dict):
         for k,v in extraVars.items():
             try:
@@ -32,14 +53,50 @@ class Optimizer:
         if d > 180: 
             d = d - 180
         self.initial_guess = d*np.pi/180
+        self.invalidateWeights()
     
     def setupConstants(self, imux, imuz, mmu):
         self.imux = np.array([evaluate(a, self.variables) for a in imux], dtype=float)
         self.imuz = np.array([evaluate(a, self.variables) for a in imuz], dtype=float)
         self.mmu = np.array([evaluate(a, self.variables) for a in mmu], dtype=float)
+        self.invalidateWeights()
+
+    def invalidateWeights(self):
+        "Drops the weight matrices and the cached trajectory, which depend on the number of ticks and the constants"
+        self.weightsX = self.weightsZ = None
+        self.trajectoryKey = None
+
+    def setupWeights(self, size):
+        """
+        Precomputes the matrices that map the angles to the positions: X(F, t) = (weightsX @ sin(F))[t] and Z(F, t) = (weightsZ @ cos(F))[t], for t from 0 to `size`.
+        The weight of tick i at tick t is mmu[i] times the sum of the products of the drags from tick i to each tick before t. Does nothing if they are already set up for `size` ticks.
+        """
+        if self.weightsX is not None and self.weightsX.shape[1] == size:
+            return
+        mmu = self.mmu[:size]
+        for drags, name in ((self.imux, 'weightsX'), (self.imuz, 'weightsZ')):
+            weights = np.zeros((size + 1, size))
+            sums = np.zeros(size) # sums[i] = 1 + drags[i] + drags[i]*drags[i+1] + ... up to the current tick
+            products = np.zeros(size) # products[i] = drags[i]*drags[i+1]*... up to the current tick
+            for t in range(1, size + 1):
+                products[:t-1] *= drags[t-2]
+                products[t-1] = 1.0
+                sums[:t] += products[:t]
+                weights[t, :t] = mmu[:t] * sums[:t]
+            setattr(self, name, weights)
+
+    def trajectory(self, F):
+        "Returns the X and Z positions at every tick from 0 to n for the angles `F`, computed once per iterate and shared by the objective, the constraints and `postprocess`"
+        F = np.asarray(F, dtype=float)
+        key = F.tobytes()
+        if key != self.trajectoryKey:
+            self.setupWeights(F.size)
+            self.trajectoryCache = (self.weightsX @ np.sin(F), self.weightsZ @ np.cos(F))
+            self.trajectoryKey = key
+        return self.trajectoryCache
 
     def setupConstraints(self, iterable):
-        c = []
+        rows = []
         names = []
         for i, j in enumerate(iterable, 1):
             active, name, mode, t1, op, t2, comparison, num = j
@@ -81,40 +138,7 @@ class Optimizer:
                 if num > 180:
                     num = num - 360
                 num*= np.pi/180
-                if comparison== ">" or comparison == ">=":
-                    if op == "-":
-                        if t2 is not None:
-                            c.append({'type': 'ineq', 'fun': (lambda t1=t1, t2=t2, num=num: lambda F: F[t1] - F[t2] - num)()})
-                        else:
-                            c.append({'type': 'ineq', 'fun': (lambda t1=t1, num=num: lambda F: F[t1] - num)()})
-                    elif op == "+":
-                        if t2 is not None:
-                            c.append({'type': 'ineq', 'fun': (lambda t1=t1, t2=t2, num=num: lambda F: F[t1] + F[t2] - num)()})
-                        else:
-                            c.append({'type': 'ineq', 'fun': (lambda t1=t1, num=num: lambda F: F[t1] - num)()})
-                elif comparison == "=":
-                    if op == '-':
-                        if t2 is not None:
-                            c.append({'type': 'eq', 'fun': (lambda t1=t1, t2=t2, num=num: lambda F: F[t1] - F[t2] - num)()})
-                        else:
-                            c.append({'type': 'eq', 'fun': (lambda t1=t1, num=num: lambda F: F[t1] - num)()})
-                    elif op == "+":
-                        if t2 is not None:
-                            c.append({'type': 'eq', 'fun': (lambda t1=t1, t2=t2, num=num: lambda F: F[t1] + F[t2] - num)()})
-                        else:
-                            c.append({'type': 'eq', 'fun': (lambda t1=t1, num=num: lambda F: F[t1] - num)()})
-                else:
-                    if op == "-":
-                        if t2 is not None:
-                            c.append({'type': 'ineq', 'fun': (lambda t1=t1, t2=t2, num=num: lambda F: -F[t1] + F[t2] + num)()})
-                        else:
-                            c.append({'type': 'ineq', 'fun': (lambda t1=t1, num=num: lambda F: -F[t1] + num)()})
-                    elif op == "+":
-                        if t2 is not None:
-                            c.append({'type': 'ineq', 'fun': (lambda t1=t1, t2=t2, num=num: lambda F: -F[t1] - F[t2] + num)()})
-                        else:
-                            c.append({'type': 'ineq', 'fun': (lambda t1=t1, num=num: lambda F: -F[t1] + num)()})
-
+                self.addConstraintRow(rows, 'F', t1, op, t2, comparison, num)
                 continue
             
             if mode == 'FC': # facing
@@ -137,109 +161,96 @@ class Optimizer:
                 if num > 180:
                     num = num - 360
                 num*= np.pi/180
-                if comparison== ">" or comparison == ">=":
-                    if op == "-":
-                        for tick1, tick2 in pairs:
-                            c.append({'type': 'ineq', 'fun': (lambda t1=tick1, t2=tick2, num=num: lambda F: F[t1] - F[t2] - num)()})
-                    elif op == "+":
-                        for tick1, tick2 in pairs:
-                            c.append({'type': 'ineq', 'fun': (lambda t1=tick1, t2=tick2, num=num: lambda F: F[t1] + F[t2] - num)()})
-                elif comparison == "=":
-                    if op == '-':
-                        for tick1, tick2 in pairs:
-                            c.append({'type': 'eq', 'fun': (lambda t1=tick1, t2=tick2, num=num: lambda F: F[t1] - F[t2] - num)()})
-                    elif op == "+":
-                        for tick1, tick2 in pairs:
-                            c.append({'type': 'eq', 'fun': (lambda t1=tick1, t2=tick2, num=num: lambda F: F[t1] + F[t2] - num)()})
-                else:
-                    if op == "-":
-                        for tick1, tick2 in pairs:
-                            c.append({'type': 'ineq', 'fun': (lambda t1=tick1, t2=tick2, num=num: lambda F: -F[t1] + F[t2] + num)()})
-                    elif op == "+":
-                        for tick1, tick2 in pairs:
-                            c.append({'type': 'ineq', 'fun': (lambda t1=tick1, t2=tick2, num=num: lambda F: -F[t1] - F[t2] + num)()})
+                for tick1, tick2 in pairs:
+                    self.addConstraintRow(rows, 'F', tick1, op, tick2, comparison, num)
                 for i in range(len(pairs)-1):
                     names.append(name + f" ({i})")
                 continue
 
+            if mode not in ('X', 'Z'):
+                raise Exception(f"{mode} is not a constraint type")
+            self.addConstraintRow(rows, mode, t1, op, t2, comparison, num)
 
+        self.setupConstraintMatrices(rows)
+        self.constraints = [names, self.constraintDicts()]
 
+    def constraintDicts(self):
+        "Returns the constraints in the form SLSQP takes them: one dict for the equalities and one for the inequalities (if there are any), each with a vectorized `fun` and `jac`"
+        c = []
+        for kind in ('eq', 'ineq'):
+            selected = self.constraintTypes == kind
+            if selected.any():
+                c.append({'type': kind,
+                          'fun': (lambda selected: lambda F: self.constraintValues(F)[selected])(selected),
+                          'jac': (lambda selected: lambda F: self.constraintJacobian(F)[selected])(selected)})
+        return c
 
-            if mode == 'X':
-                func = self.X
-            elif mode == 'Z':
-                func = self.Z
-
-            if comparison== ">" or comparison == ">=":
-                if op == "-":
-                    if t2:
-                        c.append({'type': 'ineq', 'fun': (lambda func, t1=t1, t2=t2, num=num: lambda F: func(F, t1) - func(F, t2) - num)(func)})
-                    else:
-                        c.append({'type': 'ineq', 'fun': (lambda func, t1=t1, num=num: lambda F: func(F, t1) - num)(func)})
-                elif op == "+":
-                    if t2:
-                        c.append({'type': 'ineq', 'fun': (lambda func, t1=t1, t2=t2, num=num: lambda F: func(F, t1) + func(F, t2) - num)(func)})
-                    else:
-                        c.append({'type': 'ineq', 'fun': (lambda func, t1=t1, num=num: lambda F: func(F, t1) - num)(func)})
-            elif comparison == "=":
-                if op == '-':
-                    if t2:
-                        c.append({'type': 'eq', 'fun': (lambda func, t1=t1, t2=t2, num=num: lambda F: func(F, t1) - func(F, t2) - num)(func)})
-                    else:
-                        c.append({'type': 'eq', 'fun': (lambda func, t1=t1, num=num: lambda F: func(F, t1) - num)(func)})
-                elif op == "+":
-                    if t2:
-                        c.append({'type': 'eq', 'fun': (lambda func, t1=t1, t2=t2, num=num: lambda F: func(F, t1) + func(F, t2) - num)(func)})
-                    else:
-                        c.append({'type': 'eq', 'fun': (lambda func, t1=t1, num=num: lambda F: func(F, t1) - num)(func)})
-            else:
-                if op == "-":
-                    if t2:
-                        c.append({'type': 'ineq', 'fun': (lambda func, t1=t1, t2=t2, num=num: lambda F: -func(F, t1) + func(F, t2) + num)(func)})
-                    else:
-                        c.append({'type': 'ineq', 'fun': (lambda func, t1=t1, num=num: lambda F: -func(F, t1) + num)(func)})
-                elif op == "+":
-                    if t2:
-                        c.append({'type': 'ineq', 'fun': (lambda func, t1=t1, t2=t2, num=num: lambda F: -func(F, t1) - func(F, t2) + num)(func)})
-                    else:
-                        c.append({'type': 'ineq', 'fun': (lambda func, t1=t1, num=num: lambda F: -func(F, t1) + num)(func)})
-
-
-        self.constraints = [names, c]
+    def __getstate__(self):
+        # The constraint dicts hold lambdas, which can't be pickled. They are rebuilt from the constraint matrices.
+        state = self.__dict__.copy()
+        state['constraints'] = [self.constraints[0], None] if self.constraints[1] else self.constraints
+        return state
 
-    
-    def X(self, F, t):
-        if t <= 0:
-            return 0.0
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self.constraints[1] is None:
+            self.constraints = [self.constraints[0], self.constraintDicts()]
+
+    def addConstraintRow(self, rows, mode, t1, op, t2, comparison, num):
+        """
+        Adds the constraint `mode[t1] op mode[t2] comparison num` to `rows`, as (type, mode, [(tick, coefficient), ...], constant), where mode[t] is F[t], X(F, t) or Z(F, t).
+        The constraint is satisfied when the sum of the coefficients times mode[tick], plus the constant, is 0 (type 'eq') or at least 0 (type 'ineq'). An unknown `op` adds nothing.
+        """
+        if op not in ('-', '+'):
+            return
+        sign = 1 if comparison in ('>', '>=', '=') else -1
+        terms = [(t1, sign)]
+        if t2 is not None:
+            terms.append((t2, -sign if op == '-' else sign))
+        rows.append(('eq' if comparison == '=' else 'ineq', mode, terms, -sign * num))
 
-        s = 0.0
-        s_next = 0.0
+    def setupConstraintMatrices(self, rows):
+        """
+        Turns the rows from `addConstraintRow` into matrices, so that every constraint value is constraintF @ F + constraintX @ sin(F) + constraintZ @ cos(F) + constraintConstants.
+        X and Z are linear in sin(F) and cos(F) (see `setupWeights`), so their rows are folded into the weight matrices here. Call this after `setupConstants`.
+        """
+        size = self.n
+        self.setupWeights(size)
+        anglesF = np.zeros((len(rows), size))
+        positionsX = np.zeros((len(rows), size + 1))
+        positionsZ = np.zeros((len(rows), size + 1))
+        for row, (_, mode, terms, _) in enumerate(rows):
+            for tick, coefficient in terms:
+                if mode == 'F':
+                    anglesF[row, tick] += coefficient
+                elif tick > 0: # X(F, t) and Z(F, t) are 0 before the first tick
+                    (positionsX if mode == 'X' else positionsZ)[row, tick] += coefficient
+        self.constraintTypes = np.array([kind for kind, _, _, _ in rows], dtype=object)
+        self.constraintF = anglesF
+        self.constraintPositionsX = positionsX # kept for constraints on trajectories that aren't from the weights, see `verify`
+        self.constraintPositionsZ = positionsZ
+        self.constraintX = positionsX @ self.weightsX
+        self.constraintZ = positionsZ @ self.weightsZ
+        self.constraintConstants = np.array([constant for _, _, _, constant in rows], dtype=float)
 
-        for i in range(t, 0, -1):
-            if i == t:
-                S_i = 1.0
-            else:
-                S_i = 1.0 + self.imux[i-1] * s_next
+    def constraintValues(self, F):
+        "Returns the value of every constraint, in the order of the constraint names"
+        return self.constraintF @ F + self.constraintX @ np.sin(F) + self.constraintZ @ np.cos(F) + self.constraintConstants
 
-            s += self.mmu[i-1] * np.sin(F[i-1]) * S_i
-            s_next = S_i
+    def constraintJacobian(self, F):
+        "Returns the derivatives of every constraint value (rows) with respect to every angle (columns)"
+        return self.constraintF + self.constraintX * np.cos(F) - self.constraintZ * np.sin(F)
 
-        return s
+    
+    def X(self, F, t):
+        if t <= 0:
+            return 0.0
+        return self.trajectory(F)[0][t]
     
     def Z(self, F, t):
         if t <= 0:
             return 0.0
-        s = 0.0
-        s_next = 0.0
-        for i in range(t, 0, -1):
-            if i == t:
-                s_i = 1.0
-            else:
-                s_i = 1.0 + self.imuz[i-1] * s_next
-            
-            s += self.mmu[i-1] * np.cos(F[i-1]) * s_i
-            s_next = s_i
-        return s
+        return self.trajectory(F)[1][t]
 
 
     def objectiveX(self, F):
@@ -254,7 +265,24 @@ class Optimizer:
     def objectiveNegZ(self, F):
         return -self.Z(F, self.n)
 
-    def optimize(self, axis_to_optimize: OptimizeCellAxis, max_or_min: str, init_guess: list[float]):
+    def gradientX(self, F):
+        "Returns the derivatives of X(F, n) with respect to every angle"
+        self.setupWeights(len(F))
+        return self.weightsX[self.n] * np.cos(F)
+
+    def gradientZ(self, F):
+        "Returns the derivatives of Z(F, n) with respect to every angle"
+        self.setupWeights(len(F))
+        return -self.weightsZ[self.n] * np.sin(F)
+
+    def gradientNegX(self, F):
+        return -self.gradientX(F)
+
+    def gradientNegZ(self, F):
+        return -self.gradientZ(F)
+
+    def initialPoint(self, init_guess: list[float]):
+        "Returns `init_guess` as n angles, repeating its last angle (or 0 if it's empty) to fill it up"
         # x0 = np.array([self.initial_guess for _ in range(self.n)], dtype=float)
         if len(init_guess) == 0:
             init_guess = [0]
@@ -262,32 +290,229 @@ class Optimizer:
             init_guess = init_guess + ([init_guess[-1]] * (self.n - len(init_guess)))
         elif len(init_guess) > self.n:
             init_guess = init_guess[0:self.n]
-        x0 = np.array(init_guess)
+        return np.array(init_guess, dtype=float)
+
+    def startingPoints(self, init_guesses: list[list[float]], starts: int, seed: int = 0):
+        "Returns `starts` initial points for `optimizeMultistart`: the `init_guesses` first, then a Latin hypercube sample of angles from -pi to pi, which spreads the points out across every tick's angle"
+        points = [self.initialPoint(list(guess)) for guess in init_guesses][:starts]
+        if starts > len(points):
+            sample = qmc.LatinHypercube(d=self.n, seed=seed).random(starts - len(points))
+            points.extend(qmc.scale(sample, -np.pi, np.pi))
+        return points
+
+    def constraintViolation(self, F):
+        "Returns how far the angles `F` are from satisfying the constraints: the largest difference of an equality from 0, or of an inequality below 0"
+        if not self.constraints[1]:
+            return 0.0
+        values = self.constraintValues(F)
+        equalities = self.constraintTypes == 'eq'
+        return float(max(np.max(np.abs(values[equalities]), initial=0.0), np.max(-values[~equalities], initial=0.0)))
+
+    def isFeasible(self, F, tolerance: float = 1e-6):
+        "Returns whether the angles `F` satisfy every constraint, up to `tolerance`"
+        return self.constraintViolation(F) <= tolerance
+
+    def optimize(self, axis_to_optimize: OptimizeCellAxis, max_or_min: str, init_guess: list[float], progress = None, cancelled = None, progress_every: int = 5):
+        """
+        Finds the angles that minimize or maximize the position on `axis_to_optimize`, starting from `init_guess`.
+        `progress(iteration, objective, constraint violation, angles)` is called every `progress_every` iterations, and the optimization stops after the iteration where `cancelled()` returns True.
+        A cancelled optimization returns the best iterate so far: the best feasible one, or the one closest to being feasible.
+        """
+        x0 = self.initialPoint(init_guess)
         
         if axis_to_optimize == OptimizeCellAxis.X:
             if max_or_min == 'min':
-                func = self.objectiveX
+                func, jac = self.objectiveX, self.gradientX
             elif max_or_min == 'max':
-                func = self.objectiveNegX
+                func, jac = self.objectiveNegX, self.gradientNegX
         elif axis_to_optimize == OptimizeCellAxis.Z:
             if max_or_min == 'min':
-                func = self.objectiveZ
+                func, jac = self.objectiveZ, self.gradientZ
             elif max_or_min == 'max':
-                func = self.objectiveNegZ
+                func, jac = self.objectiveNegZ, self.gradientNegZ
         else:
             return ("Something went wrong!", 'function was invalid. Report this bug.', '')    
 
         angle_bounds = ((-2*np.pi,2*np.pi) for _ in range(self.n))
 
-        res = minimize(func, x0, method="SLSQP", constraints=self.constraints[1], bounds=angle_bounds, options={'maxiter': 500, 'ftol': 1e-12})
+        iterations = 0
+        best = None # (sort key, angles) of the best iterate so far
+        def callback(F):
+            nonlocal iterations, best
+            iterations += 1
+            objective = func(F)
+            violation = self.constraintViolation(F)
+            key = (violation, 0.0) if violation > 1e-6 else (0.0, objective)
+            if best is None or key < best[0]:
+                best = (key, F.copy())
+            if progress is not None and iterations % progress_every == 0:
+                progress(iterations, objective, violation, F)
+            if cancelled is not None and cancelled():
+                raise OptimizationCancelled
+
+        try:
+            res = minimize(func, x0, method="SLSQP", jac=jac, constraints=self.constraints[1], bounds=angle_bounds, options={'maxiter': 500, 'ftol': 1e-12},
+                           callback=callback if progress is not None or cancelled is not None else None)
+        except OptimizationCancelled:
+            F = best[1]
+            res = OptimizeResult(x=F, fun=func(F), success=False, status=-1, message="Optimization cancelled, showing the best angles found so far", nit=iterations)
         self.F_optimal = res.x
         self.res = res
-        m = [c['fun'](self.F_optimal) for c in self.constraints[1]]
+        m = list(self.constraintValues(self.F_optimal)) if self.constraints[1] else []
         return (res, (self.constraints[0], m)) # (res, (constraintnames, constraintvalues))
 
+    def optimizeMultistart(self, axis_to_optimize: OptimizeCellAxis, max_or_min: str, init_guesses: list[list[float]], starts: int, progress = None, cancelled = None, runner_ups: int = 5):
+        """
+        Runs `optimize` from `starts` initial points (see `startingPoints`) in the process pool shared with `sweep`, since SLSQP only finds the optimum nearest to where it starts.
+        `progress(done, starts)` is called as each solve finishes. Once `cancelled()` returns True, the solves that haven't started are dropped and the running ones stop after their current iteration,
+        keeping the best angles they found (see `optimize`).
+
+        Solutions that end at the same angles are only kept once. Returns the same as `optimize` for the best feasible solution (the best infeasible one if none are),
+        followed by up to `runner_ups` of the next best distinct solutions as (res, constraint values) pairs.
+        """
+        points = self.startingPoints(init_guesses, starts)
+        results = []
+        solved = set() # indices of the points that have a result
+        futures = {}
+        try:
+            pool = sweep_pool()
+            with multiprocessing.get_context("spawn").Manager() as manager:
+                stop = manager.Event() # seen by the worker processes, unlike `cancelled`
+                futures = {pool.submit(solve_start, self, axis_to_optimize, max_or_min, list(x0), stop.is_set): index for index, x0 in enumerate(points)}
+                try:
+                    running = set(futures)
+                    while running:
+                        done, running = wait(running, timeout=0.01, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            results.append(future.result())
+                            solved.add(futures[future])
+                            if progress is not None:
+                                progress(len(results), len(points))
+                        if running and cancelled is not None and cancelled():
+                            raise InterruptedError
+                finally:
+                    stop.set()
+                    for future in futures:
+                        future.cancel()
+                    wait(futures) # the running solves stop after their current iteration
+        except BrokenProcessPool: # Worker processes could not be started, finish in this process
+            close_sweep_pool()
+        except InterruptedError: # keep the best angles of the solves that were stopped
+            results.extend(future.result() for future, index in futures.items() if index not in solved and not future.cancelled() and future.exception() is None)
+            solved = set(range(len(points)))
+
+        for x0 in (x0 for index, x0 in enumerate(points) if index not in solved):
+            if cancelled is not None and cancelled():
+                break
+            results.append(solve_start(self, axis_to_optimize, max_or_min, list(x0), cancelled))
+            if progress is not None:
+                progress(len(results), len(points))
+
+        if not results:
+            raise InterruptedError("Optimization cancelled")
+        if isinstance(results[0][0], str): # the axis was invalid
+            return results[0]
+
+        results.sort(key=lambda result: (not self.isFeasible(result[0].x), result[0].fun))
+        distinct = []
+        for res, values in results:
+            if all(np.max(np.abs(np.angle(np.exp(1j * (res.x - other.x))))) > 1e-3 for other, _ in distinct):
+                distinct.append((res, values))
+
+        res, values = distinct[0]
+        self.F_optimal = res.x
+        self.res = res
+        return (res, (self.constraints[0], values), distinct[1:runner_ups + 1])
+
+    def gameTrajectories(self, yaws):
+        """
+        Returns the X and Z positions at every tick (one row per row of `yaws`) of moving with the float32 yaws `yaws` (in degrees) the way the 1.14+ computation of `PlayerSimulationXZ.move_new` does:
+        each yaw is converted to radians in float32 and then to an index into the 65536 entry float32 sine table (like `get_sin_cos`), and the acceleration and velocity are computed in double precision.
+        The 1.8 computation (`move_old`) converts the yaw differently and rounds the acceleration to float32, which this doesn't emulate.
+        Uses the same axes as `trajectory`, which this matches up to the differences between the sine table and `np.sin`/`np.cos`.
+        """
+        yaws = np.atleast_2d(np.asarray(yaws, dtype=np.float32))
+        scaled = (yaws * np.float32(F_DEG_TO_RAD)) * np.float32(F_RAD_TO_INDEX)
+        sines = SIN_TABLE_ARRAY[scaled.astype(np.int64) & 65535].astype(float)
+        cosines = SIN_TABLE_ARRAY[(scaled + np.float32(F_QUARTER_TURN_INDEX)).astype(np.int64) & 65535].astype(float)
+
+        count, size = yaws.shape
+        xs = np.zeros((count, size + 1))
+        zs = np.zeros((count, size + 1))
+        vx = np.zeros(count)
+        vz = np.zeros(count)
+        for tick in range(size):
+            if tick > 0:
+                vx = vx * self.imux[tick-1]
+                vz = vz * self.imuz[tick-1]
+            vx = vx + self.mmu[tick] * sines[:, tick]
+            vz = vz + self.mmu[tick] * cosines[:, tick]
+            xs[:, tick+1] = xs[:, tick] + vx
+            zs[:, tick+1] = zs[:, tick] + vz
+        return xs, zs
+
+    def gameScores(self, yaws, axis_to_optimize: OptimizeCellAxis, max_or_min: str):
+        """
+        Returns the constraint violation (see `GAME_EQUALITY_TOLERANCE`), the objective and the constraint values of the game trajectories of each row of `yaws`.
+        F and FC constraints only compare the yaws, which moved by up to half a float32 ulp when they were rounded from the optimized angles, so they are allowed to be off by one ulp of each yaw they use.
+        Otherwise an FC constraint the optimum is on the edge of (the usual case) would always fail by about 1e-8.
+        """
+        yaws = np.atleast_2d(yaws)
+        xs, zs = self.gameTrajectories(yaws)
+        final = (xs if axis_to_optimize == OptimizeCellAxis.X else zs)[:, -1]
+        objective = -final if max_or_min == 'max' else final
+        if not self.constraints[1]:
+            return np.zeros(len(yaws)), objective, np.zeros((len(yaws), 0))
+
+        values = (np.radians(yaws.astype(float)) @ self.constraintF.T + xs @ self.constraintPositionsX.T + zs @ self.constraintPositionsZ.T + self.constraintConstants)
+        angle_tolerance = np.radians(np.spacing(np.abs(yaws)).astype(float)) @ np.abs(self.constraintF.T) # 0 for constraints on positions
+        equalities = self.constraintTypes == 'eq'
+        violation = np.maximum(np.max(np.abs(values[:, equalities]) - np.maximum(angle_tolerance[:, equalities], self.GAME_EQUALITY_TOLERANCE), axis=1, initial=0.0),
+                               np.max(-values[:, ~equalities] - angle_tolerance[:, ~equalities], axis=1, initial=0.0))
+        return violation, objective, values
+
+    def verify(self, axis_to_optimize: OptimizeCellAxis, max_or_min: str):
+        """
+        Checks `F_optimal` against the game: snaps each angle to a float32 yaw and replays it with `gameTrajectories`.
+        If that breaks a constraint (which happens when the optimum is on its edge), or improves the objective, a local discrete search moves one yaw at a time by up to `GAME_SEARCH_RADIUS` steps of the sine table,
+        taking the move that reduces the constraint violation the most, or improves the objective the most once there is none.
+
+        Returns the yaws found (in degrees), whether they satisfy every constraint in game, their game trajectory, objective and constraint values, and the constraint violation of the snapped angles before searching.
+        """
+        yaws = np.degrees(self.F_optimal).astype(np.float32)
+        violation, objective, _ = self.gameScores(yaws, axis_to_optimize, max_or_min)
+        snapped_violation = violation[0]
+        current = (violation[0], objective[0])
+
+        step = 360 / 65536
+        offsets = np.array([offset * step for offset in range(-self.GAME_SEARCH_RADIUS, self.GAME_SEARCH_RADIUS + 1) if offset], dtype=np.float32)
+        size = len(yaws)
+        for _ in range(self.GAME_SEARCH_ROUNDS):
+            candidates = np.repeat(yaws[np.newaxis], size * len(offsets), axis=0)
+            rows = np.arange(len(candidates))
+            candidates[rows, rows // len(offsets)] += np.tile(offsets, size)
+            violation, objective, _ = self.gameScores(candidates, axis_to_optimize, max_or_min)
+            best = int(np.lexsort((objective, violation))[0])
+            if (violation[best], objective[best]) >= current:
+                break
+            yaws = candidates[best]
+            current = (violation[best], objective[best])
+
+        violation, objective, values = self.gameScores(yaws, axis_to_optimize, max_or_min)
+        xs, zs = self.gameTrajectories(yaws)
+        return {
+            'yaws': yaws,
+            'feasible': bool(violation[0] == 0),
+            'points': [[x, z] for x, z in zip(xs[0], zs[0])],
+            'objective': objective[0],
+            'constraint_values': list(values[0]),
+            'snapped_violation': snapped_violation,
+        }
+
     def postprocess(self):
         fopt = self.F_optimal.copy()
-        points = [[self.X(fopt, t) - self.X(fopt, 0),  self.Z(fopt, t) - self.Z(fopt, 0)] for t in range(0, self.n+1) ]
+        xs, zs = self.trajectory(fopt)
+        points = [[xs[t] - xs[0], zs[t] - zs[0]] for t in range(0, self.n+1)]
         f_optimal_degrees = fopt * 180.0 / np.pi
 
         return {
@@ -297,6 +522,14 @@ class Optimizer:
             # 'diffs': diffs
             # 'fopt2': fopt2,
 
+def solve_start(optimizer: Optimizer, axis_to_optimize: OptimizeCellAxis, max_or_min: str, x0: list[float], cancelled = None):
+    "Runs one start of `Optimizer.optimizeMultistart` and returns its result and constraint values. Runs in the pool's worker processes."
+    result = optimizer.optimize(axis_to_optimize, max_or_min, x0, cancelled=cancelled)
+    if isinstance(result[0], str):
+        return result
+    res, (_, values) = result
+    return res, values
+
 # if __name__ == "__main__":
 #     a = Optimizer()
 #     a.setupVars({})
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The modules live at the root of the repository and read their data files (like Docstrings/HelpStrings.json) relative to the working directory
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
@@ -0,0 +1,60 @@
+import random
+import struct
+import numpy as np
+import pytest
+import FloatMath
+from FloatMath import fround, fround_array, repeated_add
+
+FLOAT32_MAX = float(np.finfo(np.float32).max)
+
+def naive_add(x: float, v: float, n: int) -> float:
+    for _ in range(n):
+        x += v
+    return x
+
+@pytest.mark.parametrize("value", [0.0, -0.0, 0.1, -0.15, 0.91, 1e-46, 1e-40, 3.4028235e38, FLOAT32_MAX * (1 + 2**-25), FLOAT32_MAX * (1 + 2**-24), 1e39, -1e39, 1e300, float("inf"), float("-inf")])
+def test_fround_matches_numpy(value):
+    assert fround(value).hex() == float(np.float32(value)).hex()
+
+def test_fround_overflow_rounds_to_infinity():
+    assert fround(FLOAT32_MAX * (1 + 2**-25)) == FLOAT32_MAX
+    assert fround(FLOAT32_MAX * (1 + 2**-24)) == float("inf")
+    assert fround(-1e39) == float("-inf")
+
+def test_fround_overflow_fallback(monkeypatch):
+    # Depending on the platform, packing a double past FLOAT32_MAX raises OverflowError (the standard size format always does) and fround falls back to numpy
+    monkeypatch.setattr(FloatMath, "_pack", struct.Struct("<f").pack)
+    assert fround(1e39) == float("inf")
+    assert fround(-1e39) == float("-inf")
+    assert fround(FLOAT32_MAX * (1 + 2**-25)) == FLOAT32_MAX
+    assert fround(0.1) == float(np.float32(0.1))
+
+def test_fround_random():
+    rng = random.Random(0)
+    values = [rng.uniform(-1, 1) * 10 ** rng.randint(-45, 38) for _ in range(2000)]
+    assert [fround(value) for value in values] == [float(np.float32(value)) for value in values]
+    assert list(fround_array(values)) == [fround(value) for value in values]
+
+@pytest.mark.parametrize("x, v, n", [
+    (0.0, 0.1, 1000), # starts at 0 and crosses many binades
+    (1.0, 0.1, 1000),
+    (-5.0, 0.1, 1000), # crosses 0
+    (0.5, -0.013, 5000),
+    (1e16, 1.0, 100), # every addition is a tie
+    (1e16, 3.0, 100), # alternating ties
+    (2**53 - 10.0, 1.0, 40), # crosses a binade where the spacing doubles
+    (1.0, 1e-17, 100), # too small to change x
+    (0.0, 0.0, 10),
+    (3.0, -1.5, 10), # passes through -0.0 and 0.0
+    (1.0, 0.3, 0),
+])
+def test_repeated_add_matches_loop(x, v, n):
+    assert repeated_add(x, v, n).hex() == naive_add(x, v, n).hex()
+
+def test_repeated_add_random():
+    rng = random.Random(1)
+    for _ in range(500):
+        x = rng.uniform(-1, 1) * 10 ** rng.randint(-3, 6)
+        v = rng.uniform(-1, 1) * 10 ** rng.randint(-6, 2)
+        n = rng.randint(0, 3000)
+        assert repeated_add(x, v, n).hex() == naive_add(x, v, n).hex()
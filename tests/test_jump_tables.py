@@ -0,0 +1,130 @@
+"""
+Checks `PlayerSimulationY.duration` and `height`, which read from cached `JumpTable`s, against simulating each jump tick by tick.
+Each test also runs with tables that store only a few ticks, so that the ticks past `JumpTable.MAX_TICKS` are covered too.
+"""
+
+import random
+import pytest
+from Enums import ExpressionType
+from MothballSimulationY import PlayerSimulationY, JumpTable
+
+def reference_state(vy, inertia, gravity, slow_falling, ceiling):
+    "Yields the y and vy of a jump after every tick, the way `duration` and `height` computed them before the tables"
+    y = 0
+    while True:
+        yield y, vy
+        y = y + vy
+        if ceiling != 0.0 and y > ceiling - 1.8:
+            y = ceiling - 1.8
+            vy = 0
+        if slow_falling and vy <= 0:
+            vy = (vy - min(0.01, gravity)) * 0.98
+        else:
+            vy = (vy - gravity) * 0.98
+        if abs(vy) < inertia:
+            vy = 0
+
+def reference_duration(floor, ceiling, vy, inertia, gravity, slow_falling):
+    "Returns the ticks a jump takes to land on `floor`, or `None` if it can't"
+    previous = None
+    for ticks, (y, vy) in enumerate(reference_state(vy, inertia, gravity, slow_falling, ceiling)):
+        if not (y > floor or vy > 0):
+            return ticks if vy < 0 else None
+        if (y, vy) == previous or gravity <= 0 and vy >= 0 and ceiling == 0.0: # y never goes down again, where the old loop never ended
+            return None
+        previous = (y, vy)
+
+def reference_height(duration, ceiling, vy, inertia, gravity, slow_falling):
+    for ticks, (y, _) in enumerate(reference_state(vy, inertia, gravity, slow_falling, ceiling)):
+        if ticks >= duration:
+            return y
+
+def random_settings(rng: random.Random):
+    jump_boost = rng.choice([0, 0, 1, 2, 3, 128, 200, 250, 251, 252, 255])
+    jump_strength = rng.choice([0.42, 0.42, 0.5, 1.0, 0.1])
+    return {
+        "jump_boost": jump_boost,
+        "jump_strength": jump_strength,
+        "gravity": rng.choice([0.08, 0.08, 0.04, 0.01, 0.1, 0.02, 0.0, -0.02, 0.5, 0.001]),
+        "slow_falling": rng.choice([False, False, True]),
+        "inertia": rng.choice([0.005, 0.003, 0.0, 0.02, 0.1, 1.0]),
+    }, jump_strength + 0.1 * (jump_boost if jump_boost <= 128 else jump_boost - 256)
+
+def random_ceiling(rng: random.Random):
+    return rng.choice([0.0, 0.0, 0.0, 2.0, 2.5, 3.0, 1.5, rng.uniform(1.5, 4)])
+
+@pytest.fixture(params=[JumpTable.MAX_TICKS, 3], ids=["stored", "past_stored"])
+def max_ticks(request, monkeypatch):
+    "Runs the test with tables storing up to `MAX_TICKS`, then with tables storing only 3 ticks"
+    monkeypatch.setattr(JumpTable, "MAX_TICKS", request.param)
+    PlayerSimulationY.jump_table.cache_clear()
+    PlayerSimulationY.ceiling_table.cache_clear()
+    yield request.param
+    PlayerSimulationY.jump_table.cache_clear()
+    PlayerSimulationY.ceiling_table.cache_clear()
+
+def run_duration(floor, ceiling, **settings):
+    player = PlayerSimulationY()
+    player.duration(floor, ceiling, **settings)
+    record = player.output[-1]
+    if record.expression_type == ExpressionType.WARNING:
+        return None
+    return int(record.label.rsplit(": ", 1)[1].split()[0])
+
+def run_height(duration, ceiling, **settings):
+    player = PlayerSimulationY()
+    player.height(duration, ceiling, **settings)
+    return player.output[-1].values[0], player.precision
+
+def test_duration_random(max_ticks):
+    rng = random.Random(0)
+    for _ in range(1500):
+        settings, vy = random_settings(rng)
+        floor = rng.choice([0.0, 1.0, 1.25, -1.0, -0.5, 0.5, rng.uniform(-10, 3), -3.0625, 1.2492])
+        ceiling = random_ceiling(rng)
+        expected = reference_duration(floor, ceiling, vy, settings["inertia"], settings["gravity"], settings["slow_falling"])
+        assert run_duration(floor, ceiling, **settings) == expected, (floor, ceiling, settings)
+
+def test_height_random(max_ticks):
+    rng = random.Random(1)
+    for _ in range(1500):
+        settings, vy = random_settings(rng)
+        duration = rng.randint(-2, 60)
+        ceiling = random_ceiling(rng)
+        height, precision = run_height(duration, ceiling, **settings)
+        expected = reference_height(duration, ceiling, vy, settings["inertia"], settings["gravity"], settings["slow_falling"])
+        assert height == round(expected, precision), (duration, ceiling, settings)
+
+@pytest.mark.parametrize("floor, ceiling, settings", [
+    (-100000.0, 0.0, {}), # lands long after the stored ticks, at terminal velocity
+    (-3.0, 0.0, {"gravity": 0.00001, "inertia": 0.0}), # slow enough to land (and with 3 stored ticks, reach the apex) past the stored ticks
+    (-3.0, 3.0, {"gravity": 0.00001, "inertia": 0.0}),
+    (-8.75, 2.0, {"jump_boost": 251, "gravity": 0.0, "inertia": 0.0}), # vy gets stuck at the smallest negative float and never lands
+    (-3.5, 2.0, {"jump_boost": 251, "gravity": 0.0, "inertia": 0.0}),
+    (-1.0, 0.0, {"gravity": -0.02}),
+    (0.0, 0.0, {"gravity": 0.0001}), # gravity under the inertia threshold
+])
+def test_duration_edge_cases(max_ticks, floor, ceiling, settings):
+    settings = {"jump_boost": 0, "jump_strength": 0.42, "gravity": 0.08, "slow_falling": False, "inertia": 0.005} | settings
+    vy = settings["jump_strength"] + 0.1 * (settings["jump_boost"] if settings["jump_boost"] <= 128 else settings["jump_boost"] - 256)
+    expected = reference_duration(floor, ceiling, vy, settings["inertia"], settings["gravity"], settings["slow_falling"])
+    assert run_duration(floor, ceiling, **settings) == expected
+
+@pytest.mark.parametrize("duration, ceiling, settings", [
+    (100000, 0.0, {}),
+    (100001, 2.5, {"slow_falling": True}),
+    (50000, 3.0, {"gravity": 0.00001, "inertia": 0.0}),
+    (50000, 2.0, {"jump_boost": 251, "gravity": 0.0, "inertia": 0.0}),
+    (5000, 2.0, {"gravity": -0.02}),
+])
+def test_height_long(max_ticks, duration, ceiling, settings):
+    settings = {"jump_boost": 0, "jump_strength": 0.42, "gravity": 0.08, "slow_falling": False, "inertia": 0.005} | settings
+    vy = settings["jump_strength"] + 0.1 * (settings["jump_boost"] if settings["jump_boost"] <= 128 else settings["jump_boost"] - 256)
+    height, precision = run_height(duration, ceiling, **settings)
+    assert height == round(reference_height(duration, ceiling, vy, settings["inertia"], settings["gravity"], settings["slow_falling"]), precision)
+
+def test_repeated_calls_share_the_table(max_ticks):
+    # Later calls continue from where earlier ones stopped, in both directions
+    for duration in (30000, 10, 30001, 29999, 2):
+        height, precision = run_height(duration, 0.0)
+        assert height == round(reference_height(duration, 0.0, 0.42, 0.005, 0.08, False), precision)
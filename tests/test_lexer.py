@@ -0,0 +1,40 @@
+import pytest
+from Lexer import lex_texts, position, STRUCTURE
+from MothballSimulationXZ import PlayerSimulationXZ
+
+@pytest.mark.parametrize("text", [
+    'sj(12) sa.wd[wt](5, 45) outz(16) # comment | # s(2)',
+    'func(test, mity, code=print("hi {mity}"))\n\ttest(3)\r\n',
+    'print("a \\" b") \\ \\\\ x(0) | z(0)',
+    '',
+])
+def test_round_trip(text):
+    assert "".join(lex_texts(text)) == text
+    assert "".join(lex_texts(text, STRUCTURE, group_whitespace=True)) == text
+
+def test_tokens():
+    assert lex_texts('sa.wd(5, -45)') == ["sa", ".", "wd", "(", "5", ",", " ", "-", "45", ")"]
+    assert lex_texts('\\" a\\') == ['\\"', " ", "a", "\\"] # a backslash keeps the character it escapes
+    assert lex_texts('s(2)  \n\ts(3)|', STRUCTURE, group_whitespace=True) == ["s", "(", "2", ")", "  \n\t", "s", "(", "3", ")", "|"]
+
+def test_position():
+    text = "s(1)\nsj(12)\n\nw(3)"
+    assert position(text, 0) == (1, 1)
+    assert position(text, 5) == (2, 1)
+    assert position(text, 8) == (2, 4)
+    assert position(text, text.index("w")) == (4, 1)
+
+def test_parse():
+    player = PlayerSimulationXZ()
+    assert player.parse('sj(12) | s(3) # s(1) | # w.s(2)') == ["sj(12)", "x(0)", "z(0)", "s(3)", "w.s(2)"]
+    assert player.parse('outz("a | b #") repeat(s(1) | s(2), 2)') == ['outz("a | b #")', "repeat(s(1) | s(2), 2)"]
+
+@pytest.mark.parametrize("sequence, message", [
+    ("sj(12)s(2)", "Space needed at line 1, column 7"),
+    ("s(3)\n  sj(12))", "Unmatched brackets at line 2, column 9"),
+    ("s(3) (", "Unmatched open parethesis"),
+    ('outz("a)', 'Unmatched quotes'),
+])
+def test_parse_errors(sequence, message):
+    with pytest.raises(SyntaxError, match=message.replace("(", r"\(")):
+        PlayerSimulationXZ().parse(sequence)
@@ -0,0 +1,102 @@
+import numpy as np
+import pytest
+from concurrent.futures.process import BrokenProcessPool
+import optimizer as optimizer_module
+from optimizer import Optimizer
+from Enums import OptimizeCellAxis
+from FloatMath import fround, F_DEG_TO_RAD
+from MothballSimulationXZ import PlayerSimulationXZ
+
+def make_optimizer(ticks: int, constraints: list[list[str]] = (), drag: str = "0.91", acceleration: str = "0.026") -> Optimizer:
+    "An optimizer for a jump of `ticks` ticks (like the default table of the angle optimizer cell)"
+    optimizer = Optimizer()
+    optimizer.setupVars({"num_ticks": str(ticks)})
+    drags = ["0.546", "0.546"] + [drag] * (ticks - 2)
+    optimizer.setupConstants(drags, drags, ["0.3169516", "0.3274"] + [acceleration] * (ticks - 2))
+    optimizer.setupConstraints(list(constraints))
+    return optimizer
+
+def naive_positions(optimizer: Optimizer, F):
+    "X and Z at every tick, moving tick by tick"
+    xs, zs = [0.0], [0.0]
+    vx = vz = 0.0
+    for tick, angle in enumerate(F):
+        if tick > 0:
+            vx *= optimizer.imux[tick - 1]
+            vz *= optimizer.imuz[tick - 1]
+        vx += optimizer.mmu[tick] * np.sin(angle)
+        vz += optimizer.mmu[tick] * np.cos(angle)
+        xs.append(xs[-1] + vx)
+        zs.append(zs[-1] + vz)
+    return np.array(xs), np.array(zs)
+
+def test_trajectory_matches_moving_tick_by_tick():
+    optimizer = make_optimizer(12)
+    F = np.random.default_rng(0).uniform(-np.pi, np.pi, 12)
+    xs, zs = naive_positions(optimizer, F)
+    assert np.allclose(optimizer.trajectory(F)[0], xs)
+    assert np.allclose(optimizer.trajectory(F)[1], zs)
+
+def test_new_constants_invalidate_the_cached_trajectory():
+    optimizer = make_optimizer(12)
+    F = np.zeros(12)
+    assert optimizer.objectiveZ(F) == pytest.approx(naive_positions(optimizer, F)[1][-1])
+    optimizer.setupConstants(["1"] * 12, ["1"] * 12, ["1"] * 12)
+    assert optimizer.objectiveZ(F) == pytest.approx(sum(range(1, 13)))
+    optimizer.setupVars({"num_ticks": "12"})
+    optimizer.setupConstants(["0.5"] * 12, ["0.5"] * 12, ["1"] * 12)
+    assert optimizer.objectiveZ(F) == pytest.approx(naive_positions(optimizer, F)[1][-1])
+
+def test_multistart_finds_the_best_start():
+    optimizer = make_optimizer(12, [["yes", "x", "X", "12", "-", "", "<=", "0.5"], ["yes", "x2", "X", "12", "-", "", ">=", "-0.5"]])
+    single, _ = optimizer.optimize(OptimizeCellAxis.Z, "max", [0])
+    done = []
+    best, (names, values), runner_ups = optimizer.optimizeMultistart(OptimizeCellAxis.Z, "max", [[0]], 4, progress=lambda count, total: done.append((count, total)))
+    assert done == [(1, 4), (2, 4), (3, 4), (4, 4)]
+    assert names == ["x", "x2"] and len(values) == 2
+    assert optimizer.isFeasible(best.x)
+    assert best.fun <= single.fun + 1e-9
+
+def test_cancelling_a_start_solved_in_process(monkeypatch):
+    # Without worker processes, a cancel stops the start being solved instead of waiting for it to finish
+    def broken_pool():
+        raise BrokenProcessPool
+    monkeypatch.setattr(optimizer_module, "sweep_pool", broken_pool)
+    optimizer = make_optimizer(20, [["yes", "fc", "FC", "1", "-", "19", "<=", "30"]])
+    checks = 0
+    def cancelled():
+        nonlocal checks
+        checks += 1
+        return checks > 3
+    best, _, runner_ups = optimizer.optimizeMultistart(OptimizeCellAxis.Z, "max", [[1.5]], 50, cancelled=cancelled)
+    assert not best.success and best.nit <= 3
+    assert runner_ups == []
+
+@pytest.mark.parametrize("axis, max_or_min, constraints", [
+    (OptimizeCellAxis.Z, "max", [["yes", "fc", "FC", "0", "-", "19", "<", "5"], ["yes", "f", "F", "0", "-", "", "=", "60"]]),
+    (OptimizeCellAxis.Z, "max", [["yes", "fc", "FC", "0", "-", "19", "<", "4.7"], ["yes", "f", "F", "0", "-", "", "=", "61.3"]]),
+    (OptimizeCellAxis.X, "min", [["yes", "fc", "FC", "0", "-", "19", "<", "5"], ["yes", "f", "F", "0", "-", "", "=", "60"], ["yes", "x", "X", "20", "-", "", ">=", "1"]]),
+])
+def test_verify_accepts_a_binding_facing_chain(axis, max_or_min, constraints):
+    # Every turn of the chain is as large as the FC constraint allows, so rounding the angles to float32 yaws puts some of them just past it
+    optimizer = make_optimizer(20, constraints)
+    optimizer.optimizeMultistart(axis, max_or_min, [[0]], 8)
+    game = optimizer.verify(axis, max_or_min)
+    assert game["feasible"]
+    assert game["yaws"].dtype == np.float32
+    xs, zs = optimizer.gameTrajectories(game["yaws"])
+    assert game["points"] == [[x, z] for x, z in zip(xs[0], zs[0])]
+
+def test_game_trajectories_match_the_kernel():
+    # One w tick of the 1.14+ computation with no drag is the acceleration times the sine table entries of the yaw
+    player = PlayerSimulationXZ()
+    optimizer = make_optimizer(12)
+    yaws = np.array([[0.0, 33.3, -170.2, 90.0, 12.5, 45.0, -45.0, 179.9, -0.01, 1e-3, 270.0, -359.0]], dtype=np.float32)
+    xs, zs = optimizer.gameTrajectories(yaws)
+    velocities = np.diff(xs[0]), np.diff(zs[0])
+    for tick, yaw in enumerate(yaws[0]):
+        sin_yaw, cos_yaw = player.get_sin_cos(fround(float(yaw) * F_DEG_TO_RAD))
+        expected = (optimizer.imux[tick - 1] * velocities[0][tick - 1] if tick else 0.0) + optimizer.mmu[tick] * sin_yaw
+        assert velocities[0][tick] == pytest.approx(expected, abs=1e-15)
+        expected = (optimizer.imuz[tick - 1] * velocities[1][tick - 1] if tick else 0.0) + optimizer.mmu[tick] * cos_yaw
+        assert velocities[1][tick] == pytest.approx(expected, abs=1e-15)
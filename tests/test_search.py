@@ -0,0 +1,68 @@
+"""
+Checks that `search` branches on the variables its tokens actually read, and that pruning never changes which programs are found where the measure is monotonic.
+"""
+
+import pytest
+from BaseMothballSimulation import close_sweep_pool
+from MothballSimulationXZ import PlayerSimulationXZ
+
+@pytest.fixture(scope="module", autouse=True)
+def pool():
+    yield
+    close_sweep_pool()
+
+def search(arguments: str) -> list[str]:
+    player = PlayerSimulationXZ()
+    player.simulate(f"search({arguments})", return_defaults=False, suppress_exception=False)
+    return [line.label for line in player.output]
+
+def found(lines: list[str]) -> tuple[list[str], str]:
+    "The rows of programs found and the count of them, without the number skipped by pruning"
+    return lines[:-1], lines[-1].split(" (")[0]
+
+@pytest.mark.parametrize("token, expected", [
+    ("w.s(a)", {"a"}),
+    ("s.a(3)", set()),
+    ("sa45(b)", {"b"}),
+    ('print("s a")', set()),
+    ('print("{a + 1} blocks")', {"a"}),
+    ("repeat(s(a) sj(b), c)", {"a", "b", "c"}),
+    ("var(x, a * 2)", {"a"}),
+    ("var(x, a)", {"a"}),
+    ("outz", set()),
+])
+def test_token_variables(token, expected):
+    assert PlayerSimulationXZ().token_variables(token) == expected
+
+def test_custom_function_body_variables():
+    player = PlayerSimulationXZ()
+    player.simulate("function(run, x, code=s(x) sj(a))", return_defaults=False, suppress_exception=False)
+    assert player.token_variables("run(b)") == {"a", "b"}
+
+def test_recursive_custom_function_variables():
+    player = PlayerSimulationXZ()
+    player.simulate("function(run, x, code=s(x) sj(a) run(x))", return_defaults=False, suppress_exception=False)
+    assert player.token_variables("run(b)") == {"a", "b"}
+
+def test_input_named_like_a_variable_is_not_a_use():
+    # `s` is only used by the last token, `a` only by the first
+    lines = search("sj.a(a) s.s(3) sa(s), zmm, 0, 100, a, 1, 2, s, 1, 2")
+    assert lines[0].split() == ["a", "s", "zmm"]
+    assert lines[-1].startswith("4 of 4 programs")
+
+def test_pruning_is_off_by_default():
+    # Stopping, then turning, is not monotonic in either variable, pruning both ends misses every program
+    arguments = "s(b) f(a) s(12), outz, 2.0, 2.6, b, 0, 1, a, -90, 90"
+    default = search(arguments)
+    assert default == search(f"{arguments}, prune=false")
+    assert default[-1].startswith("88 of 362 programs")
+
+@pytest.mark.parametrize("arguments", [
+    "s(a) sj(b), zmm, 1.5, 1.6, a, 0, 12, b, 1, 12",
+    "sj(a) sa(b), zb, 2, 2.5, a, 1, 12, b, 0, 12",
+    "s(a) sj45(b), outz, 3, 4, a, 0, 6, b, 1, 12",
+])
+def test_pruning_keeps_every_program_of_a_monotonic_measure(arguments):
+    pruned, unpruned = search(f"{arguments}, prune=true"), search(arguments)
+    assert found(pruned) == found(unpruned)
+    assert not pruned[-1].endswith("(0 skipped by pruning)")
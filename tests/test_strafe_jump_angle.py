@@ -0,0 +1,34 @@
+"""
+Checks that the memoized `PlayerSimulationXZ.get_optimal_strafe_jump_angle` is the angle of a direct `sj.wa` (or `snsj.wa`) from rest with the same settings.
+"""
+
+from math import atan2, degrees
+import pytest
+from MothballSimulationXZ import PlayerSimulationXZ
+
+def direct_angle(setup: str, total_angles: int, sequence: str) -> float:
+    player = PlayerSimulationXZ()
+    player.total_angles = total_angles
+    player.simulate(f"{setup} {sequence}", return_defaults=False)
+    return abs(degrees(atan2(-player.vx, player.vz)))
+
+def memoized_angle(setup: str, total_angles: int, is_sneaking: bool) -> float:
+    player = PlayerSimulationXZ()
+    player.total_angles = total_angles
+    player.simulate(setup, return_defaults=False)
+    return player.get_optimal_strafe_jump_angle(is_sneaking=is_sneaking)
+
+@pytest.mark.parametrize("total_angles", [65536, -1, 4096])
+@pytest.mark.parametrize("setup", ['', 'v("1.14")', 'v("1.21")', 'v("1.21.5")', 'speed(2) slow(1)', 'v("1.21") speed(3)', 'slip(0.8)', 'sdel(false)', 'v("1.14") sndel(false)'])
+@pytest.mark.parametrize("is_sneaking", [False, True])
+def test_memoized_angle_matches_a_direct_jump(setup, total_angles, is_sneaking):
+    expected = direct_angle(setup, total_angles, "snsj.wa" if is_sneaking else "sj.wa")
+    assert memoized_angle(setup, total_angles, is_sneaking) == expected
+
+def test_computation_modes_are_cached_separately():
+    # The 1.8 angle is memoized first, the 1.14 one must not reuse it
+    old = memoized_angle("", 65536, False)
+    new = memoized_angle('v("1.14")', 65536, False)
+    assert old == direct_angle("", 65536, "sj.wa")
+    assert new == direct_angle('v("1.14")', 65536, "sj.wa")
+    assert old != new
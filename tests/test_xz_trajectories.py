@@ -0,0 +1,24 @@
+"""
+Regression test for the XZ movement kernel. \\
+`data/xz_trajectories.json` holds the position and velocity after every tick of each sequence, recorded (as float hex) with the implementation that did every operation with `numpy.float32` scalars.
+The float32 emulation in `FloatMath` has to reproduce them bit for bit.
+"""
+
+import os
+import json
+import pytest
+from MothballSimulationXZ import PlayerSimulationXZ
+
+with open(os.path.join(os.path.dirname(__file__), "data", "xz_trajectories.json")) as f:
+    EXPECTED = json.load(f)
+
+def trajectory(sequence: str) -> dict:
+    "Simulates `sequence` and returns its final x, z, vx, vz and those of every tick, as float hex"
+    player = PlayerSimulationXZ()
+    player.simulate(sequence, suppress_exception=False)
+    hexes = lambda *values: [float(value).hex() for value in values]
+    return {"final": hexes(player.x, player.z, player.vx, player.vz), "ticks": [hexes(tick.x, tick.z, tick.vx, tick.vz) for tick in player.history]}
+
+@pytest.mark.parametrize("sequence", list(EXPECTED))
+def test_trajectory_is_unchanged(sequence):
+    assert trajectory(sequence) == EXPECTED[sequence]